@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import Interview, Responses, Result
+from .models import Interview, Responses, Result, ResultVersion, TechnicalQuestion
 # Register your models here.
 admin.site.register(Interview)
 admin.site.register(Responses)
 admin.site.register(Result)
+admin.site.register(ResultVersion)
+admin.site.register(TechnicalQuestion)
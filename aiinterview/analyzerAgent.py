@@ -1,37 +1,36 @@
 from django.conf import settings
 import pandas as pd
 from typing import Dict, List, Tuple
-import spacy
 import re
-from collections import Counter
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-from langchain_groq import ChatGroq
+import numpy as np
 from langchain.prompts import ChatPromptTemplate
-
-# Download necessary NLTK data
-nltk.download('vader_lexicon', quiet=True)
+from hirevision.tracing import traced
+from .llm import get_chat_model
+from .vocabularyEngine import get_vocabulary_engine
+from .sentimentScorer import SENTIMENT_COLUMNS, get_sentiment_scorer
 
 GROQ_API_KEY = settings.GROQ_API_KEY
 
+
+def communication_score(grammar: float, clarity: float, professionalism: float, compound_sentiment: float) -> float:
+    """overall_communication_score: language quality weighted 0.7, sentiment 0.3"""
+    return (grammar + clarity + professionalism) / 3 * 0.7 + compound_sentiment * 0.3
+
+
+def combined_score(overall_technical: float, overall_communication: float) -> float:
+    """final_score: the mean of the technical and communication scores"""
+    return (overall_technical + overall_communication) / 2
+
+
 class InterviewAnalyzer:
     def __init__(self, groq_api_key: str):
-        self.llm = ChatGroq(
-            api_key=groq_api_key,
-            model_name="llama-3.1-8b-instant"
-        )
+        self.llm = get_chat_model("llama-3.1-8b-instant", api_key=groq_api_key)
         
-        # Load spaCy model for NLP tasks
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except:
-            # If model isn't installed, download it
-            import subprocess
-            subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
-            self.nlp = spacy.load("en_core_web_sm")
+        # Shared spaCy pipeline, loaded once per process instead of per interview
+        self.vocabulary_engine = get_vocabulary_engine()
         
-        # Initialize sentiment analyzer
-        self.sia = SentimentIntensityAnalyzer()
+        # Shared VADER scorer with a cache of already-scored answers
+        self.sentiment_scorer = get_sentiment_scorer()
         
         # Interview data
         self.interview_data = None
@@ -42,72 +41,43 @@ class InterviewAnalyzer:
         self.interview_data = pd.read_csv(csv_file)
         print(f"Loaded {len(self.interview_data)} questions from {csv_file}")
         return self.interview_data
+
+    def load_responses(self, responses: List[Dict]):
+        """Load interview data from question_number/question/answer dicts (no CSV round trip)"""
+        self.interview_data = pd.DataFrame(responses, columns=['question_number', 'question', 'answer'])
+        # Unanswered questions read back from a CSV as NaN; keep that for the analyses
+        self.interview_data['answer'] = self.interview_data['answer'].replace('', np.nan)
+        return self.interview_data
     
+    @traced('nlp.sentiment')
     def analyze_sentiment(self) -> Dict:
         """Analyze sentiment of responses"""
         if self.interview_data is None:
             raise Exception("No interview data loaded")
         
-        sentiment_scores = []
-        for _, row in self.interview_data.iterrows():
-            answer = row['answer']
-            if not isinstance(answer, str) or not answer.strip():
-                continue
-                
-            scores = self.sia.polarity_scores(answer)
-            sentiment_scores.append({
-                'question_number': row['question_number'],
-                'question': row['question'],
-                'negative': scores['neg'],
-                'neutral': scores['neu'],
-                'positive': scores['pos'],
-                'compound': scores['compound']
-            })
-        
-        sentiment_df = pd.DataFrame(sentiment_scores)
+        # Score all answers in one batch; unanswered rows come back as NaN and are dropped
+        scores = self.sentiment_scorer.score_batch(self.interview_data['answer'].tolist())
+        answered = ~np.isnan(scores).any(axis=1)
+        sentiment_df = pd.DataFrame(scores[answered], columns=list(SENTIMENT_COLUMNS))
+        sentiment_df.insert(0, 'question', self.interview_data['question'].to_numpy()[answered])
+        sentiment_df.insert(0, 'question_number', self.interview_data['question_number'].to_numpy()[answered])
         self.analysis_results['sentiment'] = sentiment_df
         return sentiment_df
     
+    @traced('nlp.vocabulary')
     def analyze_vocabulary(self) -> Dict:
         """Analyze vocabulary usage in responses"""
         if self.interview_data is None:
             raise Exception("No interview data loaded")
         
-        # Combine all answers into one text
-        all_text = " ".join(self.interview_data['answer'].dropna().astype(str))
-        
-        # Process with spaCy
-        doc = self.nlp(all_text)
-        
-        # Get word frequency (excluding stopwords and punctuation)
-        word_freq = Counter()
-        for token in doc:
-            if not token.is_stop and not token.is_punct and token.is_alpha:
-                word_freq[token.text.lower()] += 1
-        
-        # Get part-of-speech distribution
-        pos_dist = Counter()
-        for token in doc:
-            if token.is_alpha:
-                pos_dist[token.pos_] += 1
-        
-        # Get named entities
-        entities = []
-        for ent in doc.ents:
-            entities.append({
-                'text': ent.text,
-                'type': ent.label_
-            })
-        
-        vocab_analysis = {
-            'word_frequency': dict(word_freq.most_common(30)),
-            'pos_distribution': dict(pos_dist),
-            'entities': entities
-        }
+        # Batched nlp.pipe over the answers with a single pass over the tokens
+        answers = self.interview_data['answer'].dropna().astype(str).tolist()
+        vocab_analysis = self.vocabulary_engine.analyze(answers)
         
         self.analysis_results['vocabulary'] = vocab_analysis
         return vocab_analysis
     
+    @traced('analysis.grammar')
     def analyze_grammar(self) -> Dict:
         """Analyze grammar and language quality"""
         if self.interview_data is None:
@@ -165,6 +135,7 @@ class InterviewAnalyzer:
         self.analysis_results['grammar'] = grammar_scores
         return grammar_scores
     
+    @traced('analysis.technical')
     def analyze_technical_content(self) -> Dict:
         """Analyze technical content of responses"""
         if self.interview_data is None:
@@ -310,11 +281,10 @@ class InterviewAnalyzer:
         
         # Calculate overall scores
         overall_technical = sum(tech_averages.values()) / len(tech_averages)
-        overall_communication = (
-            sum(grammar_averages.values()) / len(grammar_averages) * 0.7 +
-            sentiment_averages['compound_sentiment'] * 0.3
+        overall_communication = communication_score(
+            *grammar_averages.values(), sentiment_averages['compound_sentiment']
         )
-        final_score = (overall_technical + overall_communication) / 2
+        final_score = combined_score(overall_technical, overall_communication)
         
         # Collect strengths and areas for improvement
         strengths = []
@@ -386,6 +356,17 @@ class InterviewAnalyzer:
         else:
             return "Communication could be improved. Focus on clarity, structure, and professional language in responses."
 
+def analyze_responses(responses: List[Dict], groq_api_key: str = None) -> dict:
+    """Run every analysis over an interview's responses and return the Result fields"""
+    analyzer = InterviewAnalyzer(groq_api_key or GROQ_API_KEY)
+    analyzer.load_responses(responses)
+    analyzer.analyze_sentiment()
+    analyzer.analyze_vocabulary()
+    analyzer.analyze_grammar()
+    analyzer.analyze_technical_content()
+    return analyzer.generate_analysis_json()
+
+
 def analyze_interview(csv_file: str, groq_api_key: str):
     """Main function to analyze an interview from CSV file"""
     try:
@@ -0,0 +1,268 @@
+"""
+Model backends for the resume enhancer, selected with ENHANCER_BACKEND (a
+dotted path, or one of the short names in BACKEND_ALIASES).
+
+- transformers: Hugging Face causal LM on CPU, Linear layers dynamically
+  quantized to int8 (ENHANCER_QUANTIZE)
+- onnx: the same model exported to ONNX and run with ONNX Runtime
+- gptq: GPTQ checkpoint through auto_gptq (GPU nodes; very slow on CPU)
+- remote: a hosted chat model through get_chat_model (Groq, or the fake
+  backend when LLM_BACKEND='fake')
+
+Heavy libraries are imported in load(), so importing this module (or
+selecting a backend) does not pull in torch. The enhancer worker calls
+warm_up() at boot so the first request does not pay for loading.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .textEnhancer import StreamingExtractor, build_prompt, extract_enhanced_text, section_marker
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ALIASES = {
+    'transformers': 'aiinterview.enhancerBackends.TransformersBackend',
+    'onnx': 'aiinterview.enhancerBackends.ONNXRuntimeBackend',
+    'gptq': 'aiinterview.enhancerBackends.GPTQBackend',
+    'remote': 'aiinterview.enhancerBackends.RemoteLLMBackend',
+}
+
+WARM_UP_TEXT = "Software developer. Built web applications."
+
+GENERATION_OPTIONS = {
+    'do_sample': True,
+    'temperature': 0.7,
+    'top_p': 0.95,
+    'repetition_penalty': 1.15,
+}
+
+
+class EnhancerBackend:
+    """Generates completions for a batch of prompts"""
+
+    name = 'base'
+
+    def __init__(self, model_name=None, max_new_tokens=None):
+        self.model_name = model_name or settings.ENHANCER_MODEL
+        self.max_new_tokens = max_new_tokens or settings.ENHANCER_MAX_NEW_TOKENS
+        self._load_lock = threading.Lock()
+        self.loaded = False
+
+    def load(self):
+        with self._load_lock:
+            if not self.loaded:
+                started = time.perf_counter()
+                self._load()
+                self.loaded = True
+                logger.info("Loaded %s enhancer backend (%s) in %.1fs",
+                            self.name, self.model_name, time.perf_counter() - started)
+
+    def warm_up(self):
+        """Load the model and run one short generation (first-call allocations, kernel selection)"""
+        self.load()
+        self.generate([build_prompt(WARM_UP_TEXT)], max_new_tokens=8)
+
+    def enhance_batch(self, items, max_new_tokens=None):
+        """
+        Enhanced texts for [(text, enhancement_type[, section]), ...], in order.
+        A section name switches to the section prompt.
+        """
+        self.load()
+        items = [tuple(item) + (None,) * (3 - len(item)) for item in items]
+        completions = self.generate([build_prompt(*item) for item in items],
+                                    max_new_tokens=max_new_tokens or self.max_new_tokens)
+        return [extract_enhanced_text(completion, kind, section)
+                for completion, (_, kind, section) in zip(completions, items)]
+
+    def enhance_stream(self, item, max_new_tokens=None):
+        """Yield the enhanced text of one (text, enhancement_type[, section]) item as it is generated"""
+        self.load()
+        text, kind, section = tuple(item) + (None,) * (3 - len(item))
+        prompt = build_prompt(text, kind, section)
+        extractor = StreamingExtractor(prompt, section_marker(kind, section))
+        for chunk in self.stream(prompt, max_new_tokens=max_new_tokens or self.max_new_tokens):
+            delta = extractor.feed(chunk)
+            if delta:
+                yield delta
+        rest = extractor.finish()
+        if rest:
+            yield rest
+
+    def count_tokens(self, text):
+        return len(text.split())
+
+    def _load(self):
+        raise NotImplementedError
+
+    def generate(self, prompts, max_new_tokens):
+        """Completion text (without the prompt) for each prompt"""
+        raise NotImplementedError
+
+    def stream(self, prompt, max_new_tokens):
+        """Completion text chunks for one prompt; backends that can't stream yield it whole"""
+        yield self.generate([prompt], max_new_tokens)[0]
+
+
+class TransformersBackend(EnhancerBackend):
+    """Causal LM on CPU with int8 dynamic quantization of its Linear layers"""
+
+    name = 'transformers'
+
+    def __init__(self, model_name=None, max_new_tokens=None, quantize=None, threads=None):
+        super().__init__(model_name, max_new_tokens)
+        self.quantize = settings.ENHANCER_QUANTIZE if quantize is None else quantize
+        self.threads = threads or settings.ENHANCER_THREADS
+        self.tokenizer = None
+        self.model = None
+
+    def _load_tokenizer(self):
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        if tokenizer.pad_token is None:
+            # Decoder-only models have no pad token; batching needs one, padded on the left
+            tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = 'left'
+        return tokenizer
+
+    def _load(self):
+        import torch
+        from transformers import AutoModelForCausalLM
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        self.tokenizer = self._load_tokenizer()
+        model = AutoModelForCausalLM.from_pretrained(self.model_name, torch_dtype=torch.float32)
+        model.eval()
+        if self.quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+
+    def _inputs(self, prompts):
+        return self.tokenizer(prompts, return_tensors='pt', padding=True)
+
+    def generate(self, prompts, max_new_tokens):
+        import torch
+
+        inputs = self._inputs(prompts)
+        with torch.inference_mode():
+            output = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                pad_token_id=self.tokenizer.pad_token_id,
+                **GENERATION_OPTIONS,
+            )
+        # Left padding: every prompt ends at the same position
+        new_tokens = output[:, inputs['input_ids'].shape[1]:]
+        return self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+
+    def stream(self, prompt, max_new_tokens):
+        import torch
+        from transformers import TextIteratorStreamer
+
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+
+        def run():
+            try:
+                with torch.inference_mode():
+                    self.model.generate(
+                        **self._inputs([prompt]),
+                        max_new_tokens=max_new_tokens,
+                        pad_token_id=self.tokenizer.pad_token_id,
+                        streamer=streamer,
+                        **GENERATION_OPTIONS,
+                    )
+            except BaseException:
+                # generate() only ends the streamer when it finishes; without this
+                # the consumer below would wait for tokens forever
+                streamer.end()
+                raise
+
+        # generate() feeds the streamer from another thread; its errors surface from result()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            generation = executor.submit(run)
+            yield from streamer
+            generation.result()
+
+    def count_tokens(self, text):
+        return len(self.tokenizer(text)['input_ids']) if self.tokenizer else super().count_tokens(text)
+
+
+class ONNXRuntimeBackend(TransformersBackend):
+    """The model exported to ONNX (cached in ENHANCER_ONNX_DIR) and run with ONNX Runtime"""
+
+    name = 'onnx'
+
+    def _load(self):
+        import os
+
+        from optimum.onnxruntime import ORTModelForCausalLM
+
+        export_dir = os.path.join(settings.ENHANCER_ONNX_DIR, self.model_name.replace('/', '--'))
+        self.tokenizer = self._load_tokenizer()
+        if os.path.isdir(export_dir):
+            self.model = ORTModelForCausalLM.from_pretrained(export_dir)
+        else:
+            self.model = ORTModelForCausalLM.from_pretrained(self.model_name, export=True)
+            self.model.save_pretrained(export_dir)
+
+
+class GPTQBackend(TransformersBackend):
+    """GPTQ-quantized checkpoint via auto_gptq, on CUDA when available"""
+
+    name = 'gptq'
+
+    def _load(self):
+        import torch
+        from auto_gptq import AutoGPTQForCausalLM
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.tokenizer = self._load_tokenizer()
+        self.model = AutoGPTQForCausalLM.from_quantized(
+            self.model_name,
+            use_safetensors=True,
+            device=device,
+            quantize_config=None
+        )
+
+    def _inputs(self, prompts):
+        return self.tokenizer(prompts, return_tensors='pt', padding=True).to(self.model.device)
+
+
+class RemoteLLMBackend(EnhancerBackend):
+    """A hosted chat model (ENHANCER_REMOTE_MODEL); batches become concurrent calls"""
+
+    name = 'remote'
+
+    def __init__(self, model_name=None, max_new_tokens=None):
+        super().__init__(model_name or settings.ENHANCER_REMOTE_MODEL, max_new_tokens)
+        self.llm = None
+
+    def _load(self):
+        from .llm import get_chat_model
+
+        self.llm = get_chat_model(self.model_name)
+
+    def warm_up(self):
+        # Nothing to load locally; skip the paid round trip
+        self.load()
+
+    def generate(self, prompts, max_new_tokens):
+        responses = self.llm.batch(prompts, config={'max_concurrency': len(prompts)},
+                                   max_tokens=max_new_tokens)
+        return [response.content for response in responses]
+
+    def stream(self, prompt, max_new_tokens):
+        for chunk in self.llm.stream(prompt, max_tokens=max_new_tokens):
+            yield chunk.content
+
+
+def get_backend(path=None, **options):
+    """Instantiate the backend named by `path` (default ENHANCER_BACKEND)"""
+    path = path or settings.ENHANCER_BACKEND
+    return import_string(BACKEND_ALIASES.get(path, path))(**options)
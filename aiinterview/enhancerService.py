@@ -0,0 +1,555 @@
+"""
+Resume enhancement as a separate inference service.
+
+The model lives in one long-lived worker (`manage.py run_enhancer`) instead of
+being loaded into every Django process. Django sends requests over a local
+socket (ENHANCER_SERVICE_ADDRESS, 'unix:/path' or 'tcp:host:port') as one JSON
+object per line. The worker queues them and runs them through the model in
+batches: it starts a batch as soon as a request arrives and keeps collecting
+for up to ENHANCER_BATCH_WAIT_MS or ENHANCER_MAX_BATCH_SIZE requests, so
+concurrent users share one generation pass and a lone request is not held
+back for long.
+
+A resume is split into its sections (experience, education, skills,
+projects), which are enhanced concurrently, each with a max_new_tokens budget
+proportional to its length, and stitched back together in order. Results are
+cached per section by (normalized text hash, enhancement type) with a TTL and
+an LRU size limit, so after an edit only the sections that changed are
+regenerated. Identical requests that arrive while one is being generated wait
+for that generation instead of starting their own.
+
+A request with "stream": true is answered with one {"delta": ...} line per
+piece of enhanced text and a final {"done": true}. The first enhanced section
+is streamed token by token as it is generated; the other sections are batched
+behind it and follow whole, in order, so the first text reaches the client
+long before the resume is finished.
+"""
+import asyncio
+import contextlib
+import functools
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .textEnhancer import split_sections, stitch_sections, token_budget
+
+logger = logging.getLogger(__name__)
+
+STREAM_LIMIT = 4 * 1024 * 1024  # longest request/response line, in bytes
+
+
+class EnhancerError(Exception):
+    """The enhancement service failed to enhance the text"""
+
+
+class EnhancerUnavailable(EnhancerError):
+    """The enhancement service is not running or dropped the connection"""
+
+
+class EnhancerTimeout(EnhancerError):
+    """The enhancement service did not answer within ENHANCER_REQUEST_TIMEOUT"""
+
+
+def parse_address(address):
+    """('unix', path) or ('tcp', (host, port)) from 'unix:/path' or 'tcp:host:port'"""
+    kind, _, rest = address.partition(':')
+    if kind == 'unix' and rest:
+        return 'unix', rest
+    if kind == 'tcp' and rest:
+        host, _, port = rest.rpartition(':')
+        return 'tcp', (host or '127.0.0.1', int(port))
+    raise ValueError(f"Invalid enhancer address {address!r}; use 'unix:/path' or 'tcp:host:port'")
+
+
+async def _open_connection(address):
+    kind, target = parse_address(address)
+    if kind == 'unix':
+        return await asyncio.open_unix_connection(target, limit=STREAM_LIMIT)
+    return await asyncio.open_connection(*target, limit=STREAM_LIMIT)
+
+
+async def enhance_remote(text, enhancement_type, address=None, timeout=None):
+    """Send one enhancement request to the service and wait for the enhanced text"""
+    address = address or settings.ENHANCER_SERVICE_ADDRESS
+    timeout = settings.ENHANCER_REQUEST_TIMEOUT if timeout is None else timeout
+    try:
+        reader, writer = await asyncio.wait_for(_open_connection(address), settings.ENHANCER_CONNECT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError) as exc:
+        raise EnhancerUnavailable(f"Cannot reach enhancer service at {address}: {exc}") from exc
+    try:
+        writer.write(json.dumps({'text': text, 'enhancement_type': enhancement_type}).encode() + b'\n')
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), timeout)
+    except asyncio.TimeoutError as exc:
+        raise EnhancerTimeout(f"Enhancer service did not answer within {timeout} seconds") from exc
+    except OSError as exc:
+        raise EnhancerUnavailable(f"Enhancer service connection failed: {exc}") from exc
+    finally:
+        writer.close()
+    if not line:
+        raise EnhancerUnavailable("Enhancer service closed the connection")
+    response = json.loads(line)
+    if 'error' in response:
+        raise EnhancerError(response['error'])
+    return response['enhanced_text']
+
+
+def _connect(address):
+    """Blocking socket connected to the service, or EnhancerUnavailable"""
+    kind, target = parse_address(address)
+    try:
+        if kind == 'unix':
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(settings.ENHANCER_CONNECT_TIMEOUT)
+            try:
+                sock.connect(target)
+            except OSError:
+                sock.close()
+                raise
+            return sock
+        return socket.create_connection(target, timeout=settings.ENHANCER_CONNECT_TIMEOUT)
+    except OSError as exc:
+        raise EnhancerUnavailable(f"Cannot reach enhancer service at {address}: {exc}") from exc
+
+
+def _send(sock, request, timeout):
+    try:
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(request).encode() + b'\n')
+    except OSError as exc:
+        sock.close()
+        raise EnhancerUnavailable(f"Enhancer service connection failed: {exc}") from exc
+
+
+def enhance_blocking(text, enhancement_type, address=None, timeout=None):
+    """
+    Blocking counterpart of enhance_remote for sync (WSGI) views: the calling
+    thread waits for the enhanced text, while the model runs in the service.
+    """
+    address = address or settings.ENHANCER_SERVICE_ADDRESS
+    timeout = settings.ENHANCER_REQUEST_TIMEOUT if timeout is None else timeout
+    sock = _connect(address)
+    _send(sock, {'text': text, 'enhancement_type': enhancement_type}, timeout)
+    with sock, sock.makefile('rb') as lines:
+        try:
+            line = lines.readline(STREAM_LIMIT)
+        except TimeoutError as exc:
+            raise EnhancerTimeout(f"Enhancer service did not answer within {timeout} seconds") from exc
+        except OSError as exc:
+            raise EnhancerUnavailable(f"Enhancer service connection failed: {exc}") from exc
+    if not line:
+        raise EnhancerUnavailable("Enhancer service closed the connection")
+    response = json.loads(line)
+    if 'error' in response:
+        raise EnhancerError(response['error'])
+    return response['enhanced_text']
+
+
+def open_enhance_stream(text, enhancement_type, address=None, timeout=None):
+    """
+    Start a streamed enhancement and return an iterator of text pieces.
+    Blocking on purpose: WSGI streaming responses iterate synchronously.
+    Raises EnhancerUnavailable right away when the service cannot be reached;
+    `timeout` bounds the wait for each piece, not the whole enhancement.
+    """
+    address = address or settings.ENHANCER_SERVICE_ADDRESS
+    timeout = settings.ENHANCER_REQUEST_TIMEOUT if timeout is None else timeout
+    sock = _connect(address)
+    _send(sock, {'text': text, 'enhancement_type': enhancement_type, 'stream': True}, timeout)
+    return _read_stream(sock, timeout)
+
+
+def _read_stream(sock, timeout):
+    with sock, sock.makefile('rb') as lines:
+        while True:
+            try:
+                line = lines.readline(STREAM_LIMIT)
+            except TimeoutError as exc:
+                raise EnhancerTimeout(f"Enhancer service sent nothing for {timeout} seconds") from exc
+            except OSError as exc:
+                raise EnhancerUnavailable(f"Enhancer service connection failed: {exc}") from exc
+            if not line:
+                raise EnhancerUnavailable("Enhancer service closed the connection")
+            message = json.loads(line)
+            if 'error' in message:
+                raise EnhancerError(message['error'])
+            if message.get('done'):
+                return
+            yield message['delta']
+
+
+async def fetch_stats(address=None):
+    """The running service's counters (requests, batches, cache hits, ...)"""
+    address = address or settings.ENHANCER_SERVICE_ADDRESS
+    try:
+        reader, writer = await asyncio.wait_for(_open_connection(address), settings.ENHANCER_CONNECT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError) as exc:
+        raise EnhancerUnavailable(f"Cannot reach enhancer service at {address}: {exc}") from exc
+    try:
+        writer.write(b'{"op": "stats"}\n')
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+
+def cache_key(text, enhancement_type, section=None):
+    # Whitespace differences (re-pasted text, trailing newlines) should still hit
+    normalized = ' '.join(text.split())
+    return f"{enhancement_type}:{section or ''}:{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+
+class EnhancementCache:
+    """LRU of enhanced texts with a TTL; each entry remembers what generating it cost"""
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = settings.ENHANCER_CACHE_SIZE if max_entries is None else max_entries
+        self.ttl = settings.ENHANCER_CACHE_TTL if ttl is None else ttl
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """(enhanced_text, generation_seconds) or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1], entry[2]
+
+    def put(self, key, text, cost):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, text, cost)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class EnhancerServer:
+    """
+    Batching front end for an enhancer (anything with
+    `enhance_batch([(text, enhancement_type), ...]) -> [enhanced_text, ...]`,
+    plus `enhance_stream(item) -> iterator of text pieces` for streaming).
+    Generation runs on a single dedicated thread, so the event loop keeps
+    accepting and queueing requests while a batch is being generated.
+    """
+
+    def __init__(self, enhancer, max_batch_size=None, batch_wait=None, cache=None):
+        self.enhancer = enhancer
+        self.max_batch_size = max_batch_size or settings.ENHANCER_MAX_BATCH_SIZE
+        self.batch_wait = settings.ENHANCER_BATCH_WAIT_MS / 1000 if batch_wait is None else batch_wait
+        self.cache = EnhancementCache() if cache is None else cache
+        self.stats = {
+            'requests': 0,  # sections (or whole resumes) generated
+            'batches': 0,
+            'errors': 0,
+            'generation_seconds': 0.0,
+            'cache_hits': 0,
+            'coalesced': 0,  # waited for an identical in-flight request
+            'cache_misses': 0,
+            'seconds_saved': 0.0,
+            'streams': 0,  # sections generated for a streaming request
+        }
+        self._inflight = {}
+        self._queue = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='enhancer')
+
+    async def serve(self, address=None, ready=None):
+        """Serve until cancelled; `ready` (an asyncio.Event) is set once listening"""
+        address = address or settings.ENHANCER_SERVICE_ADDRESS
+        self._queue = asyncio.Queue()
+        kind, target = parse_address(address)
+        if kind == 'unix':
+            if os.path.exists(target):
+                os.unlink(target)  # left over from a previous run
+            server = await asyncio.start_unix_server(self._handle, target, limit=STREAM_LIMIT)
+        else:
+            server = await asyncio.start_server(self._handle, *target, limit=STREAM_LIMIT)
+        batcher = asyncio.create_task(self._batch_loop())
+        logger.info("Enhancer service listening on %s", address)
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self._executor.shutdown(wait=False)
+            if kind == 'unix' and os.path.exists(target):
+                os.unlink(target)
+
+    def serve_in_thread(self, address=None):
+        """Serve from a background thread (benchmarks, tests); returns a function that stops it"""
+        loop = asyncio.new_event_loop()
+        listening = threading.Event()
+        running = {}
+
+        async def main():
+            ready = asyncio.Event()
+            running['task'] = asyncio.create_task(self.serve(address, ready=ready))
+            await ready.wait()
+            listening.set()
+            try:
+                await running['task']
+            except asyncio.CancelledError:
+                pass
+
+        thread = threading.Thread(target=loop.run_until_complete, args=(main(),), daemon=True)
+        thread.start()
+        listening.wait()
+
+        def stop():
+            loop.call_soon_threadsafe(running['task'].cancel)
+            thread.join(timeout=5)
+            loop.close()
+
+        return stop
+
+    async def _handle(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if request.get('op') == 'stats':
+                        response = self.stats_snapshot()
+                    elif request.get('stream'):
+                        response = await self._write_stream(writer, request)
+                    else:
+                        response = {'enhanced_text': await self.enhance_resume(
+                            str(request['text']), request.get('enhancement_type', 'professional')
+                        )}
+                except (ValueError, KeyError) as exc:
+                    response = {'error': f"Invalid request: {exc}"}
+                except Exception as exc:
+                    response = {'error': str(exc)}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # the client gave up
+        finally:
+            writer.close()
+
+    async def _write_stream(self, writer, request):
+        """Send one delta line per piece; returns the closing line"""
+        text = str(request['text'])
+        enhancement_type = request.get('enhancement_type', 'professional')
+        async with contextlib.aclosing(self.stream_resume(text, enhancement_type)) as pieces:
+            async for piece in pieces:
+                writer.write(json.dumps({'delta': piece}).encode() + b'\n')
+                await writer.drain()
+        return {'done': True}
+
+    def stats_snapshot(self):
+        lookups = self.stats['cache_hits'] + self.stats['coalesced'] + self.stats['cache_misses']
+        hit_rate = (self.stats['cache_hits'] + self.stats['coalesced']) / lookups if lookups else 0.0
+        return {**self.stats, 'hit_rate': round(hit_rate, 4), 'cache_entries': len(self.cache)}
+
+    async def enhance_resume(self, text, enhancement_type):
+        """Enhance the known sections concurrently and stitch them back in order"""
+        sections = split_sections(text)
+        if all(name is None for name, _, _ in sections):
+            return await self._enhance((text, enhancement_type, None), self._budget(text, enhancement_type))
+        enhanced = await asyncio.gather(*(
+            self._enhance((body, enhancement_type, name), self._budget(body, enhancement_type))
+            if name is not None and body else self._keep()
+            for name, _, body in sections
+        ))
+        return stitch_sections(sections, enhanced)
+
+    async def stream_resume(self, text, enhancement_type):
+        """
+        Yield the enhanced resume in pieces that concatenate to what
+        enhance_resume() returns: the first enhanced section as it is
+        generated, then the rest (batched in the meantime) in order.
+        """
+        sections = split_sections(text)
+        if all(name is None for name, _, _ in sections):
+            async for piece in self._stream((text, enhancement_type, None), self._budget(text, enhancement_type)):
+                yield piece
+            return
+
+        enhanced = [index for index, (name, _, body) in enumerate(sections) if name is not None and body]
+        streamed = enhanced[0] if enhanced else None
+        batched = {
+            index: asyncio.ensure_future(self._enhance((sections[index][2], enhancement_type, sections[index][0]),
+                                                       self._budget(sections[index][2], enhancement_type)))
+            for index in enhanced[1:]
+        }
+        try:
+            separator = ''
+            for index, (name, heading_line, body) in enumerate(sections):
+                if index == streamed:
+                    yield separator + (f"{heading_line}\n" if heading_line else '')
+                    async for piece in self._stream((body, enhancement_type, name),
+                                                    self._budget(body, enhancement_type)):
+                        yield piece
+                    separator = "\n\n"
+                    continue
+                part = body if index not in batched else await batched[index]
+                part = f"{heading_line}\n{part}".strip() if heading_line else part
+                if part:
+                    yield separator + part
+                    separator = "\n\n"
+        finally:
+            # The generations themselves are shielded and still fill the cache
+            for task in batched.values():
+                task.cancel()
+
+    @staticmethod
+    async def _keep():
+        return None
+
+    def _budget(self, text, enhancement_type):
+        return token_budget(text, enhancement_type, settings.ENHANCER_SECTION_MIN_TOKENS,
+                            settings.ENHANCER_MAX_NEW_TOKENS)
+
+    async def _enhance(self, item, budget):
+        key = cache_key(*item)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats['cache_hits'] += 1
+            self.stats['seconds_saved'] += cached[1]
+            return cached[0]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats['coalesced'] += 1
+            # shield: one waiter going away must not cancel everyone's generation
+            text, cost = await asyncio.shield(inflight)
+            self.stats['seconds_saved'] += cost
+            return text
+
+        self.stats['cache_misses'] += 1
+        future = asyncio.get_running_loop().create_future()
+
+        def settle(generation):
+            # Runs on the loop even if this request was cancelled, so the text is still cached
+            del self._inflight[key]
+            if generation.exception() is None:  # also marks a failure retrieved; waiters still see it
+                self.cache.put(key, *generation.result())
+
+        future.add_done_callback(settle)
+        self._inflight[key] = future
+        self._queue.put_nowait((item, budget, future))
+        text, _ = await asyncio.shield(future)
+        return text
+
+    async def _stream(self, item, budget):
+        """Yield one item's enhanced text as the enhancer produces it"""
+        key = cache_key(*item)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats['cache_hits'] += 1
+            self.stats['seconds_saved'] += cached[1]
+            yield cached[0]
+            return
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats['coalesced'] += 1
+            text, cost = await asyncio.shield(inflight)
+            self.stats['seconds_saved'] += cost
+            yield text
+            return
+
+        self.stats['cache_misses'] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        pieces = asyncio.Queue()
+        produced = []
+        finished = object()
+        started = time.perf_counter()
+
+        def produce():
+            for piece in self.enhancer.enhance_stream(item, max_new_tokens=budget):
+                produced.append(piece)
+                loop.call_soon_threadsafe(pieces.put_nowait, piece)
+
+        def done(generation):
+            # Runs on the loop even if the client went away, so waiters and the cache still get the text
+            del self._inflight[key]
+            elapsed = time.perf_counter() - started
+            self.stats['streams'] += 1
+            self.stats['generation_seconds'] += elapsed
+            if generation.exception() is not None:
+                logger.error("Streamed enhancement failed", exc_info=generation.exception())
+                self.stats['errors'] += 1
+                future.set_exception(EnhancerError(str(generation.exception())))
+                future.exception()  # retrieved here; waiters still see it
+            else:
+                text = ''.join(produced).strip()
+                self.cache.put(key, text, elapsed)
+                future.set_result((text, elapsed))
+            pieces.put_nowait(finished)
+
+        loop.run_in_executor(self._executor, produce).add_done_callback(done)
+        while (piece := await pieces.get()) is not finished:
+            yield piece
+        await future
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.batch_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return [entry for entry in batch if not entry[2].done()]
+
+    async def _batch_loop(self):
+        while True:
+            batch = await self._next_batch()
+            # One generate call per token budget; budgets are powers of two, so few groups
+            by_budget = {}
+            for item, budget, future in batch:
+                by_budget.setdefault(budget, []).append((item, future))
+            for budget, group in sorted(by_budget.items()):
+                await self._generate(group, budget)
+
+    async def _generate(self, group, budget):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            outputs = await loop.run_in_executor(
+                self._executor,
+                functools.partial(self.enhancer.enhance_batch, [item for item, _ in group], max_new_tokens=budget),
+            )
+        except Exception as exc:
+            logger.exception("Enhancement batch of %d failed", len(group))
+            self.stats['errors'] += len(group)
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(EnhancerError(str(exc)))
+        else:
+            # Each request's share of the batch is what a later cache hit saves
+            cost = (time.perf_counter() - started) / len(group)
+            for (_, future), output in zip(group, outputs):
+                if not future.done():
+                    future.set_result((output, cost))
+        self.stats['requests'] += len(group)
+        self.stats['batches'] += 1
+        self.stats['generation_seconds'] += time.perf_counter() - started
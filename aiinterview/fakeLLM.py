@@ -0,0 +1,132 @@
+import json
+import random
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class FakeLLMError(Exception):
+    """Injected failure from FakeChatGroq"""
+
+
+class LLMCallStats:
+    """Thread-safe counters for fake LLM calls, read by the benchmarks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.input_tokens = 0
+            self.output_tokens = 0
+
+    def record(self, input_tokens: int, output_tokens: int, error: bool = False):
+        with self._lock:
+            self.calls += 1
+            self.errors += int(error)
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'errors': self.errors,
+                'input_tokens': self.input_tokens,
+                'output_tokens': self.output_tokens,
+            }
+
+
+fake_llm_stats = LLMCallStats()
+
+
+def count_tokens(text: str) -> int:
+    # Whitespace words are close enough to tokens for relative comparisons
+    return len(text.split())
+
+
+class FakeChatGroq(BaseChatModel):
+    """
+    In-process stand-in for ChatGroq with configurable latency, output length
+    and error rate. It recognises the prompts used by the interview and analyzer
+    agents and answers in the format their parsers expect.
+    """
+    model_name: str = "fake-llama"
+    latency: float = 0.0
+    jitter: float = 0.0
+    output_tokens: int = 60
+    error_rate: float = 0.0
+    seed: Optional[int] = None
+
+    _rng: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq"
+
+    def _random(self) -> random.Random:
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return self._rng
+
+    def _filler(self, words: int) -> str:
+        return " ".join("lorem" for _ in range(max(words, 0)))
+
+    def _respond(self, prompt: str) -> str:
+        if '"grammar_score"' in prompt:
+            return json.dumps({
+                "grammar_score": 7, "clarity_score": 8, "professionalism_score": 7,
+                "strengths": ["clear structure"], "areas_for_improvement": ["more detail"],
+                "overall_impression": self._filler(self.output_tokens - 20),
+            })
+        if '"technical_accuracy"' in prompt:
+            return json.dumps({
+                "technical_accuracy": 7, "depth_of_knowledge": 6, "relevance_to_question": 8,
+                "technical_terms": ["api"], "strengths": ["practical examples"],
+                "areas_for_improvement": ["edge cases"],
+                "overall_technical_impression": self._filler(self.output_tokens - 25),
+            })
+        if '"question"' in prompt:
+            question = "Can you walk me through " + self._filler(self.output_tokens - 8) + "?"
+            return "```json\n" + json.dumps({"question": question}) + "\n```"
+        return self._filler(self.output_tokens)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        input_tokens = count_tokens(prompt)
+        rng = self._random()
+
+        delay = self.latency + (rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.error_rate and rng.random() < self.error_rate:
+            fake_llm_stats.record(input_tokens, 0, error=True)
+            raise FakeLLMError("Injected fake LLM failure")
+
+        content = self._respond(prompt)
+        output_tokens = count_tokens(content)
+        fake_llm_stats.record(input_tokens, output_tokens)
+        message = AIMessage(
+            content=content,
+            response_metadata={'model_name': self.model_name},
+            usage_metadata={
+                'input_tokens': input_tokens,
+                'output_tokens': output_tokens,
+                'total_tokens': input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
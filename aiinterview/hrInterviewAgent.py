@@ -0,0 +1,76 @@
+"""
+HR interview mode for the web API (interview_type='hr').
+
+Server-side port of agents/hr_interview_agent.HRInterviewAgent, which stays
+the desktop script. Nothing is kept between requests: every question is
+generated from the Interview and its Responses, so any process can serve any
+turn, and no tkinter, OpenCV, pygame or microphone code is imported.
+"""
+from django.conf import settings
+from langchain.output_parsers import ResponseSchema, StructuredOutputParser
+from langchain.prompts import ChatPromptTemplate
+
+from .llm import get_chat_model
+from .pdfExtractor import extract_pdf_text_isolated
+
+HR_QUESTION_PROMPT = ChatPromptTemplate.from_template(
+    """You are an expert HR interviewer. Based on the resume content and
+    previous conversation, generate a relevant HR interview question. The question should:
+    1. Assess the candidate's soft skills, communication abilities, and cultural fit
+    2. Cover topics like teamwork, conflict resolution, career goals, and workplace values
+    3. Be professional and appropriate for a formal interview setting
+    4. Not repeat previously asked questions
+    5. Follow up on interesting points from their previous answer if available
+
+    Resume Content:
+    {resume_content}
+
+    Previous Conversation:
+    {chat_history}
+
+    This is question number {question_number} out of {max_questions}.
+
+    {format_instructions}
+    """
+)
+
+_parser = StructuredOutputParser.from_response_schemas([
+    ResponseSchema(name="question", description="The HR interview question to ask")
+])
+
+
+class HRInterviewAgent:
+    """Generates HR questions for one interview from what is stored in the database"""
+
+    max_questions = 10
+
+    def __init__(self, interview):
+        self.interview = interview
+        self.llm = get_chat_model(settings.HR_INTERVIEW_MODEL)
+
+    def resume_content(self):
+        """The resume text, extracted from the uploaded PDF on first use and saved"""
+        interview = self.interview
+        if not interview.resume_content and interview.resume_file:
+            with interview.resume_file.open('rb') as resume:
+                interview.resume_content = extract_pdf_text_isolated(resume.read())
+            interview.save(update_fields=['resume_content'])
+        return interview.resume_content or "No resume provided."
+
+    def chat_history(self):
+        answered = self.interview.responses.exclude(answer='').order_by('question_number')
+        return "\n".join(
+            f"Question {response.question_number}: {response.question}\nAnswer: {response.answer}"
+            for response in answered.only('question_number', 'question', 'answer')
+        ) or "None yet."
+
+    def generate_question(self, question_number):
+        """The question to ask as question `question_number` (1-based)"""
+        response = (HR_QUESTION_PROMPT | self.llm).invoke({
+            "resume_content": self.resume_content(),
+            "chat_history": self.chat_history(),
+            "format_instructions": _parser.get_format_instructions(),
+            "question_number": question_number,
+            "max_questions": self.max_questions,
+        })
+        return _parser.parse(response.content)["question"]
@@ -1,25 +1,21 @@
 import base64
 import assemblyai as aai
-import pyaudio
 import wave
 import time
 from datetime import datetime
 import io
-import PyPDF2
 # from google.colab import files
 from typing import Dict, List
-from langchain_groq import ChatGroq
 from langchain.memory import ConversationBufferMemory
 from langchain.output_parsers import ResponseSchema, StructuredOutputParser
 from langchain.prompts import ChatPromptTemplate
-from gtts import gTTS
-import pygame
 import os
-import tkinter as tk
-from tkinter import filedialog
 from django.conf import settings
 from io import BytesIO
 from .models import Interview
+from .llm import get_chat_model
+from .pdfExtractor import extract_pdf_text_isolated, PDFExtractionTimeout
+from .questionAudio import GREETING_QUESTION, render as render_question_audio
 
 AAI_KEY = settings.AAI_KEY
 GROQ_API_KEY = settings.GROQ_API_KEY
@@ -27,6 +23,10 @@ GROQ_API_KEY = settings.GROQ_API_KEY
 
 class VoiceHandler:
     def __init__(self):
+        # Microphone and speaker libraries are only needed by the desktop loop
+        import pyaudio
+        import pygame
+
         # Audio recording parameters
         self.CHUNK = 1024
         self.FORMAT = pyaudio.paInt16
@@ -53,27 +53,22 @@ class VoiceHandler:
         self.temp_files = []
 
     def speak_text(self, text):
-        """Convert text to speech using Google TTS"""
-        try:
-            print(f"\nInterviewer: {text}")
+        """Speak text through the question audio cache (synthesized once per text)"""
+        import pygame
 
-            # Create a temporary file for the speech
-            temp_file = f"temp_speech_{time.time()}.mp3"
-            self.temp_files.append(temp_file)
-            tts = gTTS(text=text, lang='en')
-            tts.save(temp_file)
+        print(f"\nInterviewer: {text}")
+        audio_file, _ = render_question_audio(text)
 
-            # Play the audio
-            pygame.mixer.music.load(temp_file)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
-
-        finally:
-            self.cleanup()
+        # Play the audio
+        pygame.mixer.music.load(audio_file)
+        pygame.mixer.music.play()
+        while pygame.mixer.music.get_busy():
+            pygame.time.Clock().tick(10)
 
     def record_audio(self, filename, duration=10):
         """Record audio from microphone"""
+        import pyaudio
+
         p = pyaudio.PyAudio()
 
         print("Recording will start in 3 seconds...")
@@ -120,11 +115,11 @@ class ResumeInterviewAgent:
     def __init__(self, groq_api_key: str, interview_id: int = None, user_name: str = None):
         self.user_name = user_name
         self.interview_id = interview_id
-        self.llm = ChatGroq(
-            api_key=groq_api_key,
-            model_name="llama-3.1-8b-instant"
-            # model_name="llama-3.3-70b-versatile"
-            # model_name="mixtral-8x7b-32768"
+        self.llm = get_chat_model(
+            "llama-3.1-8b-instant",
+            # "llama-3.3-70b-versatile"
+            # "mixtral-8x7b-32768"
+            api_key=groq_api_key
         )
 
         self.memory = ConversationBufferMemory(
@@ -140,10 +135,16 @@ class ResumeInterviewAgent:
         self.parser = StructuredOutputParser.from_response_schemas([self.question_schema])
         self.format_instructions = self.parser.get_format_instructions()
         
-        #Initialize voice handler
-        self.voice_handler = VoiceHandler()
+        # Voice handler is only used by console interviews, so it is created on first use
+        self._voice_handler = None
         self.resume_content = None
 
+    @property
+    def voice_handler(self):
+        if self._voice_handler is None:
+            self._voice_handler = VoiceHandler()
+        return self._voice_handler
+
     def load_resume_from_interview(self, interview_id: int = None):
         """Load resume content from Interview model"""
         from .models import Interview  # Import here to avoid circular imports
@@ -189,15 +190,17 @@ class ResumeInterviewAgent:
                 # Assume it's a file-like object
                 pdf_file = resume_file
 
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-                
+            if hasattr(pdf_file, 'open') and hasattr(pdf_file, 'closed') and pdf_file.closed:
+                pdf_file.open('rb')
+            pdf_bytes = pdf_file.read()
+
             if hasattr(pdf_file, 'close'):
                 pdf_file.close()
-                
-            return text.strip()
+
+            # Extract page by page in the worker pool, bounded by page/char/time limits
+            return extract_pdf_text_isolated(pdf_bytes)
+        except PDFExtractionTimeout:
+            raise
         except Exception as e:
             raise Exception(f"Error reading PDF file: {str(e)}")
 
@@ -240,7 +243,7 @@ class ResumeInterviewAgent:
         
         # Check if this is the first question (no previous answer)
         if not previous_answer:
-            return f"Hello {self.user_name}! Could you please introduce yourself and tell me a bit about your background and experience?"
+            return f"Hello {self.user_name}! {GREETING_QUESTION}"
 
         question_prompt = ChatPromptTemplate.from_template(
             """You are an expert technical interviewer. Based on the resume content and
@@ -0,0 +1,19 @@
+from django.conf import settings
+from langchain_groq import ChatGroq
+
+from hirevision.tracing import LLMTracingCallback
+
+
+def get_chat_model(model_name: str, api_key: str = None):
+    """
+    Build the chat model used by the agents. LLM_BACKEND='fake' swaps Groq for an
+    in-process fake (see fakeLLM.FakeChatGroq) for benchmarks and dry runs.
+    """
+    if settings.LLM_BACKEND == 'fake':
+        from .fakeLLM import FakeChatGroq
+        return FakeChatGroq(model_name=model_name, callbacks=[LLMTracingCallback()], **settings.FAKE_LLM_OPTIONS)
+    return ChatGroq(
+        api_key=api_key or settings.GROQ_API_KEY,
+        model_name=model_name,
+        callbacks=[LLMTracingCallback()],
+    )
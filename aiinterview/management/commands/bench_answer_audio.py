@@ -0,0 +1,60 @@
+import io
+import statistics
+import time
+import wave
+
+from django.core.management.base import BaseCommand
+
+from aiinterview.transcription import get_transcriber
+
+
+def synthetic_wav(seconds, rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as audio:
+        audio.setnchannels(1)
+        audio.setsampwidth(2)
+        audio.setframerate(rate)
+        audio.writeframes(bytes(range(1, 256)) * (rate * 2 * seconds // 255))
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = ("Time from the end of an answer upload to its transcript: buffering the whole upload "
+            "before transcribing vs transcribing while it uploads")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', default='offline')
+        parser.add_argument('--seconds', type=int, default=30, help='Length of the spoken answer')
+        parser.add_argument('--upload-seconds', type=float, default=3.0, help='How long the upload takes')
+        parser.add_argument('--chunk-kb', type=int, default=64)
+        parser.add_argument('--latency', type=float, default=0.1,
+                            help='Offline backend: seconds of processing per second of audio')
+        parser.add_argument('--rounds', type=int, default=3)
+
+    def handle(self, *args, **options):
+        audio = synthetic_wav(options['seconds'])
+        chunk_size = options['chunk_kb'] * 1024
+        chunks = [audio[start:start + chunk_size] for start in range(0, len(audio), chunk_size)]
+        pause = options['upload_seconds'] / len(chunks)
+        backend_options = {'latency': options['latency']} if options['backend'] == 'offline' else {}
+
+        self.stdout.write(f"{'path':<12} {'after upload s':>15} {'total s':>9}")
+        for name, streamed in (('buffered', False), ('streamed', True)):
+            waits, totals = [], []
+            for _ in range(options['rounds']):
+                started = time.perf_counter()
+                buffered = []
+                transcriber = get_transcriber(options['backend'], **backend_options)
+                for chunk in chunks:
+                    time.sleep(pause)  # the client is still uploading
+                    if streamed:
+                        transcriber.feed(chunk)
+                    else:
+                        buffered.append(chunk)
+                uploaded = time.perf_counter()
+                for chunk in buffered:
+                    transcriber.feed(chunk)
+                transcriber.finish()
+                waits.append(time.perf_counter() - uploaded)
+                totals.append(time.perf_counter() - started)
+            self.stdout.write(f"{name:<12} {statistics.median(waits):>15.2f} {statistics.median(totals):>9.2f}")
@@ -0,0 +1,74 @@
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from aiinterview.enhancerBackends import get_backend
+from aiinterview.enhancerService import EnhancerServer
+
+from .bench_enhancer import ENHANCEMENT_TYPES, SAMPLE_RESUME
+
+
+class Command(BaseCommand):
+    help = ("Compare time to first byte and total time of /enhance-text/ and /enhance-text/stream/ "
+            "against an in-process enhancer service")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', default='transformers', help='Short name or dotted path')
+        parser.add_argument('--model', default='sshleifer/tiny-gpt2')
+        parser.add_argument('--requests', type=int, default=8, help='Sequential requests per endpoint')
+        parser.add_argument('--max-new-tokens', type=int, default=256)
+
+    def handle(self, *args, **options):
+        os.environ.setdefault('HF_HUB_OFFLINE', '1')
+        extra = {} if options['backend'] == 'remote' else {'model_name': options['model']}
+        enhancer = get_backend(options['backend'], max_new_tokens=options['max_new_tokens'], **extra)
+        enhancer.warm_up()
+
+        setup_test_environment()
+        address = f"unix:{os.path.join(tempfile.mkdtemp(), 'enhancer.sock')}"
+        stop = EnhancerServer(enhancer, batch_wait=0).serve_in_thread(address)
+        client = APIClient()
+        client.force_authenticate(User(id=1, username='bench'))
+        try:
+            with override_settings(ENHANCER_SERVICE_ADDRESS=address, ENHANCER_MAX_NEW_TOKENS=options['max_new_tokens']):
+                self.stdout.write(f"{'endpoint':<22} {'ttfb p50 s':>11} {'ttfb p95 s':>11} {'total p50 s':>12}")
+                for name, url, stream in (('enhance-text', reverse('enhance_text'), False),
+                                          ('enhance-text/stream', reverse('enhance_text_stream'), True)):
+                    self._report(name, [self._request(client, url, stream, number)
+                                        for number in range(options['requests'])])
+        finally:
+            stop()
+            teardown_test_environment()
+
+    def _request(self, client, url, stream, number):
+        # A fresh reference per request, so nothing is served from the enhancer cache
+        payload = {'text': f"{SAMPLE_RESUME}\nReference {uuid.uuid4().hex}",
+                   'enhancement_type': ENHANCEMENT_TYPES[number % 4]}
+        started = time.perf_counter()
+        response = client.post(url, payload, format='json')
+        if not stream:
+            # The whole enhancement is done before the response exists
+            elapsed = time.perf_counter() - started
+            return elapsed, elapsed
+        first = None
+        for chunk in response.streaming_content:
+            if first is None and b'"delta"' in chunk:
+                first = time.perf_counter() - started
+        total = time.perf_counter() - started
+        return (total if first is None else first), total
+
+    def _report(self, name, timings):
+        first = sorted(ttfb for ttfb, _ in timings)
+        totals = [total for _, total in timings]
+        p95 = first[min(len(first) - 1, int(len(first) * 0.95))]
+        self.stdout.write(f"{name:<22} {statistics.median(first):>11.3f} {p95:>11.3f} "
+                          f"{statistics.median(totals):>12.3f}")
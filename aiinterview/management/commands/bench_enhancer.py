@@ -0,0 +1,94 @@
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from aiinterview.enhancerBackends import get_backend
+from aiinterview.enhancerService import EnhancerServer, enhance_remote
+
+SAMPLE_RESUME = """Jane Doe - Software Developer
+Experience: built web applications, fixed bugs, worked on the user interface.
+Education: BSc Computer Science, 2019"""
+
+ENHANCEMENT_TYPES = ['professional', 'technical', 'concise', 'detailed']
+
+
+class Command(BaseCommand):
+    help = ("Benchmark resume enhancement in-request vs through the batching enhancer service, "
+            "using a tiny local model (offline once it is in the Hugging Face cache)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', default='transformers', help='Short name or dotted path')
+        parser.add_argument('--model', default='sshleifer/tiny-gpt2')
+        parser.add_argument('--requests', type=int, default=32)
+        parser.add_argument('--concurrency', type=int, default=8, help='Simultaneous enhance requests')
+        parser.add_argument('--max-new-tokens', type=int, default=64)
+        parser.add_argument('--max-batch-size', type=int, default=8)
+        parser.add_argument('--batch-wait-ms', type=float, default=20)
+
+    def handle(self, *args, **options):
+        os.environ.setdefault('HF_HUB_OFFLINE', '1')
+        enhancer = get_backend(options['backend'], model_name=options['model'],
+                               max_new_tokens=options['max_new_tokens'])
+        enhancer.warm_up()
+        items = [(f"{SAMPLE_RESUME}\nReference {number}", ENHANCEMENT_TYPES[number % 4])
+                 for number in range(options['requests'])]
+
+        self.stdout.write(f"{'path':<24} {'req/s':>8} {'p50 s':>8} {'p95 s':>8} {'batches':>8}")
+        self._report('in-request (serial)', *self._run_in_request(enhancer, items, options['concurrency']))
+        for batch_size in sorted({1, options['max_batch_size']}):
+            server = EnhancerServer(enhancer, max_batch_size=batch_size,
+                                    batch_wait=options['batch_wait_ms'] / 1000)
+            latencies, wall = self._run_service(server, items, options['concurrency'])
+            self._report(f'service (batch {batch_size})', latencies, wall, server.stats['batches'])
+
+    def _run_in_request(self, enhancer, items, concurrency):
+        # The previous setup: each request generates alone, one at a time per model copy
+        lock = None
+
+        async def one(item):
+            nonlocal lock
+            lock = lock or asyncio.Lock()
+            start = time.perf_counter()
+            async with lock:
+                await asyncio.to_thread(enhancer.enhance_batch, [item])
+            return time.perf_counter() - start
+
+        return self._drive(one, items, concurrency) + (len(items),)
+
+    def _run_service(self, server, items, concurrency):
+        with tempfile.TemporaryDirectory() as directory:
+            address = f"unix:{os.path.join(directory, 'enhancer.sock')}"
+            stop = server.serve_in_thread(address)
+
+            async def one(item):
+                start = time.perf_counter()
+                await enhance_remote(*item, address=address)
+                return time.perf_counter() - start
+
+            try:
+                return self._drive(one, items, concurrency)
+            finally:
+                stop()
+
+    def _drive(self, one, items, concurrency):
+        async def run():
+            slots = asyncio.Semaphore(concurrency)
+
+            async def limited(item):
+                async with slots:
+                    return await one(item)
+
+            return await asyncio.gather(*(limited(item) for item in items))
+
+        start = time.perf_counter()
+        latencies = asyncio.run(run())
+        return latencies, time.perf_counter() - start
+
+    def _report(self, name, latencies, wall, batches):
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(f"{name:<24} {len(latencies) / wall:>8.2f} {quantiles[49]:>8.2f} "
+                          f"{quantiles[94]:>8.2f} {batches:>8}")
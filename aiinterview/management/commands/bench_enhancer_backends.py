@@ -0,0 +1,57 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from aiinterview.enhancerBackends import get_backend
+from aiinterview.textEnhancer import build_prompt
+
+from .bench_enhancer import ENHANCEMENT_TYPES, SAMPLE_RESUME
+
+
+class Command(BaseCommand):
+    help = "Measure load time, warm-up time and generation tokens/sec for each enhancer backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', default='transformers,onnx',
+                            help='Comma-separated short names or dotted paths')
+        parser.add_argument('--model', default='sshleifer/tiny-gpt2')
+        parser.add_argument('--batch-sizes', default='1,4,8')
+        parser.add_argument('--max-new-tokens', type=int, default=64)
+        parser.add_argument('--rounds', type=int, default=3, help='Generations timed per batch size')
+        parser.add_argument('--no-quantize', action='store_true', help='Disable int8 for the transformers backend')
+
+    def handle(self, *args, **options):
+        os.environ.setdefault('HF_HUB_OFFLINE', '1')
+        batch_sizes = [int(size) for size in options['batch_sizes'].split(',')]
+        self.stdout.write(f"{'backend':<14} {'load s':>7} {'warm s':>7} {'batch':>6} {'tokens/s':>9} {'s/batch':>8}")
+        for name in options['backends'].split(','):
+            extra = {'quantize': False} if options['no_quantize'] and name == 'transformers' else {}
+            if name != 'remote':  # the remote backend uses ENHANCER_REMOTE_MODEL
+                extra['model_name'] = options['model']
+            try:
+                backend = get_backend(name, **extra)
+                started = time.perf_counter()
+                backend.load()
+                load_seconds = time.perf_counter() - started
+            except ImportError as exc:
+                self.stdout.write(f"{name:<14} skipped: {exc}")
+                continue
+            except Exception as exc:
+                raise CommandError(f"{name}: {exc}")
+            started = time.perf_counter()
+            backend.warm_up()
+            warm_seconds = time.perf_counter() - started
+            for batch_size in batch_sizes:
+                prompts = [build_prompt(f"{SAMPLE_RESUME}\nReference {number}", ENHANCEMENT_TYPES[number % 4])
+                           for number in range(batch_size)]
+                tokens, elapsed = 0, 0.0
+                for _ in range(options['rounds']):
+                    started = time.perf_counter()
+                    completions = backend.generate(prompts, max_new_tokens=options['max_new_tokens'])
+                    elapsed += time.perf_counter() - started
+                    tokens += sum(backend.count_tokens(completion) for completion in completions)
+                self.stdout.write(
+                    f"{backend.name:<14} {load_seconds:>7.1f} {warm_seconds:>7.1f} {batch_size:>6} "
+                    f"{tokens / elapsed if elapsed else 0:>9.1f} {elapsed / options['rounds']:>8.2f}"
+                )
@@ -0,0 +1,207 @@
+import json
+import resource
+import time
+from collections import defaultdict
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from aiinterview.fakeLLM import fake_llm_stats
+from aiinterview.models import TechnicalQuestion
+
+SAMPLE_ANSWER = (
+    "In my last role I designed a REST API in Django, added caching with Redis, "
+    "and cut the p95 latency of our search endpoint from 800ms to 120ms."
+)
+
+
+def percentiles(samples):
+    """p50/p95/p99 and mean of a list of seconds, reported in milliseconds"""
+    if not samples:
+        return {'count': 0}
+    values = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'count': len(samples),
+        'mean_ms': round(float(values.mean()), 2),
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class LifecycleRecorder:
+    """Collects latency, status codes and query counts per endpoint"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def call(self, endpoint, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+        self.latencies[endpoint].append(elapsed)
+        self.queries[endpoint].append(len(captured.captured_queries))
+        self.statuses[endpoint][response.status_code] += 1
+        return response
+
+    def summary(self):
+        return {
+            endpoint: {
+                **percentiles(samples),
+                'db_queries_mean': round(float(np.mean(self.queries[endpoint])), 2),
+                'status_codes': dict(self.statuses[endpoint]),
+            }
+            for endpoint, samples in self.latencies.items()
+        }
+
+
+class Command(BaseCommand):
+    help = ("Benchmark start_interview -> N x next_question -> get_results against the real views "
+            "with an in-process fake LLM; prints a table and optionally writes JSON")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', dest='interview_type', choices=['resume', 'hr', 'technical'],
+                            default='resume', help='Interview mode to run')
+        parser.add_argument('--bank-size', type=int, default=0,
+                            help='Technical mode: extra questions for other positions added to the bank')
+        parser.add_argument('--interviews', type=int, default=5)
+        parser.add_argument('--questions', type=int, default=10)
+        parser.add_argument('--latency', type=float, default=0.0, help='Fake LLM latency per call (seconds)')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Uniform +/- jitter on the latency')
+        parser.add_argument('--output-tokens', type=int, default=60)
+        parser.add_argument('--error-rate', type=float, default=0.0)
+        parser.add_argument('--retries', type=int, default=3, help='Retries for a failed next_question')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', dest='json_path', help='Write machine-readable results to this file')
+
+    def handle(self, *args, **options):
+        fake_options = {
+            'latency': options['latency'],
+            'jitter': options['jitter'],
+            'output_tokens': options['output_tokens'],
+            'error_rate': options['error_rate'],
+            'seed': options['seed'],
+        }
+        # Run against a throwaway test database with test-client friendly settings
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(LLM_BACKEND='fake', FAKE_LLM_OPTIONS=fake_options):
+                report = self._run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report['config'] = {key: options[key] for key in (
+            'interview_type', 'bank_size', 'interviews', 'questions', 'latency', 'jitter', 'output_tokens', 'error_rate', 'seed')}
+        self._print(report)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f"Wrote {options['json_path']}")
+
+    def _run(self, options):
+        recorder = LifecycleRecorder()
+        per_interview = []
+        if options['interview_type'] == 'technical':
+            self._load_bank(options['bank_size'])
+        fake_llm_stats.reset()
+        wall_start = time.perf_counter()
+
+        for number in range(options['interviews']):
+            user = User.objects.create_user(
+                username=f'bench{number}', email=f'bench{number}@example.com',
+                password='bench-password', first_name='Bench', last_name=str(number),
+            )
+            client = APIClient(raise_request_exception=False)
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+            before = fake_llm_stats.snapshot()
+
+            response = recorder.call(
+                'start_interview', client.post, '/aiinterview/start-interview/',
+                {'interview_type': options['interview_type'], 'position': 'software_engineer'}, format='json',
+            )
+            if response.status_code != 200:
+                continue
+            interview_id = response.data['interview_id']
+
+            for _ in range(options['questions']):
+                for _ in range(options['retries'] + 1):
+                    response = recorder.call(
+                        'next_question', client.post, '/aiinterview/next-question/',
+                        {'interview_id': interview_id, 'answer': SAMPLE_ANSWER}, format='json',
+                    )
+                    if response.status_code < 500:
+                        break
+                if response.data.get('status') == 'completed':
+                    break
+
+            recorder.call('get_results', client.get, f'/aiinterview/interview-results/{interview_id}/')
+
+            after = fake_llm_stats.snapshot()
+            per_interview.append({key: after[key] - before[key] for key in after})
+
+        wall = time.perf_counter() - wall_start
+        totals = fake_llm_stats.snapshot()
+        completed = max(len(per_interview), 1)
+        return {
+            'endpoints': recorder.summary(),
+            'llm': {
+                **totals,
+                'calls_per_interview': round(totals['calls'] / completed, 2),
+                'tokens_per_interview': round((totals['input_tokens'] + totals['output_tokens']) / completed, 1),
+            },
+            'llm_per_interview': per_interview,
+            'interviews_completed': len(per_interview),
+            'wall_seconds': round(wall, 3),
+            'interviews_per_second': round(len(per_interview) / wall, 3) if wall else 0.0,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+    def _load_bank(self, extra):
+        call_command('load_question_bank', stdout=StringIO())
+        # Other positions only make the table bigger; the interviews never draw from them
+        TechnicalQuestion.objects.bulk_create((
+            TechnicalQuestion(position=f'position_{number % 500}', difficulty='medium', topic=f'topic_{number % 7}',
+                              question=f'Synthetic question {number}', opening=number % 50 == 0)
+            for number in range(extra)
+        ), batch_size=5000)
+
+    def _print(self, report):
+        self.stdout.write(f"{'endpoint':<16} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}")
+        for endpoint, stats in report['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:<16} {stats['count']:>5} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+                f"{stats['p99_ms']:>9} {stats['db_queries_mean']:>8}"
+            )
+        llm = report['llm']
+        self.stdout.write(
+            f"LLM: {llm['calls']} calls ({llm['errors']} errors), {llm['calls_per_interview']} calls and "
+            f"{llm['tokens_per_interview']} tokens per interview"
+        )
+        self.stdout.write(
+            f"{report['interviews_completed']} interviews in {report['wall_seconds']}s, "
+            f"peak RSS {report['peak_rss_mb']} MB"
+        )
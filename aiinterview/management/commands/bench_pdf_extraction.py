@@ -0,0 +1,90 @@
+import io
+import time
+import tracemalloc
+
+import PyPDF2
+from django.core.management.base import BaseCommand
+
+from aiinterview.pdfExtractor import extract_pdf_text
+
+
+def build_synthetic_pdf(num_pages: int, lines_per_page: int = 40) -> bytes:
+    """Build a minimal text-only PDF with the given number of pages"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page_number in range(num_pages):
+        lines = [
+            f"({'Page %d line %d experience skills projects education' % (page_number + 1, line)}) Tj 0 -14 Td"
+            for line in range(lines_per_page)
+        ]
+        stream = ("BT /F1 10 Tf 40 800 Td " + " ".join(lines) + " ET").encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, num_pages)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref_offset = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset))
+    return out.getvalue()
+
+
+def _legacy_extract(pdf_bytes: bytes) -> str:
+    # The previous implementation: every page, quadratic string concatenation
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text() + "\n"
+    return text.strip()
+
+
+class Command(BaseCommand):
+    help = "Benchmark resume PDF text extraction throughput and peak memory on synthetic PDFs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, nargs='+', default=[2, 20, 200])
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--max-pages', type=int, default=10)
+        parser.add_argument('--max-chars', type=int, default=30000)
+
+    def _measure(self, func, pdf_bytes, repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            text = func(pdf_bytes)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed / repeat, peak, len(text)
+
+    def handle(self, *args, **options):
+        def streaming(pdf_bytes):
+            return extract_pdf_text(io.BytesIO(pdf_bytes), max_pages=options['max_pages'],
+                                    max_chars=options['max_chars'])
+
+        self.stdout.write(f"{'pages':>6} {'impl':>10} {'sec/pdf':>10} {'pages/s':>10} {'peak KiB':>10} {'chars':>8}")
+        for num_pages in options['pages']:
+            pdf_bytes = build_synthetic_pdf(num_pages)
+            for name, func in (('legacy', _legacy_extract), ('streaming', streaming)):
+                per_pdf, peak, chars = self._measure(func, pdf_bytes, options['repeat'])
+                self.stdout.write(
+                    f"{num_pages:>6} {name:>10} {per_pdf:>10.4f} {num_pages / per_pdf:>10.1f} "
+                    f"{peak / 1024:>10.1f} {chars:>8}"
+                )
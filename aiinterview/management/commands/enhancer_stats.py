@@ -0,0 +1,27 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from aiinterview.enhancerService import EnhancerUnavailable, fetch_stats
+
+
+class Command(BaseCommand):
+    help = "Show the running enhancer service's batching and cache statistics"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--address', help='Overrides ENHANCER_SERVICE_ADDRESS')
+
+    def handle(self, *args, **options):
+        try:
+            stats = asyncio.run(fetch_stats(options['address']))
+        except EnhancerUnavailable as exc:
+            raise CommandError(str(exc))
+        lookups = stats['cache_hits'] + stats['coalesced'] + stats['cache_misses']
+        self.stdout.write(f"requests:            {lookups}")
+        self.stdout.write(f"  cache hits:        {stats['cache_hits']}")
+        self.stdout.write(f"  joined in-flight:  {stats['coalesced']}")
+        self.stdout.write(f"  generated:         {stats['cache_misses']} ({stats['errors']} failed)")
+        self.stdout.write(f"hit rate:            {stats['hit_rate']:.1%}")
+        self.stdout.write(f"generation time:     {stats['generation_seconds']:.1f}s in {stats['batches']} batches")
+        self.stdout.write(f"generation saved:    {stats['seconds_saved']:.1f}s")
+        self.stdout.write(f"cached entries:      {stats['cache_entries']}")
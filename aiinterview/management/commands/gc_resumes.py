@@ -0,0 +1,89 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from aiinterview.models import Interview, ResumeBlob
+from aiinterview.storage import get_resume_storage
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed resume blobs that no interview references any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-minutes', type=int, default=60,
+                            help='Only collect blobs untouched for this long, so in-flight uploads are kept')
+        parser.add_argument('--recount', action='store_true',
+                            help='Recompute reference counts from Interview.resume_file before collecting')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        storage = get_resume_storage()
+        cutoff = timezone.now() - timedelta(minutes=options['grace_minutes'])
+        dry_run = options['dry_run']
+
+        if options['recount']:
+            self._recount()
+
+        removed = 0
+        freed = 0
+
+        # Blobs whose last reference has gone away
+        for blob in ResumeBlob.objects.filter(ref_count__lte=0, updated_at__lt=cutoff).iterator():
+            # A re-upload of the same bytes touches the file before its reference is counted
+            if storage.exists(blob.path) and storage.get_modified_time(blob.path) >= cutoff:
+                continue
+            if not dry_run and not self._collect(storage, blob, cutoff):
+                continue
+            self.stdout.write(f"unreferenced: {blob.path}")
+            removed += 1
+            freed += blob.size
+
+        # Files on disk with no blob row at all (crashed uploads, stale temp files)
+        known = set(ResumeBlob.objects.values_list('path', flat=True))
+        cutoff_ts = time.time() - options['grace_minutes'] * 60
+        for name, modified in storage.iter_blobs():
+            if name in known or modified >= cutoff_ts:
+                continue
+            self.stdout.write(f"orphaned: {name}")
+            if not dry_run:
+                freed += storage.size(name)
+                storage.delete(name)
+            removed += 1
+
+        verb = 'Would remove' if dry_run else 'Removed'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {removed} blob(s), {freed} bytes"))
+
+    def _collect(self, storage, blob, cutoff):
+        """Delete the blob row and its file unless an upload has referenced or touched it since it was read"""
+        with transaction.atomic():
+            deleted, _ = ResumeBlob.objects.filter(
+                pk=blob.pk, ref_count__lte=0, updated_at__lt=cutoff,
+            ).delete()
+            if not deleted:
+                return False
+            # Checked again with the row gone: an upload that touched the file keeps it
+            if storage.exists(blob.path) and storage.get_modified_time(blob.path) >= cutoff:
+                transaction.set_rollback(True)
+                return False
+            storage.delete(blob.path)
+        return True
+
+    def _recount(self):
+        counts = dict(
+            Interview.objects.exclude(resume_file='').exclude(resume_file__isnull=True)
+            .values_list('resume_file').annotate(n=Count('id'))
+        )
+        storage = get_resume_storage()
+        for path, n in counts.items():
+            if path.startswith('resumes/') and not ResumeBlob.objects.filter(path=path).exists():
+                size = storage.size(path) if storage.exists(path) else 0
+                ResumeBlob.objects.create(path=path, size=size, ref_count=n)
+        for blob in ResumeBlob.objects.iterator():
+            expected = counts.get(blob.path, 0)
+            if blob.ref_count != expected:
+                self.stdout.write(f"recount {blob.path}: {blob.ref_count} -> {expected}")
+                ResumeBlob.objects.filter(pk=blob.pk).update(ref_count=expected)
@@ -0,0 +1,63 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from aiinterview.models import TechnicalQuestion
+from aiinterview.technicalInterviewAgent import bank_position
+
+DEFAULT_BANK = Path(__file__).resolve().parents[2] / 'data' / 'question_bank.jsonl'
+
+
+class Command(BaseCommand):
+    help = ("Bulk-load technical interview questions from JSONL, one object per line with position, "
+            "difficulty, topic, question and optionally opening=true")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=str(DEFAULT_BANK))
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per query')
+        parser.add_argument('--replace', action='store_true', help='Delete the existing bank first')
+
+    def handle(self, *args, **options):
+        difficulties = dict(TechnicalQuestion.DIFFICULTY_CHOICES)
+        start = time.perf_counter()
+        read = 0
+        with transaction.atomic():
+            if options['replace']:
+                TechnicalQuestion.objects.all().delete()
+            before = TechnicalQuestion.objects.count()
+
+            batch = []
+            with open(options['path'], encoding='utf-8') as bank:
+                for line_number, line in enumerate(bank, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                        question = TechnicalQuestion(
+                            position=bank_position(row['position']),
+                            difficulty=row['difficulty'],
+                            topic=row['topic'].strip().lower(),
+                            question=' '.join(row['question'].split()),
+                            opening=bool(row.get('opening', False)),
+                        )
+                    except (ValueError, KeyError, AttributeError) as exc:
+                        raise CommandError(f"Line {line_number}: invalid question ({exc!r})")
+                    if question.difficulty not in difficulties:
+                        raise CommandError(f"Line {line_number}: difficulty must be one of: {', '.join(difficulties)}")
+                    batch.append(question)
+                    read += 1
+                    if len(batch) >= options['batch_size']:
+                        # Questions already in the bank are skipped, so loading is repeatable
+                        TechnicalQuestion.objects.bulk_create(batch, ignore_conflicts=True)
+                        batch = []
+            TechnicalQuestion.objects.bulk_create(batch, ignore_conflicts=True)
+            added = TechnicalQuestion.objects.count() - before
+
+        elapsed = time.perf_counter() - start
+        rate = read / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {added} new questions ({read - added} already in the bank) in {elapsed:.2f}s ({rate:.0f} rows/s)"
+        ))
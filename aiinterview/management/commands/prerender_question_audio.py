@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from aiinterview.questionAudio import COMMON_PHRASES, TTSError, render
+
+
+class Command(BaseCommand):
+    help = "Synthesize the phrases every interview speaks (the greeting, the closing) into the question audio cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('texts', nargs='*', help='Extra texts to render')
+
+    def handle(self, *args, **options):
+        for text in (*COMMON_PHRASES, *options['texts']):
+            started = time.perf_counter()
+            try:
+                path, _ = render(text)
+            except TTSError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(f"{time.perf_counter() - started:6.2f}s  {path}  {text[:60]}")
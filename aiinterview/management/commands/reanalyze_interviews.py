@@ -0,0 +1,207 @@
+import functools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test.utils import override_settings
+
+from aiinterview.analyzerAgent import analyze_responses
+from aiinterview.models import Interview, Responses, Result, ResultVersion
+from hirevision.tracing import RequestTrace, activate, deactivate
+
+USAGE_KEYS = ('llm_calls', 'input_tokens', 'output_tokens')
+
+
+def analyze_job(job, llm_backend):
+    """
+    Pool task: analyze one interview's responses, with its LLM usage taken from the trace.
+    The LLM backend is passed in rather than read from the worker's settings, which only
+    match the parent's when the worker happens to be forked.
+    """
+    interview_id, responses = job
+    trace = RequestTrace()
+    token = activate(trace)
+    try:
+        with override_settings(LLM_BACKEND=llm_backend):
+            analysis, error = analyze_responses(responses), None
+    except Exception as exc:
+        analysis, error = None, f"{type(exc).__name__}: {exc}"
+    finally:
+        deactivate(token)
+    llm_spans = [item for item in trace.spans if item['stage'] == 'llm']
+    return {
+        'interview_id': interview_id,
+        'analysis': analysis,
+        'error': error,
+        'llm_calls': len(llm_spans),
+        'input_tokens': sum(item['input_tokens'] for item in llm_spans),
+        'output_tokens': sum(item['output_tokens'] for item in llm_spans),
+    }
+
+
+def llm_cost(input_tokens, output_tokens):
+    return (input_tokens * settings.LLM_INPUT_COST_PER_MTOK
+            + output_tokens * settings.LLM_OUTPUT_COST_PER_MTOK) / 1_000_000
+
+
+class Command(BaseCommand):
+    help = ("Re-run the interview analysis over completed interviews and store the output as new "
+            "Result versions. Progress is checkpointed after every chunk, so an interrupted run "
+            "continues where it stopped")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=50,
+                            help='Interviews loaded, analyzed and checkpointed together')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Process pool size; 1 analyzes in this process')
+        parser.add_argument('--checkpoint', default='reanalyze_interviews.checkpoint.json',
+                            help='Progress file, removed once every interview has been analyzed')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+        parser.add_argument('--limit', type=int, help='Stop after this many interviews')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Analyze with the fake LLM (LLM_BACKEND=fake) and write nothing')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        dry_run = options['dry_run']
+        path = options['checkpoint']
+        state = None if dry_run or options['restart'] else self._load_checkpoint(path)
+        if state:
+            self.stdout.write(f"Resuming after interview {state['last_interview_id']} ({state['analyzed']} done)")
+        else:
+            state = {'last_interview_id': 0, 'analyzed': 0, 'failed': [], **dict.fromkeys(USAGE_KEYS, 0)}
+
+        workers = options['workers']
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        analyze = functools.partial(analyze_job, llm_backend='fake' if dry_run else settings.LLM_BACKEND)
+        limit = options['limit']
+        session = {'analyzed': 0, 'failed': 0, **dict.fromkeys(USAGE_KEYS, 0)}
+        finished = False
+        start = time.perf_counter()
+        try:
+            while limit is None or session['analyzed'] + session['failed'] < limit:
+                size = options['chunk_size']
+                if limit is not None:
+                    size = min(size, limit - session['analyzed'] - session['failed'])
+                # Keyset pagination: the checkpoint is simply the last interview id handled
+                interview_ids = list(
+                    Interview.objects.filter(completed=True, id__gt=state['last_interview_id'])
+                    .order_by('id').values_list('id', flat=True)[:size]
+                )
+                if not interview_ids:
+                    finished = True
+                    break
+
+                jobs = self._jobs(interview_ids)
+                if executor:
+                    # Workers are forked on submit; don't hand them the parent's database connection
+                    connections.close_all()
+                    outcomes = executor.map(analyze, jobs)
+                else:
+                    outcomes = map(analyze, jobs)
+                for outcome in outcomes:
+                    for key in USAGE_KEYS:
+                        session[key] += outcome[key]
+                        state[key] += outcome[key]
+                    if outcome['error']:
+                        session['failed'] += 1
+                        state['failed'].append(outcome['interview_id'])
+                        self.stderr.write(f"Interview {outcome['interview_id']}: {outcome['error']}")
+                        continue
+                    if not dry_run:
+                        self._store(outcome['interview_id'], outcome['analysis'])
+                    session['analyzed'] += 1
+                    state['analyzed'] += 1
+
+                state['last_interview_id'] = interview_ids[-1]
+                if not dry_run:
+                    self._save_checkpoint(path, state)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"  up to interview {interview_ids[-1]}: {session['analyzed']} analyzed, "
+                    f"{session['failed']} failed ({session['analyzed'] / elapsed:.2f} interviews/s)"
+                )
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+        if finished and not dry_run and os.path.exists(path):
+            os.remove(path)
+        self._report(session, state, time.perf_counter() - start, workers, dry_run, finished)
+
+    def _jobs(self, interview_ids):
+        responses = {interview_id: [] for interview_id in interview_ids}
+        rows = (
+            Responses.objects.filter(interview_id__in=interview_ids)
+            .order_by('interview_id', 'question_number')
+            .values('interview_id', 'question_number', 'question', 'answer')
+        )
+        for row in rows:
+            responses[row.pop('interview_id')].append(row)
+        return list(responses.items())
+
+    def _store(self, interview_id, analysis):
+        """Save `analysis` as the interview's Result, keeping the one it replaces as a ResultVersion"""
+        values = {field: analysis[field] for field in Result.ANALYSIS_FIELDS}
+        with transaction.atomic():
+            # The interview is loaded for the rollups, which are grouped by interview type
+            result = (Result.objects.select_for_update().select_related('interview')
+                      .filter(interview_id=interview_id).first())
+            if result is None:
+                Result.objects.create(interview_id=interview_id, **values)
+                return
+            ResultVersion.objects.create(
+                result=result, version=result.version,
+                analysis={field: getattr(result, field) for field in Result.ANALYSIS_FIELDS},
+            )
+            for field, value in values.items():
+                setattr(result, field, value)
+            result.version += 1
+            # save() rather than bulk_update so the analytics rollups follow the new scores
+            result.save()
+
+    def _load_checkpoint(self, path):
+        try:
+            with open(path) as checkpoint:
+                return json.load(checkpoint)
+        except FileNotFoundError:
+            return None
+        except ValueError as exc:
+            raise CommandError(f"Unreadable checkpoint {path} ({exc}); use --restart to start over")
+
+    def _save_checkpoint(self, path, state):
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.checkpoint-')
+        with os.fdopen(fd, 'w') as tmp_file:
+            json.dump(state, tmp_file)
+        os.replace(tmp_path, path)
+
+    def _report(self, session, state, elapsed, workers, dry_run, finished):
+        done = session['analyzed'] + session['failed']
+        rate = session['analyzed'] / elapsed if elapsed else 0.0
+        cost = llm_cost(session['input_tokens'], session['output_tokens'])
+        per_interview = cost / done if done else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-analyzed {session['analyzed']} interviews ({session['failed']} failed) in {elapsed:.2f}s "
+            f"with {workers} worker(s): {rate:.2f} interviews/s"
+        ))
+        self.stdout.write(
+            f"LLM: {session['llm_calls']} calls, {session['input_tokens']} input and "
+            f"{session['output_tokens']} output tokens, ${cost:.4f} (${per_interview:.5f} per interview)"
+        )
+        if dry_run:
+            self.stdout.write("Dry run: fake LLM, nothing written")
+        elif not finished:
+            total = llm_cost(state['input_tokens'], state['output_tokens'])
+            self.stdout.write(
+                f"Stopped after interview {state['last_interview_id']}; run again to continue "
+                f"({state['analyzed']} analyzed so far, ${total:.4f})"
+            )
+        if state['failed']:
+            self.stdout.write(self.style.WARNING(f"Failed interviews: {state['failed']}"))
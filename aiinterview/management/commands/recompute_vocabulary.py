@@ -0,0 +1,59 @@
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from aiinterview.models import Responses, Result
+from aiinterview.vocabularyEngine import analyze_vocabulary_parallel, vocabulary_pool
+
+
+class Command(BaseCommand):
+    help = "Recompute Result.vocabulary_analysis for every completed interview"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Interviews loaded and written per database round trip')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Process pool size (defaults to VOCABULARY_WORKERS)')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        results = Result.objects.order_by('interview_id').only('id', 'interview_id')
+
+        start = time.perf_counter()
+        processed = 0
+        chunk = []
+        # One pool for the whole run, so each worker loads the spaCy model once
+        pool = vocabulary_pool(options['workers'])
+        with pool or nullcontext():
+            for result in results.iterator(chunk_size=chunk_size):
+                chunk.append(result)
+                if len(chunk) >= chunk_size:
+                    processed += self._process_chunk(chunk, pool)
+                    chunk = []
+            if chunk:
+                processed += self._process_chunk(chunk, pool)
+
+        elapsed = time.perf_counter() - start
+        rate = processed / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed vocabulary for {processed} interviews in {elapsed:.2f}s ({rate:.1f} interviews/s)"
+        ))
+
+    def _process_chunk(self, chunk, pool):
+        answers_by_interview = {result.interview_id: [] for result in chunk}
+        rows = (
+            Responses.objects.filter(interview_id__in=answers_by_interview)
+            .order_by('interview_id', 'question_number')
+            .values_list('interview_id', 'answer')
+        )
+        for interview_id, answer in rows:
+            answers_by_interview[interview_id].append(answer)
+
+        analyses = analyze_vocabulary_parallel(
+            [answers_by_interview[result.interview_id] for result in chunk], workers=1, executor=pool
+        )
+        for result, analysis in zip(chunk, analyses):
+            result.vocabulary_analysis = analysis
+        Result.objects.bulk_update(chunk, ['vocabulary_analysis'])
+        return len(chunk)
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from aiinterview.analyzerAgent import combined_score, communication_score
+from aiinterview.models import Responses, Result
+from aiinterview.sentimentScorer import aggregate_by_group, get_sentiment_scorer
+
+
+class Command(BaseCommand):
+    help = ("Re-score sentiment for every stored answer and update the per-interview Result averages "
+            "and the scores derived from them")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Interviews scored and written per batch')
+
+    def handle(self, *args, **options):
+        scorer = get_sentiment_scorer()
+        chunk_size = options['chunk_size']
+        interview_ids = list(Result.objects.order_by('interview_id').values_list('interview_id', flat=True))
+
+        start = time.perf_counter()
+        rows = 0
+        for offset in range(0, len(interview_ids), chunk_size):
+            chunk_ids = interview_ids[offset:offset + chunk_size]
+            responses = list(
+                Responses.objects.filter(interview_id__in=chunk_ids).values_list('interview_id', 'answer')
+            )
+            if not responses:
+                continue
+            group_ids, answers = zip(*responses)
+            rows += len(answers)
+
+            groups, means = aggregate_by_group(scorer.score_batch(answers), group_ids)
+            means_by_interview = dict(zip(groups.tolist(), means.tolist()))
+
+            with transaction.atomic():
+                for result in Result.objects.select_related('interview').filter(interview_id__in=means_by_interview):
+                    negative, neutral, positive, compound = means_by_interview[result.interview_id]
+                    result.negative_sentiment = negative
+                    result.neutral_sentiment = neutral
+                    result.positive_sentiment = positive
+                    result.compound_sentiment = compound
+                    # The headline scores are derived from compound sentiment
+                    result.overall_communication_score = communication_score(
+                        result.grammar_score, result.clarity_score, result.professionalism_score, compound,
+                    )
+                    result.final_score = combined_score(result.overall_technical_score,
+                                                        result.overall_communication_score)
+                    # save() rather than bulk_update so the analytics rollups follow the new scores
+                    result.save(update_fields=[
+                        'negative_sentiment', 'neutral_sentiment', 'positive_sentiment', 'compound_sentiment',
+                        'overall_communication_score', 'final_score',
+                    ])
+
+        elapsed = time.perf_counter() - start
+        rate = rows / elapsed if elapsed else 0.0
+        info = scorer.cache_info()
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-scored {rows} responses for {len(interview_ids)} interviews in {elapsed:.2f}s "
+            f"({rate:.0f} rows/s, cache hits {info.hits}, misses {info.misses})"
+        ))
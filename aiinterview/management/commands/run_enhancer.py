@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+from aiinterview.enhancerService import EnhancerServer
+from aiinterview.textEnhancer import ResumeEnhancerLLM
+
+
+class Command(BaseCommand):
+    help = "Run the resume enhancement service (loads the model once and batches requests)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--address', help="Overrides ENHANCER_SERVICE_ADDRESS ('unix:/path' or 'tcp:host:port')")
+        parser.add_argument('--max-batch-size', type=int, help='Overrides ENHANCER_MAX_BATCH_SIZE')
+        parser.add_argument('--batch-wait-ms', type=float, help='Overrides ENHANCER_BATCH_WAIT_MS')
+
+    def handle(self, *args, **options):
+        enhancer = ResumeEnhancerLLM()
+        started = time.perf_counter()
+        enhancer.warm_up()  # load and run once before accepting requests, not on the first one
+        self.stdout.write(f"{enhancer.backend.name} backend ({enhancer.backend.model_name}) ready "
+                          f"in {time.perf_counter() - started:.1f}s")
+        batch_wait = options['batch_wait_ms'] / 1000 if options['batch_wait_ms'] is not None else None
+        server = EnhancerServer(enhancer, max_batch_size=options['max_batch_size'], batch_wait=batch_wait)
+        try:
+            asyncio.run(server.serve(options['address']))
+        except KeyboardInterrupt:
+            pass
+        stats = server.stats_snapshot()
+        self.stdout.write(f"Generated {stats['requests']} enhancements in {stats['batches']} batches; "
+                          f"cache hit rate {stats['hit_rate']:.0%}, {stats['seconds_saved']:.1f}s of generation saved")
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from hirevision.profiling import aggregate_hot_functions, get_profile_store
+
+
+class Command(BaseCommand):
+    help = "List captured slow-request profiles and the hottest functions across them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', help='Only profiles for this URL name (e.g. next_question)')
+        parser.add_argument('--interview', help='Only profiles tagged with this interview_id')
+        parser.add_argument('--top', type=int, default=20, help='Number of hot functions to show')
+        parser.add_argument('--sort', choices=['self', 'cumulative'], default='self')
+        parser.add_argument('--no-list', action='store_true', help='Skip the per-profile listing')
+
+    def handle(self, *args, **options):
+        profiles = []
+        for path, profile in get_profile_store().load():
+            if options['endpoint'] and profile.get('endpoint') != options['endpoint']:
+                continue
+            if options['interview'] and profile.get('interview_id') != options['interview']:
+                continue
+            profiles.append((path, profile))
+
+        if not profiles:
+            self.stdout.write("No slow-request profiles captured")
+            return
+
+        if not options['no_list']:
+            self.stdout.write(f"{'captured_at':<33} {'endpoint':<18} {'interview':>10} {'status':>6} {'ms':>10}  file")
+            for path, profile in profiles:
+                self.stdout.write(
+                    f"{profile['captured_at']:<33} {profile['endpoint']:<18} {profile['interview_id'] or '-':>10} "
+                    f"{profile['status']:>6} {profile['duration_ms']:>10}  {path.name}"
+                )
+            self.stdout.write('')
+
+        hot = aggregate_hot_functions([profile for _, profile in profiles], options['sort'], options['top'])
+        self.stdout.write(f"Hottest functions by {options['sort']} time across {len(profiles)} profiles:")
+        self.stdout.write(f"{'self s':>10} {'cum s':>10} {'profiles':>9}  function")
+        for entry in hot:
+            self.stdout.write(
+                f"{entry['self']:>10.3f} {entry['cumulative']:>10.3f} {entry['profiles']:>9}  {entry['function']}"
+            )
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:36
+
+import aiinterview.models
+import aiinterview.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiinterview', '0004_remove_result_accuracy_score_remove_result_feedback_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='interview',
+            name='resume_file',
+            field=models.FileField(blank=True, null=True, storage=aiinterview.storage.get_resume_storage, upload_to=aiinterview.models.resume_upload_path),
+        ),
+    ]
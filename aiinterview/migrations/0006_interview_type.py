@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiinterview', '0005_resumeblob_alter_interview_resume_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interview',
+            name='interview_type',
+            field=models.CharField(choices=[('resume', 'Resume'), ('hr', 'HR')], default='resume', max_length=20),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiinterview', '0006_interview_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interview',
+            name='difficulty',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='interview',
+            name='position',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='interview',
+            name='interview_type',
+            field=models.CharField(choices=[('resume', 'Resume'), ('hr', 'HR'), ('technical', 'Technical')], default='resume', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='TechnicalQuestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.CharField(max_length=100)),
+                ('difficulty', models.CharField(choices=[('easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard')], max_length=20)),
+                ('topic', models.CharField(max_length=100)),
+                ('question', models.TextField()),
+                ('opening', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['position', 'difficulty', 'opening'], name='techq_pos_diff_opening'), models.Index(fields=['position', 'difficulty', 'topic'], name='techq_pos_diff_topic')],
+                'constraints': [models.UniqueConstraint(fields=('position', 'difficulty', 'question'), name='techq_unique_question')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aiinterview', '0007_technical_question_bank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='result',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.CreateModel(
+            name='ResultVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('analysis', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='aiinterview.result')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('result', 'version'), name='resultversion_unique_version')],
+            },
+        ),
+    ]
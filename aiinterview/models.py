@@ -2,20 +2,77 @@ from django.db import models
 from django.contrib.auth.models import User
 import os
 from django.conf import settings
+from .storage import get_resume_storage
 
 def user_directory_path(instance, filename):
     # file will be uploaded to MEDIA_ROOT/user_<id>/<filename>
+    # Kept for historical migrations; new uploads use resume_upload_path
     return os.path.join(settings.MEDIA_ROOT, f'user_{instance.user}/resume', filename)
 
+def resume_upload_path(instance, filename):
+    # The storage backend replaces this with a content-addressed name
+    return f'resumes/{os.path.basename(filename)}'
+
+
+class ResumeBlob(models.Model):
+    """A stored resume file, shared by every interview that uploaded the same bytes"""
+    path = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
 
 class Interview(models.Model):
+    RESUME = 'resume'
+    HR = 'hr'
+    TECHNICAL = 'technical'
+    TYPE_CHOICES = [
+        (RESUME, 'Resume'),
+        (HR, 'HR'),
+        (TECHNICAL, 'Technical'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='interviews')
+    interview_type = models.CharField(max_length=20, choices=TYPE_CHOICES, default=RESUME)
+    # Technical interviews only: which part of the question bank to draw from
+    position = models.CharField(max_length=100, blank=True, default='')
+    difficulty = models.CharField(max_length=20, blank=True, default='')
     candidate_name = models.CharField(max_length=100)
     resume_content = models.TextField()
-    resume_file = models.FileField(upload_to=user_directory_path, null=True, blank=True)
+    resume_file = models.FileField(upload_to=resume_upload_path, storage=get_resume_storage, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     completed = models.BooleanField(default=False)
 
+class TechnicalQuestion(models.Model):
+    """A question in the technical interview bank (loaded with manage.py load_question_bank)"""
+    EASY = 'easy'
+    MEDIUM = 'medium'
+    HARD = 'hard'
+    DIFFICULTY_CHOICES = [
+        (EASY, 'Easy'),
+        (MEDIUM, 'Medium'),
+        (HARD, 'Hard'),
+    ]
+
+    position = models.CharField(max_length=100)
+    difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES)
+    topic = models.CharField(max_length=100)
+    question = models.TextField()
+    # Opening questions are asked first, without calling the LLM
+    opening = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['position', 'difficulty', 'opening'], name='techq_pos_diff_opening'),
+            models.Index(fields=['position', 'difficulty', 'topic'], name='techq_pos_diff_topic'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['position', 'difficulty', 'question'], name='techq_unique_question'),
+        ]
+
+
 class Responses(models.Model):
     interview = models.ForeignKey(Interview, on_delete=models.CASCADE, related_name='responses')
     question = models.TextField()
@@ -24,7 +81,19 @@ class Responses(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
 class Result(models.Model):
+    # Fields filled in from analyzerAgent.analyze_responses()
+    ANALYSIS_FIELDS = [
+        'technical_accuracy', 'depth_of_knowledge', 'relevance_score',
+        'grammar_score', 'clarity_score', 'professionalism_score',
+        'positive_sentiment', 'neutral_sentiment', 'negative_sentiment', 'compound_sentiment',
+        'overall_technical_score', 'overall_communication_score', 'final_score',
+        'technical_feedback', 'communication_feedback', 'strengths', 'areas_for_improvement',
+        'vocabulary_analysis',
+    ]
+
     interview = models.OneToOneField(Interview, on_delete=models.CASCADE, related_name='result')
+    # Bumped each time the interview is re-analyzed; earlier analyses are kept as ResultVersion rows
+    version = models.PositiveIntegerField(default=1)
     # Technical scores
     technical_accuracy = models.FloatField(default=0.0)
     depth_of_knowledge = models.FloatField(default=0.0)
@@ -54,3 +123,18 @@ class Result(models.Model):
     vocabulary_analysis = models.JSONField(default=dict)
     
     created_at = models.DateTimeField(auto_now_add=True)
+
+
+class ResultVersion(models.Model):
+    """An earlier analysis of an interview, kept when its Result is recomputed"""
+    result = models.ForeignKey(Result, on_delete=models.CASCADE, related_name='versions')
+    version = models.PositiveIntegerField()
+    # The Result's ANALYSIS_FIELDS as they were for this version
+    analysis = models.JSONField()
+    # When this version was replaced by the next one
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['result', 'version'], name='resultversion_unique_version'),
+        ]
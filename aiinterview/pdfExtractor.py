@@ -0,0 +1,118 @@
+import atexit
+import io
+import multiprocessing
+import threading
+import time
+from typing import Iterator, Optional
+
+import PyPDF2
+from django.conf import settings
+from hirevision.tracing import span
+
+
+class PDFExtractionTimeout(Exception):
+    """Raised when a PDF takes longer than the configured budget to extract"""
+
+
+def iter_pdf_pages(pdf_file, max_pages: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of each page lazily, stopping after max_pages"""
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    for index, page in enumerate(pdf_reader.pages):
+        if max_pages is not None and index >= max_pages:
+            break
+        yield page.extract_text() or ""
+
+
+def extract_pdf_text(pdf_file, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+    """
+    Extract text from a PDF page by page, stopping once the page or character
+    budget is spent. Pages are collected in a list and joined once at the end.
+    """
+    parts = []
+    total_chars = 0
+    for page_text in iter_pdf_pages(pdf_file, max_pages=max_pages):
+        if max_chars is not None and total_chars + len(page_text) >= max_chars:
+            parts.append(page_text[:max_chars - total_chars])
+            break
+        parts.append(page_text)
+        total_chars += len(page_text) + 1
+    return "\n".join(parts).strip()
+
+
+def _extract_from_bytes(pdf_bytes: bytes, max_pages: Optional[int], max_chars: Optional[int]) -> str:
+    # Runs inside the worker process, so it only receives picklable arguments
+    return extract_pdf_text(io.BytesIO(pdf_bytes), max_pages=max_pages, max_chars=max_chars)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# Latest time a caller may still be waiting on a task in each pool
+_pool_deadlines = {}
+
+
+def _submit(args, timeout):
+    """Start an extraction in the current pool; returns (pool, AsyncResult)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = multiprocessing.Pool(processes=settings.PDF_EXTRACTION_WORKERS)
+        _pool_deadlines[_pool] = max(_pool_deadlines.get(_pool, 0.0), time.monotonic() + timeout)
+        return _pool, _pool.apply_async(_extract_from_bytes, args)
+
+
+def _retire_pool(pool):
+    """
+    Replace `pool` (it has a stuck worker) with a fresh one for new requests.
+    The old pool's other tasks keep running until every caller that submitted
+    to it has had its own timeout; then its workers, the stuck one included,
+    are killed.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return  # already retired by another timed-out request
+        _pool = None
+        delay = max(_pool_deadlines.get(pool, 0.0) - time.monotonic(), 0.0)
+    pool.close()
+    timer = threading.Timer(delay, _terminate_pool, (pool,))
+    timer.daemon = True
+    timer.start()
+
+
+def _terminate_pool(pool):
+    pool.terminate()
+    pool.join()
+    with _pool_lock:
+        _pool_deadlines.pop(pool, None)
+
+
+def _close_pool():
+    """Kill the current pool's workers and start fresh next time"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        _terminate_pool(pool)
+
+
+atexit.register(_close_pool)
+
+
+def extract_pdf_text_isolated(pdf_bytes: bytes, max_pages: Optional[int] = None,
+                              max_chars: Optional[int] = None, timeout: Optional[float] = None) -> str:
+    """
+    Extract PDF text in the worker pool with a hard timeout, so a huge or
+    malformed upload cannot pin the request worker. A timeout only costs the
+    stuck worker: extractions running next to it are left to finish.
+    """
+    max_pages = settings.PDF_EXTRACTION_MAX_PAGES if max_pages is None else max_pages
+    max_chars = settings.PDF_EXTRACTION_MAX_CHARS if max_chars is None else max_chars
+    timeout = settings.PDF_EXTRACTION_TIMEOUT if timeout is None else timeout
+
+    with span('pdf', size=len(pdf_bytes)):
+        pool, async_result = _submit((pdf_bytes, max_pages, max_chars), timeout)
+        try:
+            return async_result.get(timeout=timeout)
+        except multiprocessing.TimeoutError:
+            _retire_pool(pool)
+            raise PDFExtractionTimeout(f"PDF extraction exceeded {timeout} seconds")
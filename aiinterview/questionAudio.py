@@ -0,0 +1,271 @@
+"""
+Spoken versions of interview questions.
+
+Each question is synthesized once (TTS_BACKEND) and stored on disk in
+TTS_CACHE_DIR under the hash of its normalized text; the question-audio view
+serves it from there with range requests. The directory is kept under
+TTS_CACHE_MAX_BYTES by deleting the least recently used files (every hit
+bumps the file's mtime).
+
+Synthesis starts in the background as soon as a question is saved (see
+signals), so the audio is usually ready before the client asks for it. The
+opening greeting only differs between candidates in the name, so it is
+rendered as "Hello <name>!" plus the shared GREETING_QUESTION, which is
+rendered once (manage.py prerender_question_audio) and reused by every
+interview.
+"""
+import hashlib
+import io
+import logging
+import os
+import struct
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+GREETING_QUESTION = ("Could you please introduce yourself and tell me a bit about your background "
+                     "and experience?")
+CLOSING_MESSAGE = "Thank you for participating in the interview!"
+# Phrases that appear in every interview, rendered ahead of time
+COMMON_PHRASES = (GREETING_QUESTION, CLOSING_MESSAGE)
+
+BACKEND_ALIASES = {
+    'gtts': 'aiinterview.questionAudio.GTTSSynthesizer',
+    'offline': 'aiinterview.questionAudio.OfflineSynthesizer',
+}
+
+
+class TTSError(Exception):
+    """The question audio could not be produced"""
+
+
+class Synthesizer:
+    """Turns text into audio bytes; pieces of audio are joined with join()"""
+
+    name = 'base'
+    extension = ''
+    content_type = 'application/octet-stream'
+
+    def synthesize(self, text):
+        raise NotImplementedError
+
+    def join(self, pieces):
+        return b''.join(pieces)
+
+
+class GTTSSynthesizer(Synthesizer):
+    """Google Translate TTS (MP3). MP3 pieces play back to back when concatenated"""
+
+    name = 'gtts'
+    extension = '.mp3'
+    content_type = 'audio/mpeg'
+
+    def synthesize(self, text):
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=settings.TTS_LANGUAGE).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class OfflineSynthesizer(Synthesizer):
+    """Stand-in without network access: a quiet tone, a quarter second per word (WAV)"""
+
+    name = 'offline'
+    extension = '.wav'
+    content_type = 'audio/wav'
+    RATE = 8000
+
+    def synthesize(self, text):
+        frames = int(self.RATE * 0.25 * max(len(text.split()), 1))
+        return self._wav(b'\x00\x01' * frames)
+
+    def join(self, pieces):
+        return self._wav(b''.join(piece[44:] for piece in pieces))
+
+    def _wav(self, samples):
+        header = struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + len(samples), b'WAVE', b'fmt ', 16, 1, 1,
+                             self.RATE, self.RATE * 2, 2, 16, b'data', len(samples))
+        return header + samples
+
+
+class AudioCache:
+    """Audio files on disk named by key, trimmed to max_bytes least recently used first"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = str(directory or settings.TTS_CACHE_DIR)
+        self.max_bytes = settings.TTS_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._size = None  # bytes on disk, counted on first write
+        self._lock = threading.Lock()
+
+    def path(self, key, extension):
+        return os.path.join(self.directory, key[:2], key + extension)
+
+    def get(self, key, extension):
+        """Path of the cached file, or None; a hit marks the file as recently used"""
+        path = self.path(key, extension)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, extension, data):
+        path = self.path(key, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Readers never see a partly written file: write aside, then rename
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._size = self._size + len(data) if self._size is not None else None
+            if self._size is None or self._size > self.max_bytes:
+                self._trim()
+        return path
+
+    def _trim(self):
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.startswith('.tmp-'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+
+def get_synthesizer(path=None):
+    path = path or settings.TTS_BACKEND
+    return import_string(BACKEND_ALIASES.get(path, path))()
+
+
+def audio_key(text, synthesizer):
+    # Same words, same audio: whitespace differences share one file
+    normalized = ' '.join(text.split())
+    return hashlib.sha256(f"{synthesizer.name}:{settings.TTS_LANGUAGE}:{normalized}".encode()).hexdigest()
+
+
+def speech_parts(text):
+    """The pieces `text` is rendered from: a shared phrase at its end is rendered separately"""
+    text = ' '.join(text.split())
+    for phrase in COMMON_PHRASES:
+        if text.endswith(phrase) and text != phrase:
+            return [text[:-len(phrase)].strip(), phrase]
+    return [text]
+
+
+_state = {}
+_state_lock = threading.Lock()
+_inflight = {}
+
+
+def _components():
+    """(synthesizer, cache) for the current settings, created once per process"""
+    config = (settings.TTS_BACKEND, str(settings.TTS_CACHE_DIR), settings.TTS_CACHE_MAX_BYTES)
+    with _state_lock:
+        if _state.get('config') != config:
+            _state.update(config=config, synthesizer=get_synthesizer(), cache=AudioCache())
+        return _state['synthesizer'], _state['cache']
+
+
+def render(text):
+    """(path, content_type) of the audio for `text`, synthesizing it if it is not cached"""
+    synthesizer, cache = _components()
+    key = audio_key(text, synthesizer)
+    path = cache.get(key, synthesizer.extension)
+    if path:
+        return path, synthesizer.content_type
+
+    # One synthesis per text: later callers wait for the one in progress
+    with _state_lock:
+        done = _inflight.get(key)
+        owner = done is None
+        if owner:
+            done = _inflight[key] = threading.Event()
+    if not owner:
+        done.wait(settings.TTS_RENDER_TIMEOUT)
+        path = cache.get(key, synthesizer.extension)
+        if path is None:
+            raise TTSError("Question audio is not available")
+        return path, synthesizer.content_type
+
+    try:
+        parts = speech_parts(text)
+        try:
+            if len(parts) == 1:
+                data = synthesizer.synthesize(parts[0])
+            else:
+                data = synthesizer.join([_read(part) for part in parts])
+        except TTSError:
+            raise
+        except Exception as exc:
+            raise TTSError(f"Speech synthesis failed: {exc}") from exc
+        return cache.put(key, synthesizer.extension, data), synthesizer.content_type
+    finally:
+        with _state_lock:
+            del _inflight[key]
+        done.set()
+
+
+def open_audio(text, attempts=3):
+    """
+    (open file, content_type) of the audio for `text`. The cache may trim the
+    file between render() and open(); that counts as a miss and renders again.
+    Once open, the handle stays readable even if the file is trimmed.
+    """
+    for _ in range(attempts):
+        path, content_type = render(text)
+        try:
+            return open(path, 'rb'), content_type
+        except FileNotFoundError:
+            continue
+    raise TTSError("Question audio was evicted from the cache before it could be read")
+
+
+def _read(text):
+    audio, _ = open_audio(text)
+    with audio:
+        return audio.read()
+
+
+_executor = None
+
+
+def prerender(text):
+    """Start rendering `text` in the background"""
+    global _executor
+    with _state_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.TTS_WORKERS, thread_name_prefix='tts')
+    return _executor.submit(_prerender, text)
+
+
+def _prerender(text):
+    try:
+        return render(text)[0]
+    except TTSError as exc:
+        logger.warning("Could not pre-render question audio: %s", exc)
+        return None
@@ -0,0 +1,76 @@
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+# Column order of every score array returned by SentimentScorer
+SENTIMENT_COLUMNS = ('negative', 'neutral', 'positive', 'compound')
+
+
+class SentimentScorer:
+    """VADER sentiment for many answers at once, returned as NumPy arrays"""
+
+    def __init__(self, analyzer=None, cache_size: Optional[int] = None):
+        self._analyzer = analyzer
+        cache_size = settings.SENTIMENT_CACHE_SIZE if cache_size is None else cache_size
+        # Identical answers (greetings, "yes", re-scored history) are only scored once
+        self._score_text = lru_cache(maxsize=cache_size)(self._polarity)
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            import nltk
+            from nltk.sentiment import SentimentIntensityAnalyzer
+            nltk.download('vader_lexicon', quiet=True)
+            self._analyzer = SentimentIntensityAnalyzer()
+        return self._analyzer
+
+    def _polarity(self, text: str) -> Tuple[float, float, float, float]:
+        scores = self.analyzer.polarity_scores(text)
+        return scores['neg'], scores['neu'], scores['pos'], scores['compound']
+
+    def score_batch(self, texts: Sequence) -> np.ndarray:
+        """
+        Score a batch of answers. Returns an (n, 4) float array in
+        SENTIMENT_COLUMNS order; rows for empty or non-string answers are NaN.
+        """
+        scores = np.full((len(texts), len(SENTIMENT_COLUMNS)), np.nan)
+        for i, text in enumerate(texts):
+            if isinstance(text, str) and text.strip():
+                scores[i] = self._score_text(text)
+        return scores
+
+    def cache_info(self):
+        return self._score_text.cache_info()
+
+
+def aggregate_by_group(scores: np.ndarray, group_ids: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean score per group (e.g. per interview), ignoring NaN rows.
+    Returns (groups, means) where means[i] belongs to groups[i].
+    """
+    group_ids = np.asarray(group_ids)
+    valid = ~np.isnan(scores).any(axis=1)
+    groups, inverse = np.unique(group_ids[valid], return_inverse=True)
+    if not len(groups):
+        return groups, np.empty((0, scores.shape[1]))
+
+    valid_scores = scores[valid]
+    counts = np.bincount(inverse, minlength=len(groups))
+    sums = np.column_stack([
+        np.bincount(inverse, weights=valid_scores[:, column], minlength=len(groups))
+        for column in range(scores.shape[1])
+    ])
+    return groups, sums / counts[:, None]
+
+
+_scorer = None
+
+
+def get_sentiment_scorer() -> SentimentScorer:
+    """Process-wide scorer so the lexicon and cache are shared across requests"""
+    global _scorer
+    if _scorer is None:
+        _scorer = SentimentScorer()
+    return _scorer
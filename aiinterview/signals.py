@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Interview, Responses, ResumeBlob
+
+_NOT_LOADED = object()
+
+
+def _loaded_resume_name(instance):
+    # Read the raw attribute so deferred fields (.only()/.defer()) don't trigger a query
+    if 'resume_file' not in instance.__dict__:
+        return _NOT_LOADED
+    value = instance.__dict__['resume_file']
+    return getattr(value, 'name', value) or None
+
+
+def _add_reference(name, size=0):
+    ResumeBlob.objects.get_or_create(path=name, defaults={'size': size})
+    ResumeBlob.objects.filter(path=name).update(ref_count=F('ref_count') + 1, updated_at=timezone.now())
+
+
+def _drop_reference(name):
+    ResumeBlob.objects.filter(path=name).update(ref_count=F('ref_count') - 1, updated_at=timezone.now())
+
+
+@receiver(post_init, sender=Interview)
+def remember_resume_name(sender, instance, **kwargs):
+    # Remembering the name here avoids an extra query in post_save to find the old value
+    instance._saved_resume_name = _loaded_resume_name(instance)
+
+
+@receiver(post_save, sender=Interview)
+def update_resume_references(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'resume_file' not in update_fields:
+        return
+    current = _loaded_resume_name(instance)
+    previous = instance._saved_resume_name
+    if current is _NOT_LOADED or previous is _NOT_LOADED or current == previous:
+        return
+    with transaction.atomic():
+        if current:
+            _add_reference(current, instance.resume_file.size)
+        if previous:
+            _drop_reference(previous)
+    instance._saved_resume_name = current
+
+
+@receiver(post_delete, sender=Interview)
+def release_resume_reference(sender, instance, **kwargs):
+    if instance._saved_resume_name and instance._saved_resume_name is not _NOT_LOADED:
+        _drop_reference(instance._saved_resume_name)
+
+
+@receiver(post_save, sender=Responses)
+def prerender_question_audio(sender, instance, created, **kwargs):
+    # Start synthesizing while the client is still reading the question
+    if created and settings.TTS_PRERENDER and instance.question:
+        from .questionAudio import prerender
+
+        transaction.on_commit(lambda: prerender(instance.question))
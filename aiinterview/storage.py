@@ -0,0 +1,106 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.module_loading import import_string
+
+RESUME_PREFIX = 'resumes'
+
+
+class ContentAddressedStorageMixin:
+    """
+    Stores every file under the SHA-256 of its content, sharded into
+    sub-directories (resumes/ab/cd/abcd....pdf). Uploading the same bytes twice
+    resolves to the same name, so identical resumes are only stored once.
+    """
+    shard_depth = 2
+    shard_width = 2
+
+    def content_hash(self, content) -> str:
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        return digest.hexdigest()
+
+    def hashed_name(self, digest: str, name: str) -> str:
+        extension = os.path.splitext(name)[1].lower()
+        shards = [digest[i * self.shard_width:(i + 1) * self.shard_width] for i in range(self.shard_depth)]
+        return posixpath.join(RESUME_PREFIX, *shards, digest + extension)
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content, so an existing file is a match, not a clash
+        return name
+
+    def _save(self, name, content):
+        name = self.hashed_name(self.content_hash(content), name)
+        # touch() fails if garbage collection removed the blob after exists()
+        if not (self.exists(name) and self.touch(name)):
+            self._write_blob(name, content)
+        return name
+
+    def touch(self, name):
+        """
+        Mark a deduplicated blob as recently used so garbage collection skips it.
+        Return False if the blob no longer exists.
+        """
+        raise NotImplementedError('subclasses of ContentAddressedStorageMixin must provide a touch() method')
+
+    def _write_blob(self, name, content):
+        raise NotImplementedError('subclasses of ContentAddressedStorageMixin must provide a _write_blob() method')
+
+
+class LocalContentAddressedStorage(ContentAddressedStorageMixin, FileSystemStorage):
+    """Content-addressed storage on the local filesystem using atomic renames"""
+
+    def touch(self, name):
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _write_blob(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a private temp file in the same directory, then rename over the
+        # final name. Concurrent uploads of the same resume write identical bytes,
+        # so whichever rename lands last is equally correct and readers never see
+        # a partially written file.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                content.seek(0)
+                for chunk in content.chunks():
+                    tmp_file.write(chunk)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def iter_blobs(self):
+        """Yield (name, modified_timestamp) for every file under the resume prefix, including stale temp files"""
+        root = self.path(RESUME_PREFIX)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                name = os.path.relpath(full_path, self.location).replace(os.sep, '/')
+                yield name, os.path.getmtime(full_path)
+
+
+def get_resume_storage():
+    """Return the configured resume storage backend"""
+    return import_string(settings.RESUME_STORAGE_BACKEND)()
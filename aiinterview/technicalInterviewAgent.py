@@ -0,0 +1,102 @@
+"""
+Technical interview mode for the web API (interview_type='technical').
+
+Server-side counterpart of agents/technical_interview_agent.TechnicalInterviewAgent.
+Questions come from the TechnicalQuestion bank for the interview's position
+and difficulty: the first one is a precomputed opening question, read with an
+index lookup, and every other turn is a bank question on a topic not covered
+yet. The turns in between follow up on the candidate's last answer, and only
+those call the LLM. When the bank runs out, the LLM writes new questions
+instead. Like the HR mode, nothing is kept between requests.
+"""
+from django.conf import settings
+from langchain.output_parsers import ResponseSchema, StructuredOutputParser
+from langchain.prompts import ChatPromptTemplate
+
+from .llm import get_chat_model
+from .models import TechnicalQuestion
+
+DEFAULT_POSITION = 'software_engineer'
+
+FOLLOW_UP_PROMPT = ChatPromptTemplate.from_template(
+    """You are an expert technical interviewer for a {position} position ({difficulty} difficulty).
+    You asked the candidate:
+    {question}
+
+    The candidate answered:
+    {answer}
+
+    Ask one follow-up question that probes the weakest or most interesting part of this answer.
+    Do not repeat the original question.
+
+    {format_instructions}
+    """
+)
+
+NEW_QUESTION_PROMPT = ChatPromptTemplate.from_template(
+    """You are an expert technical interviewer for a {position} position ({difficulty} difficulty).
+    Ask a new technical question on a topic not covered so far. It should require a detailed
+    technical answer.
+
+    Questions asked so far:
+    {asked}
+
+    {format_instructions}
+    """
+)
+
+_parser = StructuredOutputParser.from_response_schemas([
+    ResponseSchema(name="question", description="The technical interview question to ask")
+])
+
+
+def bank_position(position):
+    """The form positions are stored in the bank under ('Backend Engineer' -> 'backend_engineer')"""
+    return '_'.join((position or DEFAULT_POSITION).lower().split())
+
+
+class TechnicalInterviewAgent:
+    """Picks bank questions and writes follow-ups for one interview from what is stored in the database"""
+
+    def __init__(self, interview):
+        self.interview = interview
+        self.bank = TechnicalQuestion.objects.filter(position=interview.position, difficulty=interview.difficulty)
+
+    def generate_question(self, question_number):
+        """The question to ask as question `question_number` (1-based)"""
+        if question_number == 1:
+            # Answered from the (position, difficulty, opening) index, no LLM call
+            opening = self.bank.filter(opening=True).order_by('id').values_list('question', flat=True).first()
+            if opening:
+                return opening
+        elif question_number % 2 == 0:
+            return self.follow_up(question_number - 1)
+        return self.bank_question() or self.new_question()
+
+    def asked(self):
+        return list(self.interview.responses.order_by('question_number').values_list('question', flat=True))
+
+    def bank_question(self):
+        """The first bank question on a topic not asked about yet, else any bank question not asked yet"""
+        asked = self.asked()
+        unasked = self.bank.exclude(question__in=asked).order_by('id')
+        covered = self.bank.filter(question__in=asked).values('topic')
+        return (unasked.exclude(topic__in=covered).values_list('question', flat=True).first()
+                or unasked.values_list('question', flat=True).first())
+
+    def follow_up(self, question_number):
+        previous = self.interview.responses.get(question_number=question_number)
+        return self._ask(FOLLOW_UP_PROMPT, question=previous.question, answer=previous.answer)
+
+    def new_question(self):
+        return self._ask(NEW_QUESTION_PROMPT, asked="\n".join(self.asked()) or "None yet.")
+
+    def _ask(self, prompt, **values):
+        llm = get_chat_model(settings.TECHNICAL_INTERVIEW_MODEL)
+        response = (prompt | llm).invoke({
+            "position": self.interview.position.replace('_', ' '),
+            "difficulty": self.interview.difficulty,
+            "format_instructions": _parser.get_format_instructions(),
+            **values,
+        })
+        return _parser.parse(response.content)["question"]
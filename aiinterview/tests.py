@@ -1,3 +1,1113 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import asyncio
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import spacy
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.utils import timezone as dj_timezone
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from rest_framework.test import APIClient
+from analytics.rollups import summarize
+from hirevision import tracing
+from hirevision.profiling import SlowRequestProfilerMiddleware, aggregate_hot_functions, get_profile_store
+
+from .enhancerBackends import EnhancerBackend, RemoteLLMBackend, TransformersBackend, get_backend
+from .enhancerService import (
+    EnhancementCache,
+    EnhancerError,
+    EnhancerServer,
+    EnhancerUnavailable,
+    cache_key,
+    enhance_remote,
+    fetch_stats,
+    open_enhance_stream,
+)
+from .fakeLLM import FakeChatGroq, FakeLLMError, fake_llm_stats
+from .llm import get_chat_model
+from .management.commands.bench_pdf_extraction import build_synthetic_pdf
+from .management.commands.reanalyze_interviews import analyze_job
+from . import pdfExtractor
+from .pdfExtractor import (
+    PDFExtractionTimeout,
+    extract_pdf_text,
+    extract_pdf_text_isolated,
+    iter_pdf_pages,
+)
+from .sentimentScorer import SentimentScorer, aggregate_by_group
+from .storage import LocalContentAddressedStorage
+from .models import Interview, Responses, Result, ResultVersion, ResumeBlob, TechnicalQuestion
+from . import questionAudio
+from .questionAudio import GREETING_QUESTION, AudioCache, OfflineSynthesizer, open_audio, render, speech_parts
+from .technicalInterviewAgent import TechnicalInterviewAgent
+from .textEnhancer import ResumeEnhancerLLM, StreamingExtractor, build_prompt, section_marker
+from .transcription import (
+    AssemblyAITranscriber,
+    AudioTooLarge,
+    OfflineTranscriber,
+    TranscriptionError,
+    get_transcriber,
+    parse_wav_header,
+)
+from .vocabularyEngine import VocabularyEngine, analyze_vocabulary_parallel
+
+
+@override_settings(PDF_EXTRACTION_MAX_PAGES=10, PDF_EXTRACTION_MAX_CHARS=30000,
+                   PDF_EXTRACTION_TIMEOUT=30, PDF_EXTRACTION_WORKERS=1)
+class PDFExtractionTests(SimpleTestCase):
+    def test_pages_are_yielded_lazily_up_to_limit(self):
+        pages = list(iter_pdf_pages(io.BytesIO(build_synthetic_pdf(5)), max_pages=3))
+        self.assertEqual(len(pages), 3)
+        self.assertIn('Page 1 line 0', pages[0])
+
+    def test_page_budget(self):
+        text = extract_pdf_text(io.BytesIO(build_synthetic_pdf(8)), max_pages=2)
+        self.assertIn('Page 2 line', text)
+        self.assertNotIn('Page 3 line', text)
+
+    def test_char_budget(self):
+        text = extract_pdf_text(io.BytesIO(build_synthetic_pdf(8)), max_chars=500)
+        self.assertLessEqual(len(text), 500)
+        self.assertNotIn('Page 2 line', text)
+
+    def test_isolated_extraction_uses_settings_limits(self):
+        text = extract_pdf_text_isolated(build_synthetic_pdf(12))
+        self.assertIn('Page 10 line', text)
+        self.assertNotIn('Page 11 line', text)
+
+    def test_isolated_extraction_timeout(self):
+        with self.assertRaises(PDFExtractionTimeout):
+            extract_pdf_text_isolated(build_synthetic_pdf(400), max_pages=400,
+                                      max_chars=10 ** 9, timeout=0.01)
+        # The pool is rebuilt after a timeout
+        self.assertIn('Page 1 line', extract_pdf_text_isolated(build_synthetic_pdf(1)))
+
+    @override_settings(PDF_EXTRACTION_WORKERS=2)
+    def test_timeout_does_not_kill_other_extractions(self):
+        pdfExtractor._close_pool()
+        self.addCleanup(pdfExtractor._close_pool)
+        results = {}
+
+        def extract(name, pdf_bytes, timeout):
+            try:
+                results[name] = extract_pdf_text_isolated(pdf_bytes, timeout=timeout)
+            except PDFExtractionTimeout as exc:
+                results[name] = exc
+
+        with mock.patch('aiinterview.pdfExtractor._extract_from_bytes', _hang_or_echo):
+            threads = [threading.Thread(target=extract, args=('stuck', b'hang', 0.3)),
+                       threading.Thread(target=extract, args=('normal', b'slow', 10))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertIsInstance(results['stuck'], PDFExtractionTimeout)
+            self.assertEqual(results['normal'], 'slow')
+            # New requests go to a fresh pool
+            self.assertEqual(extract_pdf_text_isolated(b'next', timeout=10), 'next')
+
+
+def _hang_or_echo(pdf_bytes, max_pages, max_chars):
+    # Stand-in for _extract_from_bytes, run in the pool workers
+    if pdf_bytes == b'hang':
+        time.sleep(60)
+    if pdf_bytes == b'slow':
+        time.sleep(1)
+    return pdf_bytes.decode()
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.storage = LocalContentAddressedStorage(location=self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_identical_content_is_stored_once(self):
+        first = self.storage.save('resumes/alice.pdf', ContentFile(b'%PDF-1.4 same resume'))
+        second = self.storage.save('resumes/bob.PDF', ContentFile(b'%PDF-1.4 same resume'))
+        self.assertEqual(first, second)
+        self.assertRegex(first, r'^resumes/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.pdf$')
+        self.assertEqual(len(list(self.storage.iter_blobs())), 1)
+
+    def test_different_content_gets_different_names(self):
+        first = self.storage.save('resumes/a.pdf', ContentFile(b'%PDF-1.4 one'))
+        second = self.storage.save('resumes/a.pdf', ContentFile(b'%PDF-1.4 two'))
+        self.assertNotEqual(first, second)
+        with self.storage.open(second) as handle:
+            self.assertEqual(handle.read(), b'%PDF-1.4 two')
+
+    def test_blob_removed_after_exists_check_is_rewritten(self):
+        name = self.storage.save('resumes/a.pdf', ContentFile(b'%PDF-1.4 one'))
+        exists = LocalContentAddressedStorage.exists
+
+        def collected_meanwhile(storage, path):
+            found = exists(storage, path)
+            os.remove(storage.path(path))
+            return found
+
+        with mock.patch.object(LocalContentAddressedStorage, 'exists', collected_meanwhile):
+            self.assertEqual(self.storage.save('resumes/b.pdf', ContentFile(b'%PDF-1.4 one')), name)
+        with self.storage.open(name) as handle:
+            self.assertEqual(handle.read(), b'%PDF-1.4 one')
+
+    def test_concurrent_uploads_leave_no_temp_files(self):
+        payload = b'%PDF-1.4 ' + os.urandom(256 * 1024)
+        names = []
+
+        def upload():
+            names.append(self.storage.save('resumes/r.pdf', ContentFile(payload)))
+
+        threads = [threading.Thread(target=upload) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(names)), 1)
+        self.assertEqual([name for name, _ in self.storage.iter_blobs()], names[:1])
+        with self.storage.open(names[0]) as handle:
+            self.assertEqual(handle.read(), payload)
+
+
+class ResumeGCTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.storage = LocalContentAddressedStorage()
+        self.name = self.storage.save('resumes/old.pdf', ContentFile(b'%PDF-1.4 old resume'))
+        old = time.time() - 3 * 3600
+        os.utime(self.storage.path(self.name), (old, old))
+        self.blob = ResumeBlob.objects.create(path=self.name, size=19)
+        ResumeBlob.objects.filter(pk=self.blob.pk).update(
+            updated_at=datetime.fromtimestamp(old, tz=dt_timezone.utc))
+
+    def test_unreferenced_blob_is_removed(self):
+        call_command('gc_resumes', stdout=io.StringIO())
+        self.assertFalse(ResumeBlob.objects.exists())
+        self.assertFalse(self.storage.exists(self.name))
+
+    def test_blob_referenced_during_collection_is_kept(self):
+        get_modified_time = LocalContentAddressedStorage.get_modified_time
+
+        def upload_meanwhile(storage, name):
+            # A dedupe upload adds its reference after the GC has read the row
+            ResumeBlob.objects.filter(path=name).update(ref_count=F('ref_count') + 1, updated_at=dj_timezone.now())
+            return get_modified_time(storage, name)
+
+        with mock.patch.object(LocalContentAddressedStorage, 'get_modified_time', upload_meanwhile):
+            call_command('gc_resumes', stdout=io.StringIO())
+        self.assertEqual(ResumeBlob.objects.get().ref_count, 1)
+        self.assertTrue(self.storage.exists(self.name))
+
+
+class VocabularyEngineTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = VocabularyEngine(nlp=spacy.blank('en'), batch_size=2)
+
+    def test_word_frequency_skips_stopwords_and_punctuation(self):
+        analysis = self.engine.analyze(['I built the Django API.', 'Django and Python, mostly.', '', None])
+        self.assertEqual(analysis['word_frequency']['django'], 2)
+        self.assertNotIn('the', analysis['word_frequency'])
+        self.assertNotIn('.', analysis['word_frequency'])
+        self.assertEqual(sum(analysis['pos_distribution'].values()), 9)
+
+    def test_analyze_many_keeps_interviews_separate(self):
+        first, second = self.engine.analyze_many([['Python Python'], ['Java']])
+        self.assertEqual(first['word_frequency'], {'python': 2})
+        self.assertEqual(second['word_frequency'], {'java': 1})
+
+    def test_parallel_analysis_reuses_the_given_pool(self):
+        interviews = [['Python'], ['Java'], ['Rust']]
+        with mock.patch('aiinterview.vocabularyEngine.get_vocabulary_engine', return_value=self.engine), \
+                ThreadPoolExecutor(max_workers=2) as pool:
+            for _ in range(2):
+                analyses = analyze_vocabulary_parallel(interviews, workers=1, chunk_size=1, executor=pool)
+                self.assertEqual([list(a['word_frequency']) for a in analyses], [['python'], ['java'], ['rust']])
+
+
+class _LengthSentiment:
+    """Deterministic stand-in for VADER so the tests don't need the lexicon download"""
+    def __init__(self):
+        self.calls = 0
+
+    def polarity_scores(self, text):
+        self.calls += 1
+        positive = min(len(text) / 100, 1.0)
+        return {'neg': 0.0, 'neu': 1.0 - positive, 'pos': positive, 'compound': positive}
+
+
+class SentimentScorerTests(SimpleTestCase):
+    def setUp(self):
+        self.analyzer = _LengthSentiment()
+        self.scorer = SentimentScorer(analyzer=self.analyzer, cache_size=100)
+
+    def test_batch_scores_and_missing_answers(self):
+        scores = self.scorer.score_batch(['a' * 50, '', None, 'a' * 10])
+        self.assertEqual(scores.shape, (4, 4))
+        self.assertAlmostEqual(scores[0, 2], 0.5)
+        self.assertTrue(np.isnan(scores[1]).all())
+        self.assertTrue(np.isnan(scores[2]).all())
+
+    def test_repeated_answers_hit_the_cache(self):
+        self.scorer.score_batch(['same answer'] * 5)
+        self.scorer.score_batch(['same answer'])
+        self.assertEqual(self.analyzer.calls, 1)
+
+    def test_aggregate_by_group(self):
+        scores = self.scorer.score_batch(['a' * 20, 'a' * 40, '', 'a' * 90])
+        groups, means = aggregate_by_group(scores, [7, 7, 8, 9])
+        self.assertEqual(groups.tolist(), [7, 9])
+        self.assertAlmostEqual(means[0, 2], 0.3)
+        self.assertAlmostEqual(means[1, 3], 0.9)
+
+
+class RescoreSentimentTests(TestCase):
+    def test_derived_scores_and_rollups_follow_the_new_sentiment(self):
+        user = User.objects.create_user(username='rescored', password='pass-12345')
+        interview = Interview.objects.create(user=user, candidate_name='Rescored', completed=True)
+        Responses.objects.create(interview=interview, question='Why Django?', answer='a' * 50, question_number=1)
+        result = Result.objects.create(interview=interview, grammar_score=8, clarity_score=8,
+                                       professionalism_score=8, overall_technical_score=6,
+                                       overall_communication_score=5.6, final_score=5.8)
+        scorer = SentimentScorer(analyzer=_LengthSentiment(), cache_size=100)
+        with mock.patch('aiinterview.management.commands.rescore_sentiment.get_sentiment_scorer',
+                        return_value=scorer):
+            call_command('rescore_sentiment', stdout=io.StringIO())
+
+        result.refresh_from_db()
+        self.assertAlmostEqual(result.compound_sentiment, 0.5)
+        self.assertAlmostEqual(result.overall_communication_score, 8 * 0.7 + 0.5 * 0.3)
+        self.assertAlmostEqual(result.final_score, (6 + 5.75) / 2)
+        self.assertAlmostEqual(summarize('final_score')[0]['mean'], 5.875)
+
+
+class FakeChatGroqTests(SimpleTestCase):
+    def setUp(self):
+        fake_llm_stats.reset()
+
+    def test_answers_question_prompts_in_parser_format(self):
+        from langchain.output_parsers import ResponseSchema, StructuredOutputParser
+        parser = StructuredOutputParser.from_response_schemas([ResponseSchema(name="question", description="q")])
+        llm = FakeChatGroq(output_tokens=20)
+        response = llm.invoke("Ask something.\n" + parser.get_format_instructions())
+        self.assertTrue(parser.parse(response.content)["question"].startswith("Can you walk me through"))
+        self.assertEqual(fake_llm_stats.snapshot()['calls'], 1)
+        self.assertEqual(response.usage_metadata['output_tokens'], fake_llm_stats.snapshot()['output_tokens'])
+
+    def test_error_rate(self):
+        llm = FakeChatGroq(error_rate=1.0)
+        with self.assertRaises(FakeLLMError):
+            llm.invoke("hello")
+        self.assertEqual(fake_llm_stats.snapshot()['errors'], 1)
+
+
+class RequestTracingTests(SimpleTestCase):
+    def test_llm_calls_recorded_as_spans(self):
+        trace = tracing.RequestTrace()
+        token = tracing.activate(trace)
+        try:
+            with override_settings(LLM_BACKEND='fake', FAKE_LLM_OPTIONS={'output_tokens': 12}):
+                get_chat_model('llama3-70b-8192').invoke("hello")
+            with tracing.span('nlp.sentiment'):
+                pass
+        finally:
+            tracing.deactivate(token)
+        llm_span = trace.spans[0]
+        self.assertEqual(llm_span['stage'], 'llm')
+        self.assertEqual(llm_span['model'], 'llama3-70b-8192')
+        self.assertEqual(llm_span['output_tokens'], 12)
+        self.assertEqual(set(trace.stage_totals()), {'llm', 'nlp.sentiment'})
+
+    @override_settings(METRICS_AUTH_TOKEN='secret')
+    def test_server_timing_header_and_metrics(self):
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('total;dur=', response['Server-Timing'])
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertIn('hirevision_request_duration_seconds_count{endpoint="metrics",method="GET",status="200"}',
+                      response.content.decode())
+
+    @override_settings(METRICS_AUTH_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer sécret').status_code, 403)
+
+    @override_settings(METRICS_AUTH_TOKEN=None)
+    def test_metrics_closed_without_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer None').status_code, 403)
+
+
+def _slow_view(request):
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    return HttpResponse('ok')
+
+
+class SlowRequestProfilerTests(SimpleTestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir, ignore_errors=True)
+
+    def _settings(self, **overrides):
+        return override_settings(**{
+            'SLOW_REQUEST_PROFILING': True,
+            'SLOW_REQUEST_THRESHOLD_MS': 20,
+            'SLOW_REQUEST_PROFILER': 'sample',
+            'SLOW_REQUEST_SAMPLE_INTERVAL_MS': 1,
+            'SLOW_REQUEST_PROFILE_DIR': self.profile_dir,
+            'SLOW_REQUEST_PROFILE_LIMIT': 2,
+            **overrides,
+        })
+
+    def test_disabled_by_default(self):
+        with override_settings(SLOW_REQUEST_PROFILING=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                SlowRequestProfilerMiddleware(_slow_view)
+
+    def test_ring_buffer_keeps_newest_profiles(self):
+        for mode in ('sample', 'cprofile', 'sample'):
+            with self._settings(SLOW_REQUEST_PROFILER=mode):
+                middleware = SlowRequestProfilerMiddleware(_slow_view)
+                trace = tracing.RequestTrace()
+                token = tracing.activate(trace)
+                tracing.tag(interview_id=42)
+                try:
+                    middleware(RequestFactory().get('/aiinterview/next-question/'))
+                finally:
+                    tracing.deactivate(token)
+        with self._settings():
+            profiles = [profile for _, profile in get_profile_store().load()]
+        self.assertEqual([profile['mode'] for profile in profiles], ['cprofile', 'sample'])
+        self.assertEqual(profiles[0]['interview_id'], '42')
+        hot = aggregate_hot_functions(profiles, sort='self', limit=5)
+        self.assertTrue(any('_slow_view' in entry['function'] for entry in hot))
+
+    def test_fast_requests_are_not_kept(self):
+        with self._settings(SLOW_REQUEST_THRESHOLD_MS=10000):
+            SlowRequestProfilerMiddleware(_slow_view)(RequestFactory().get('/'))
+            self.assertEqual(get_profile_store().paths(), [])
+
+
+class _RecordingEnhancer:
+    def __init__(self, delay=0.05, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.batch_sizes = []
+        self.generated = []
+
+    def enhance_batch(self, items, max_new_tokens=None):
+        self.batch_sizes.append(len(items))
+        self.generated.extend((section, max_new_tokens) for _, _, section in items)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError('model crashed')
+        return [f'{enhancement_type}: {text.upper()}' for text, enhancement_type, _ in items]
+
+    def enhance_stream(self, item, max_new_tokens=None):
+        text, enhancement_type, section = item
+        self.generated.append((section, max_new_tokens))
+        if self.fail:
+            raise RuntimeError('model crashed')
+        for word in f'{enhancement_type}: {text.upper()}'.split(' '):
+            time.sleep(self.delay)
+            yield word + ' '
+
+
+class _EnhancerServiceMixin:
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.address = f"unix:{os.path.join(directory, 'enhancer.sock')}"
+
+    def _serve(self, enhancer, **options):
+        stop = EnhancerServer(enhancer, **options).serve_in_thread(self.address)
+        self.addCleanup(stop)
+
+    def _enhance_all(self, items):
+        async def run():
+            return await asyncio.gather(*(enhance_remote(text, kind, address=self.address) for text, kind in items),
+                                        return_exceptions=True)
+        return asyncio.run(run())
+
+
+class EnhancerServiceTests(_EnhancerServiceMixin, SimpleTestCase):
+    def test_concurrent_requests_share_batches(self):
+        enhancer = _RecordingEnhancer()
+        self._serve(enhancer, max_batch_size=4, batch_wait=0.2)
+        items = [(f'resume {number}', 'concise') for number in range(8)]
+        results = self._enhance_all(items)
+        self.assertEqual(results, [f'concise: RESUME {number}' for number in range(8)])
+        self.assertEqual(sum(enhancer.batch_sizes), 8)
+        self.assertLessEqual(len(enhancer.batch_sizes), 3)
+        self.assertTrue(all(size <= 4 for size in enhancer.batch_sizes))
+
+    def test_identical_requests_share_one_generation(self):
+        enhancer = _RecordingEnhancer(delay=0.1)
+        self._serve(enhancer, max_batch_size=8, batch_wait=0.01)
+        results = self._enhance_all([('same resume', 'concise'), ('same  resume\n', 'concise'),
+                                     ('same resume', 'concise'), ('same resume', 'technical')])
+        self.assertEqual(results[:3], ['concise: SAME RESUME'] * 3)
+        self.assertEqual(sum(enhancer.batch_sizes), 2)  # concise once, technical once
+
+        self.assertEqual(self._enhance_all([('same resume', 'concise')]), ['concise: SAME RESUME'])
+        self.assertEqual(sum(enhancer.batch_sizes), 2)
+        stats = asyncio.run(fetch_stats(self.address))
+        self.assertEqual(stats['cache_misses'], 2)
+        self.assertEqual(stats['coalesced'] + stats['cache_hits'], 3)
+        self.assertEqual(stats['hit_rate'], 0.6)
+        self.assertGreater(stats['seconds_saved'], 0)
+
+    @override_settings(ENHANCER_SECTION_MIN_TOKENS=64, ENHANCER_MAX_NEW_TOKENS=800)
+    def test_sections_are_enhanced_separately_and_only_when_changed(self):
+        enhancer = _RecordingEnhancer(delay=0)
+        self._serve(enhancer, batch_wait=0.01)
+        experience = ' '.join(['built and shipped web applications'] * 40)
+        resume = f"Jane Doe\njane@example.com\n\nExperience:\n{experience}\n\nEducation: BSc CS\n\nSkills\nPython"
+        result = self._enhance_all([(resume, 'detailed')])[0]
+        self.assertEqual(result, f"Jane Doe\njane@example.com\n\nExperience:\ndetailed: {experience.upper()}"
+                                 f"\n\nEducation:\ndetailed: BSC CS\n\nSkills\ndetailed: PYTHON")
+        self.assertEqual(dict(enhancer.generated), {'experience': 512, 'education': 64, 'skills': 64})
+
+        enhancer.generated.clear()
+        self._enhance_all([(resume.replace('Python', 'Python, Go'), 'detailed')])
+        self.assertEqual(enhancer.generated, [('skills', 64)])
+
+    def test_failures_are_not_cached(self):
+        enhancer = _RecordingEnhancer(delay=0, fail=True)
+        self._serve(enhancer, batch_wait=0)
+        self._enhance_all([('resume', 'concise')])
+        self._enhance_all([('resume', 'concise')])
+        self.assertEqual(enhancer.batch_sizes, [1, 1])
+
+    def test_cache_expiry_and_eviction(self):
+        cache = EnhancementCache(max_entries=2, ttl=60)
+        for name in 'abc':
+            cache.put(name, name.upper(), 1.0)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), ('B', 1.0))
+        with mock.patch('aiinterview.enhancerService.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache_key('a  b\n', 'concise'), cache_key('a b', 'concise'))
+        self.assertNotEqual(cache_key('a b', 'concise'), cache_key('a b', 'detailed'))
+
+    def test_cancelled_request_still_fills_the_cache(self):
+        enhancer = _RecordingEnhancer(delay=0.1)
+        server = EnhancerServer(enhancer, batch_wait=0.01)
+        item = ('built web apps', 'concise', 'experience')
+
+        async def run():
+            server._queue = asyncio.Queue()
+            batcher = asyncio.create_task(server._batch_loop())
+            try:
+                owner = asyncio.create_task(server._enhance(item, 64))
+                await asyncio.sleep(0.03)
+                owner.cancel()  # e.g. the streaming client that batched this section went away
+                await asyncio.gather(owner, return_exceptions=True)
+                await asyncio.sleep(0.2)
+                return await server._enhance(item, 64)
+            finally:
+                batcher.cancel()
+
+        self.assertEqual(asyncio.run(run()), 'concise: BUILT WEB APPS')
+        server._executor.shutdown()
+        self.assertEqual(len(enhancer.generated), 1)
+        self.assertEqual(server.stats['cache_hits'], 1)
+
+    def test_model_failure_is_reported_to_each_request(self):
+        self._serve(_RecordingEnhancer(fail=True), batch_wait=0.05)
+        results = self._enhance_all([('a', 'professional'), ('b', 'technical')])
+        self.assertTrue(all(isinstance(result, EnhancerError) for result in results))
+        self.assertIn('model crashed', str(results[0]))
+
+    def test_missing_service_is_unavailable(self):
+        with self.assertRaises(EnhancerUnavailable):
+            asyncio.run(enhance_remote('text', 'professional', address=self.address))
+
+    def test_view_returns_503_without_service(self):
+        client = APIClient()
+        client.force_authenticate(User(id=1, username='candidate'))
+        with override_settings(ENHANCER_SERVICE_ADDRESS=self.address):
+            response = client.post(reverse('enhance_text'), {'text': 'cv', 'enhancement_type': 'concise'},
+                                   format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['error'], 'Enhancement service unavailable')
+
+    def test_view_returns_the_enhanced_text(self):
+        self._serve(_RecordingEnhancer(delay=0), batch_wait=0.01)
+        client = APIClient()
+        client.force_authenticate(User(id=1, username='candidate'))
+        with override_settings(ENHANCER_SERVICE_ADDRESS=self.address):
+            response = client.post(reverse('enhance_text'), {'text': 'cv', 'enhancement_type': 'concise'},
+                                   format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['enhanced_text'], 'concise: CV')
+
+
+class EnhancerStreamingTests(_EnhancerServiceMixin, SimpleTestCase):
+    def test_stream_matches_the_batched_result(self):
+        enhancer = _RecordingEnhancer(delay=0)
+        self._serve(enhancer, batch_wait=0.01)
+        resume = "Jane Doe\n\nExperience:\nbuilt web apps\n\nEducation: BSc CS\n\nSkills\nPython"
+        pieces = list(open_enhance_stream(resume, 'concise', address=self.address))
+        self.assertGreater(len(pieces), 3)
+        self.assertEqual(''.join(pieces).replace(' \n', '\n').strip(),
+                         "Jane Doe\n\nExperience:\nconcise: BUILT WEB APPS\n\nEducation:\nconcise: BSC CS"
+                         "\n\nSkills\nconcise: PYTHON")
+        # Streamed sections are cached like batched ones
+        enhancer.generated.clear()
+        self.assertEqual(self._enhance_all([(resume, 'concise')])[0].count('concise: '), 3)
+        self.assertEqual(enhancer.generated, [])
+
+    def test_first_piece_arrives_before_generation_ends(self):
+        self._serve(_RecordingEnhancer(delay=0.05), batch_wait=0)
+        started = time.perf_counter()
+        pieces = open_enhance_stream(' '.join(['word'] * 20), 'concise', address=self.address)
+        next(pieces)
+        first = time.perf_counter() - started
+        list(pieces)
+        self.assertLess(first * 4, time.perf_counter() - started)
+
+    def test_stream_failure_is_raised(self):
+        self._serve(_RecordingEnhancer(delay=0, fail=True), batch_wait=0)
+        with self.assertRaisesMessage(EnhancerError, 'model crashed'):
+            list(open_enhance_stream('cv', 'concise', address=self.address))
+
+    def test_view_streams_server_sent_events(self):
+        self._serve(_RecordingEnhancer(delay=0), batch_wait=0)
+        client = APIClient()
+        client.force_authenticate(User(id=1, username='candidate'))
+        with override_settings(ENHANCER_SERVICE_ADDRESS=self.address):
+            response = client.post(reverse('enhance_text_stream'), {'text': 'cv', 'enhancement_type': 'concise'},
+                                   format='json')
+            body = b''.join(response.streaming_content).decode()
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn('data: {"delta": "concise: "}', body)
+        self.assertTrue(body.endswith("event: done\ndata: {}\n\n"))
+
+    def test_stream_view_returns_503_without_service(self):
+        client = APIClient()
+        client.force_authenticate(User(id=1, username='candidate'))
+        with override_settings(ENHANCER_SERVICE_ADDRESS=self.address):
+            response = client.post(reverse('enhance_text_stream'), {'text': 'cv'}, format='json')
+        self.assertEqual(response.status_code, 503)
+
+
+class StreamingExtractorTests(SimpleTestCase):
+    def _run(self, prompt, marker, chunks):
+        extractor = StreamingExtractor(prompt, marker)
+        return ''.join(extractor.feed(chunk) for chunk in chunks) + extractor.finish()
+
+    def test_prompt_echo_and_marker_are_stripped(self):
+        prompt = build_prompt('cv', 'concise')
+        marker = section_marker('concise', None)
+        output = prompt + "\n  Hello world"
+        chunks = [output[index:index + 7] for index in range(0, len(output), 7)]
+        self.assertEqual(self._run(prompt, marker, chunks), 'Hello world')
+        self.assertEqual(self._run(prompt, marker, [' ' + marker[:4], marker[4:] + ' Hi', ' there']), 'Hi there')
+
+    def test_completion_without_echo_passes_through(self):
+        self.assertEqual(self._run('prompt', 'Enhanced:', ['Hi', ' there']), 'Hi there')
+
+
+class _EchoBackend(EnhancerBackend):
+    name = 'echo'
+    loads = 0
+
+    def _load(self):
+        type(self).loads += 1
+
+    def generate(self, prompts, max_new_tokens):
+        return [f" improved ({max_new_tokens}) " for _ in prompts]
+
+
+class EnhancerBackendTests(SimpleTestCase):
+    def test_backend_is_selected_by_setting(self):
+        with override_settings(ENHANCER_BACKEND='transformers'):
+            self.assertIsInstance(get_backend(), TransformersBackend)
+        with override_settings(ENHANCER_BACKEND='aiinterview.tests._EchoBackend'):
+            self.assertIsInstance(get_backend(), _EchoBackend)
+
+    def test_enhance_batch_loads_once_and_cleans_output(self):
+        _EchoBackend.loads = 0
+        backend = _EchoBackend(model_name='echo', max_new_tokens=16)
+        backend.warm_up()
+        self.assertEqual(backend.enhance_batch([('cv', 'concise'), ('cv', 'detailed')]),
+                         ['improved (16)', 'improved (16)'])
+        self.assertEqual(_EchoBackend.loads, 1)
+
+    @override_settings(ENHANCER_BACKEND='aiinterview.tests._EchoBackend')
+    def test_enhancer_singleton_keeps_its_backend(self):
+        ResumeEnhancerLLM._instance = None
+        self.addCleanup(setattr, ResumeEnhancerLLM, '_instance', None)
+        first = ResumeEnhancerLLM()
+        first.load_model()
+        self.assertIs(ResumeEnhancerLLM(), first)
+        self.assertTrue(ResumeEnhancerLLM().backend.loaded)
+
+    def test_enhance_stream_falls_back_to_generate(self):
+        backend = _EchoBackend(model_name='echo', max_new_tokens=16)
+        self.assertEqual(''.join(backend.enhance_stream(('cv', 'concise'))).strip(), 'improved (16)')
+
+    @override_settings(LLM_BACKEND='fake')
+    def test_remote_backend_uses_chat_model(self):
+        backend = RemoteLLMBackend()
+        outputs = backend.enhance_batch([('cv one', 'professional'), ('cv two', 'technical')])
+        self.assertEqual(len(outputs), 2)
+        self.assertTrue(all(outputs))
+
+
+def _wav(seconds, rate=8000, silent=False):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as audio:
+        audio.setnchannels(1)
+        audio.setsampwidth(2)
+        audio.setframerate(rate)
+        frame = b'\x00\x00' if silent else b'\x10\x20'
+        audio.writeframes(frame * int(rate * seconds))
+    return buffer.getvalue()
+
+
+class TranscriptionTests(SimpleTestCase):
+    def test_wav_header(self):
+        audio = _wav(1)
+        self.assertIsNone(parse_wav_header(audio[:20]))
+        self.assertEqual(parse_wav_header(audio), (16000, 44))
+        self.assertEqual(parse_wav_header(b'\x01\x02' * 20), (32000, 0))
+
+    def test_offline_transcribes_segments_while_uploading(self):
+        transcriber = OfflineTranscriber(segment_seconds=1, latency=0.1)
+        audio = _wav(4)
+        for start in range(0, len(audio), 4000):
+            transcriber.feed(audio[start:start + 4000])
+            time.sleep(0.03)
+        started = time.perf_counter()
+        transcript = transcriber.finish()
+        # Only the last segment is left to transcribe once the upload ends
+        self.assertLess(time.perf_counter() - started, 0.25)
+        self.assertEqual(len(transcript.split()), 8)
+        self.assertEqual(OfflineTranscriber(segment_seconds=1).finish(), '')
+
+    def test_silence_has_no_transcript(self):
+        transcriber = OfflineTranscriber(segment_seconds=1)
+        transcriber.feed(_wav(2, silent=True))
+        self.assertEqual(transcriber.finish(), '')
+
+    def test_size_limit(self):
+        transcriber = OfflineTranscriber(max_bytes=1000)
+        with self.assertRaises(AudioTooLarge):
+            transcriber.feed(_wav(1))
+        with self.assertRaises(TranscriptionError):
+            transcriber.finish()
+
+    @override_settings(TRANSCRIPTION_BACKEND='assemblyai')
+    def test_assemblyai_receives_audio_as_it_arrives(self):
+        import assemblyai as aai
+
+        uploaded = []
+
+        def transcribe(data):
+            uploaded.extend(data)
+            return mock.Mock(status=aai.TranscriptStatus.completed, text=' spoken answer ')
+
+        with mock.patch('assemblyai.Transcriber') as transcriber_class:
+            transcriber_class.return_value.transcribe.side_effect = transcribe
+            transcriber = get_transcriber()
+            self.assertIsInstance(transcriber, AssemblyAITranscriber)
+            transcriber.feed(b'part one')
+            transcriber.feed(b'part two')
+            self.assertEqual(transcriber.finish(), 'spoken answer')
+        self.assertEqual(uploaded, [b'part one', b'part two'])
+
+
+@override_settings(TRANSCRIPTION_BACKEND='offline', TRANSCRIPTION_READ_SIZE=4096)
+class AnswerAudioViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='speaker', password='pass-12345')
+        self.interview = Interview.objects.create(user=self.user, candidate_name='Speaker')
+        Responses.objects.create(interview=self.interview, question='Tell me about yourself', question_number=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('answer_audio', args=[self.interview.id])
+        agent = mock.Mock()
+        agent.generate_question.return_value = 'What did you build?'
+        patcher = mock.patch('aiinterview.views.get_or_create_agent', return_value=agent)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_chunked_answer_is_transcribed_and_answers_the_question(self):
+        audio = _wav(3)
+        half = len(audio) // 2
+        response = self.client.post(f'{self.url}?seq=0', audio[:half], content_type='audio/wav')
+        self.assertEqual(response.status_code, 202)
+        response = self.client.post(f'{self.url}?seq=1&final=1', audio[half:], content_type='audio/wav')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['question'], 'What did you build?')
+        self.assertEqual(response.data['question_number'], 2)
+        answer = self.interview.responses.get(question_number=1).answer
+        self.assertEqual(response.data['transcript'], answer)
+        self.assertTrue(answer)
+
+    def test_out_of_order_chunk_is_rejected(self):
+        self.assertEqual(self.client.post(f'{self.url}?seq=1', b'data', content_type='audio/wav').status_code, 409)
+
+    def test_silence_is_not_an_answer(self):
+        response = self.client.post(f'{self.url}?final=1', _wav(1, silent=True), content_type='audio/wav')
+        self.assertEqual(response.status_code, 422)
+
+
+class _CountingSynthesizer(OfflineSynthesizer):
+    calls = []
+
+    def synthesize(self, text):
+        type(self).calls.append(text)
+        time.sleep(0.05)
+        return super().synthesize(text)
+
+
+def _evict_after_first_render():
+    """Patch render() so the cache trims each text's file right after its first render"""
+    real_render = questionAudio.render
+    evicted = set()
+
+    def render_then_evict(text):
+        path, content_type = real_render(text)
+        if text not in evicted:
+            evicted.add(text)
+            os.unlink(path)
+        return path, content_type
+
+    return mock.patch('aiinterview.questionAudio.render', side_effect=render_then_evict)
+
+
+class QuestionAudioTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        _CountingSynthesizer.calls = []
+        override = override_settings(TTS_BACKEND='aiinterview.tests._CountingSynthesizer', TTS_CACHE_DIR=directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_questions_are_synthesized_once(self):
+        paths = []
+        threads = [threading.Thread(target=lambda: paths.append(render('Why Django?')[0])) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(paths)), 1)
+        self.assertEqual(render('  Why   Django? ')[0], paths[0])
+        self.assertEqual(_CountingSynthesizer.calls, ['Why Django?'])
+
+    def test_greeting_reuses_the_shared_phrase(self):
+        self.assertEqual(speech_parts(f"Hello Ann! {GREETING_QUESTION}"), ['Hello Ann!', GREETING_QUESTION])
+        render(f"Hello Ann! {GREETING_QUESTION}")
+        render(f"Hello Bob! {GREETING_QUESTION}")
+        self.assertEqual(_CountingSynthesizer.calls, ['Hello Ann!', GREETING_QUESTION, 'Hello Bob!'])
+
+    def test_audio_trimmed_before_it_is_read_is_rendered_again(self):
+        with _evict_after_first_render():
+            audio, _ = open_audio(f"Hello Ann! {GREETING_QUESTION}")
+        with audio:
+            self.assertTrue(audio.read())
+        # Each part is synthesized again once; rebuilding the whole text reuses the parts
+        self.assertEqual(_CountingSynthesizer.calls,
+                         ['Hello Ann!', 'Hello Ann!', GREETING_QUESTION, GREETING_QUESTION])
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = AudioCache(max_bytes=250)
+        cache.put('aa1', '.mp3', b'x' * 100)
+        cache.put('aa2', '.mp3', b'x' * 100)
+        old = time.time() - 60
+        os.utime(cache.path('aa1', '.mp3'), (old, old))
+        os.utime(cache.path('aa2', '.mp3'), (old - 60, old - 60))
+        cache.get('aa2', '.mp3')  # used again, so aa1 is now the oldest
+        cache.put('aa3', '.mp3', b'x' * 100)
+        self.assertIsNone(cache.get('aa1', '.mp3'))
+        self.assertIsNotNone(cache.get('aa2', '.mp3'))
+        self.assertIsNotNone(cache.get('aa3', '.mp3'))
+
+
+@override_settings(TTS_BACKEND='offline')
+class QuestionAudioViewTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        override = override_settings(TTS_CACHE_DIR=directory)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='listener', password='pass-12345')
+        interview = Interview.objects.create(user=self.user, candidate_name='Listener')
+        self.question = Responses.objects.create(interview=interview, question='Why Django?', question_number=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('question_audio', args=[self.question.id])
+
+    def test_serves_audio_with_ranges(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'audio/wav')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        body = response.content
+        self.assertTrue(body.startswith(b'RIFF'))
+
+        partial = self.client.get(self.url, HTTP_RANGE='bytes=4-11')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.content, body[4:12])
+        self.assertEqual(partial['Content-Range'], f'bytes 4-11/{len(body)}')
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=-4').content, body[-4:])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f'bytes={len(body)}-').status_code, 416)
+        empty = self.client.get(self.url, HTTP_RANGE='bytes=-')
+        self.assertEqual(empty.status_code, 200)
+        self.assertNotIn('Content-Range', empty)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_audio_trimmed_before_it_is_served_is_rendered_again(self):
+        with _evict_after_first_render():
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'RIFF'))
+
+    def test_other_users_questions_are_hidden(self):
+        other = User.objects.create_user(username='other', password='pass-12345')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_saving_a_question_starts_synthesis(self):
+        with mock.patch('aiinterview.questionAudio.prerender') as prerender:
+            with self.captureOnCommitCallbacks(execute=True):
+                Responses.objects.create(interview=self.question.interview, question='What next?',
+                                         question_number=2)
+        prerender.assert_called_once_with('What next?')
+
+
+@override_settings(TTS_PRERENDER=False)
+class HRInterviewTests(TestCase):
+    def setUp(self):
+        self.prompts = []
+
+        def ask(prompt):
+            self.prompts.append(prompt.to_string())
+            return AIMessage(content=f'{{"question": "HR question {len(self.prompts)}"}}')
+
+        patcher = mock.patch('aiinterview.hrInterviewAgent.get_chat_model', return_value=RunnableLambda(ask))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='hr', password='pass-12345', first_name='Ann')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_questions_follow_the_stored_conversation(self):
+        response = self.client.post(reverse('start_interview'), {'interview_type': 'hr'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['interview_type'], Interview.HR)
+        self.assertEqual(response.data['question'], 'HR question 1')
+        interview_id = response.data['interview_id']
+
+        response = self.client.post(reverse('next_question'), {
+            'interview_id': interview_id, 'answer': 'I mediated a conflict between two teammates.',
+        }, format='json')
+        self.assertEqual(response.data['question'], 'HR question 2')
+        self.assertEqual(response.data['question_number'], 2)
+        self.assertIn('Question 1: HR question 1\nAnswer: I mediated a conflict', self.prompts[1])
+        self.assertIn('question number 2 out of 10', self.prompts[1])
+
+    def test_uploaded_resume_starts_an_hr_interview(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=root):
+            response = self.client.post(reverse('upload_resume'), {
+                'resume': SimpleUploadedFile('cv.pdf', build_synthetic_pdf(1), content_type='application/pdf'),
+                'interview_type': 'hr',
+            })
+            self.assertEqual(response.status_code, 200)
+            interview_id = response.data['interview_id']
+
+            response = self.client.post(reverse('start_interview'),
+                                        {'interview_id': interview_id, 'interview_type': 'hr'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['interview_type'], Interview.HR)
+        self.assertEqual(response.data['question'], 'HR question 1')
+
+    def test_mismatched_interview_type_is_rejected(self):
+        interview = Interview.objects.create(user=self.user, candidate_name='Ann')
+        response = self.client.post(reverse('start_interview'),
+                                    {'interview_id': interview.id, 'interview_type': 'hr'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Interview type mismatch')
+        self.assertFalse(interview.responses.exists())
+
+    def test_unknown_interview_type_is_rejected(self):
+        response = self.client.post(reverse('start_interview'), {'interview_type': 'panel'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Interview.objects.exists())
+
+
+@override_settings(TTS_PRERENDER=False)
+class TechnicalInterviewTests(TestCase):
+    def setUp(self):
+        call_command('load_question_bank', stdout=io.StringIO())
+        self.prompts = []
+
+        def ask(prompt):
+            self.prompts.append(prompt.to_string())
+            return AIMessage(content='{"question": "Why that isolation level?"}')
+
+        patcher = mock.patch('aiinterview.technicalInterviewAgent.get_chat_model', return_value=RunnableLambda(ask))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='engineer', password='pass-12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def answer(self, interview_id, answer):
+        return self.client.post(reverse('next_question'), {'interview_id': interview_id, 'answer': answer},
+                                format='json')
+
+    def test_bank_loading_is_repeatable(self):
+        out = io.StringIO()
+        call_command('load_question_bank', stdout=out)
+        self.assertIn('Loaded 0 new questions (9 already in the bank)', out.getvalue())
+        self.assertEqual(TechnicalQuestion.objects.filter(opening=True).count(), 2)
+
+    def test_only_follow_ups_call_the_llm(self):
+        response = self.client.post(reverse('start_interview'), {
+            'interview_type': 'technical', 'position': 'Software Engineer', 'difficulty': 'medium',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['question'],
+                         'Can you explain what RESTful APIs are and their key principles?')
+        interview_id = response.data['interview_id']
+        self.assertEqual(self.prompts, [])
+
+        response = self.answer(interview_id, 'Stateless requests over HTTP verbs.')
+        self.assertEqual(response.data['question'], 'Why that isolation level?')
+        self.assertEqual(len(self.prompts), 1)
+        self.assertIn('Stateless requests over HTTP verbs.', self.prompts[0])
+
+        response = self.answer(interview_id, 'It keeps reads consistent.')
+        self.assertEqual(response.data['question'], "What's the difference between Python lists and tuples?")
+        self.assertEqual(len(self.prompts), 1)
+
+    def test_results_are_reported_under_technical(self):
+        interview = Interview.objects.create(user=self.user, interview_type=Interview.TECHNICAL,
+                                             position='software_engineer', difficulty='medium')
+        Responses.objects.create(interview=interview, question='Last question?', question_number=10)
+        analysis = {field: Result._meta.get_field(field).get_default() for field in Result.ANALYSIS_FIELDS}
+        analysis['final_score'] = 7.5
+        with mock.patch('aiinterview.analyzerAgent.analyze_responses', return_value=analysis):
+            response = self.answer(interview.id, 'A final answer.')
+        self.assertEqual(response.data['status'], 'completed')
+        groups = summarize('final_score', group_by='category')
+        self.assertEqual([(group['category'], group['mean']) for group in groups], [('technical', 7.5)])
+
+    def test_bank_questions_cover_new_topics_first(self):
+        interview = Interview.objects.create(user=self.user, interview_type=Interview.TECHNICAL,
+                                             position='software_engineer', difficulty='medium')
+        for number, question in enumerate([
+            'Can you explain what RESTful APIs are and their key principles?',
+            "What's the difference between Python lists and tuples?",
+            'How do you optimize database queries for better performance?',
+            'Why that index?',
+        ], 1):
+            Responses.objects.create(interview=interview, question=question, answer='...', question_number=number)
+        # The transactions question comes next in the bank, but databases are already covered
+        self.assertEqual(TechnicalInterviewAgent(interview).generate_question(5),
+                         'Explain your experience with version control systems like Git.')
+
+    def test_invalid_difficulty_is_rejected(self):
+        response = self.client.post(reverse('start_interview'), {
+            'interview_type': 'technical', 'difficulty': 'impossible',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ReanalyzeInterviewsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.checkpoint = os.path.join(directory, 'checkpoint.json')
+        for target, engine in [
+            ('get_vocabulary_engine', VocabularyEngine(nlp=spacy.blank('en'))),
+            ('get_sentiment_scorer', SentimentScorer(analyzer=_LengthSentiment(), cache_size=100)),
+        ]:
+            patcher = mock.patch(f'aiinterview.analyzerAgent.{target}', return_value=engine)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        user = User.objects.create_user(username='historic', password='pass-12345')
+        self.interviews = []
+        for number in range(3):
+            interview = Interview.objects.create(user=user, candidate_name='Historic', completed=True)
+            for question_number in (1, 2):
+                Responses.objects.create(interview=interview, question_number=question_number,
+                                         question='How do you test Django views?',
+                                         answer='With the test client and a few factories.')
+            Result.objects.create(interview=interview, final_score=1.0)
+            self.interviews.append(interview)
+
+    def reanalyze(self, **options):
+        out = io.StringIO()
+        call_command('reanalyze_interviews', workers=1, checkpoint=self.checkpoint, stdout=out,
+                     stderr=io.StringIO(), **options)
+        return out.getvalue()
+
+    @override_settings(LLM_BACKEND='fake')
+    def test_new_versions_keep_the_old_results(self):
+        output = self.reanalyze()
+        self.assertIn('Re-analyzed 3 interviews (0 failed)', output)
+        self.assertIn('LLM: 12 calls', output)
+        for result in Result.objects.all():
+            self.assertEqual(result.version, 2)
+            self.assertNotEqual(result.final_score, 1.0)
+            self.assertEqual(result.versions.get().analysis['final_score'], 1.0)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    @override_settings(LLM_BACKEND='fake')
+    def test_interrupted_run_resumes_from_the_checkpoint(self):
+        self.reanalyze(limit=2, chunk_size=1)
+        with open(self.checkpoint) as checkpoint:
+            self.assertEqual(json.load(checkpoint)['last_interview_id'], self.interviews[1].id)
+        output = self.reanalyze()
+        self.assertIn('Re-analyzed 1 interviews', output)
+        self.assertEqual(list(Result.objects.values_list('version', flat=True).distinct()), [2])
+
+    @override_settings(LLM_BACKEND='groq')
+    def test_workers_get_the_llm_backend_with_the_job(self):
+        responses = list(self.interviews[0].responses.values('question_number', 'question', 'answer'))
+        outcome = analyze_job((self.interviews[0].id, responses), llm_backend='fake')
+        self.assertIsNone(outcome['error'])
+        self.assertEqual(outcome['llm_calls'], 4)
+
+    def test_dry_run_uses_the_fake_llm_and_writes_nothing(self):
+        output = self.reanalyze(dry_run=True)
+        self.assertIn('Re-analyzed 3 interviews (0 failed)', output)
+        self.assertIn('Dry run', output)
+        self.assertFalse(ResultVersion.objects.exists())
+        self.assertEqual(list(Result.objects.values_list('version', flat=True).distinct()), [1])
+        self.assertFalse(os.path.exists(self.checkpoint))
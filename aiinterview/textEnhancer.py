@@ -1,66 +1,242 @@
 # llm_enhancer.py
 
-import torch
-from transformers import AutoTokenizer, pipeline
-from auto_gptq import AutoGPTQForCausalLM
+import threading
+
+# Prompt templates per enhancement type; the marker ends each prompt
+PROMPTS = {
+    "professional": """Enhance the following resume to make it more professional while maintaining its factual accuracy. 
+                    Improve language, formatting, and presentation. Focus on achievements and results.
+                    
+                    RESUME:
+                    {resume_text}
+                    
+                    Enhanced professional resume:""",
+                    
+    "technical": """Enhance the following resume to highlight technical skills and achievements better.
+                Emphasize technical competencies, projects, and accomplishments. Use industry-specific terminology.
+                
+                RESUME:
+                {resume_text}
+                
+                Technically enhanced resume:""",
+                
+    "concise": """Make the following resume more concise and impactful while preserving key information.
+              Remove redundancies, consolidate bullet points, and use strong action verbs.
+              
+              RESUME:
+              {resume_text}
+              
+              Concise resume:""",
+              
+    "detailed": """Enhance the following resume with more specific details and metrics.
+               Add quantifiable achievements, specific skills, and detailed examples of experience.
+               
+               RESUME:
+               {resume_text}
+               
+               Detailed resume:"""
+}
+
+MARKERS = {
+    "professional": "Enhanced professional resume:",
+    "technical": "Technically enhanced resume:",
+    "concise": "Concise resume:",
+    "detailed": "Detailed resume:"
+}
+
+
+# Section-wise enhancement: the instruction of each type, applied to one section
+SECTION_INSTRUCTIONS = {
+    "professional": "Rewrite this resume section to be more professional while keeping every fact. "
+                    "Focus on achievements and results.",
+    "technical": "Rewrite this resume section to highlight technical skills, projects and accomplishments. "
+                 "Use industry-specific terminology.",
+    "concise": "Rewrite this resume section to be more concise and impactful. "
+               "Remove redundancies and use strong action verbs.",
+    "detailed": "Rewrite this resume section with more specific details and metrics: "
+                "quantifiable achievements, specific skills and concrete examples."
+}
+
+SECTION_PROMPT = """{instruction}
+Do not repeat the section heading.
+
+{title} SECTION:
+{text}
+
+Enhanced {name} section:"""
+
+# Headings that start a section, by section name
+SECTION_HEADINGS = {
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history"),
+    "education": ("education", "academic background", "qualifications"),
+    "skills": ("skills", "technical skills", "core competencies", "key skills"),
+    "projects": ("projects", "personal projects", "key projects", "academic projects"),
+}
+_HEADING_LOOKUP = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Output tokens per input word, by enhancement type
+TOKEN_RATIOS = {"concise": 1.0, "professional": 1.6, "technical": 1.6, "detailed": 2.5}
+
+
+def build_prompt(resume_text, enhancement_type="professional", section=None):
+    if section is None:
+        return PROMPTS.get(enhancement_type, PROMPTS["professional"]).format(resume_text=resume_text)
+    return SECTION_PROMPT.format(
+        instruction=SECTION_INSTRUCTIONS.get(enhancement_type, SECTION_INSTRUCTIONS["professional"]),
+        title=section.upper(),
+        text=resume_text,
+        name=section,
+    )
+
+
+def extract_enhanced_text(generated_text, enhancement_type="professional", section=None):
+    # Return only the enhanced resume part
+    marker = section_marker(enhancement_type, section)
+    if marker in generated_text:
+        return generated_text.split(marker)[1].strip()
+    return generated_text.strip()
+
+
+def section_marker(enhancement_type="professional", section=None):
+    if section is None:
+        return MARKERS.get(enhancement_type, MARKERS["professional"])
+    return f"Enhanced {section} section:"
+
+
+class StreamingExtractor:
+    """
+    extract_enhanced_text for streamed output. Drops an echoed prompt and a
+    leading marker as chunks arrive, holding back only as much text as could
+    still turn out to be part of one, then passes everything else through.
+    """
+
+    def __init__(self, prompt, marker):
+        self.prompt = prompt
+        self.marker = marker
+        self.buffer = ""
+        self.state = "echo"  # -> "marker" -> "lead" -> "text"
+
+    def feed(self, chunk):
+        if self.state == "text":
+            return chunk
+        self.buffer += chunk
+        if self.state == "echo":
+            if self.buffer.startswith(self.prompt):
+                # The prompt ends with the marker, so it goes with the echo
+                self.buffer = self.buffer[len(self.prompt):]
+                self.state = "lead"
+            elif self.prompt.startswith(self.buffer):
+                return ""
+            else:
+                self.state = "marker"
+        if self.state == "marker":
+            stripped = self.buffer.lstrip()
+            if len(stripped) < len(self.marker) and self.marker.startswith(stripped):
+                return ""
+            if stripped.startswith(self.marker):
+                stripped = stripped[len(self.marker):]
+            self.buffer = stripped
+            self.state = "lead"
+        text = self.buffer.lstrip()
+        if not text:
+            return ""
+        self.buffer = ""
+        self.state = "text"
+        return text
+
+    def finish(self):
+        """Whatever is still held back once the stream ends"""
+        text = "" if self.state in ("lead", "text") else self.buffer.strip()
+        self.buffer = ""
+        return text
+
+
+def _match_heading(line):
+    """(section name, text after the heading) if the line is a section heading"""
+    heading, colon, rest = line.strip().lstrip("#*- ").partition(":")
+    name = _HEADING_LOOKUP.get(heading.strip(" *").lower())
+    if name is None or (rest.strip() and not colon):
+        return None
+    return name, rest.strip()
+
+
+def split_sections(resume_text):
+    """
+    Split a resume into [(section, heading_line, body)] in order. Text before
+    the first known heading is returned with section None (name, contact
+    details) and is not enhanced. Without any known heading the whole text is a
+    single section named None as well, with heading_line None.
+    """
+    sections = []
+    heading_line, name, body = None, None, []
+    for line in resume_text.splitlines():
+        match = _match_heading(line)
+        if match is None:
+            body.append(line)
+            continue
+        if heading_line is not None or any(part.strip() for part in body):
+            sections.append((name, heading_line, "\n".join(body).strip()))
+        name, inline = match
+        heading_line = line.split(":", 1)[0] + ":" if inline else line.rstrip()
+        body = [inline] if inline else []
+    sections.append((name, heading_line, "\n".join(body).strip()))
+    return sections
+
+
+def token_budget(text, enhancement_type, min_tokens, max_tokens):
+    """
+    max_new_tokens for enhancing `text`: proportional to its length, rounded up
+    to a power of two so sections of similar size can share a batch
+    """
+    words = len(text.split())
+    wanted = max(int(words * TOKEN_RATIOS.get(enhancement_type, 1.6)), min_tokens)
+    budget = min_tokens
+    while budget < wanted:
+        budget *= 2
+    return min(budget, max_tokens)
+
+
+def stitch_sections(sections, enhanced):
+    """Rebuild the resume from split_sections() output and the enhanced bodies (None = keep)"""
+    parts = []
+    for (_, heading_line, body), new_body in zip(sections, enhanced):
+        text = body if new_body is None else new_body
+        parts.append(f"{heading_line}\n{text}".strip() if heading_line else text)
+    return "\n\n".join(part for part in parts if part)
+
 
 class ResumeEnhancerLLM:
+    """
+    Process-wide resume enhancer. The model backend comes from ENHANCER_BACKEND
+    (see enhancerBackends); it is created once and loaded on load_model(),
+    warm_up() or the first enhancement.
+    """
     _instance = None
+    _lock = threading.Lock()
     
     # Implement as singleton to avoid reloading model on each call
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(ResumeEnhancerLLM, cls).__new__(cls)
-            cls._instance._initialized = False
+        with cls._lock:
+            if cls._instance is None:
+                from .enhancerBackends import get_backend
+
+                instance = super().__new__(cls)
+                instance.backend = get_backend()
+                cls._instance = instance
         return cls._instance
-    
-    def __init__(self):
-        # Only initialize once
-        if self._initialized:
-            return
-            
-        # Model configuration - Using a GPTQ quantized model
-        self.model_name = "TheBloke/Llama-2-7B-GPTQ"  # Example GPTQ model
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Using device: {self.device}")
-        
-        self._initialized = False
-        self.tokenizer = None
-        self.model = None
-        self.pipe = None
-    
+
     def load_model(self):
         """
         Explicitly load the model (can be called separately to control when the 
         large model is loaded into memory)
         """
-        if self._initialized:
-            return
-            
-        print(f"Loading model: {self.model_name}")
-        
-        # Load the tokenizer
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        
-        # Load the GPTQ model
-        self.model = AutoGPTQForCausalLM.from_quantized(
-            self.model_name,
-            use_safetensors=True,
-            device=self.device,
-            quantize_config=None
-        )
-        
-        # Create a text generation pipeline
-        self.pipe = pipeline(
-            "text-generation",
-            model=self.model,
-            tokenizer=self.tokenizer,
-            device=self.device
-        )
-        
-        self._initialized = True
-        print("Model loaded successfully")
-    
+        self.backend.load()
+
+    def warm_up(self):
+        """Load the model and run a short generation, before serving requests"""
+        self.backend.warm_up()
+
     def enhance_resume(self, resume_text, enhancement_type="professional"):
         """
         Enhance the provided resume text based on the specified enhancement type.
@@ -76,75 +252,18 @@ class ResumeEnhancerLLM:
         Returns:
             str: The enhanced resume text
         """
-        # Make sure model is loaded
-        if not self._initialized:
-            self.load_model()
-        
-        # Create a prompt for the LLM based on enhancement type
-        prompts = {
-            "professional": f"""Enhance the following resume to make it more professional while maintaining its factual accuracy. 
-                            Improve language, formatting, and presentation. Focus on achievements and results.
-                            
-                            RESUME:
-                            {resume_text}
-                            
-                            Enhanced professional resume:""",
-                            
-            "technical": f"""Enhance the following resume to highlight technical skills and achievements better.
-                        Emphasize technical competencies, projects, and accomplishments. Use industry-specific terminology.
-                        
-                        RESUME:
-                        {resume_text}
-                        
-                        Technically enhanced resume:""",
-                        
-            "concise": f"""Make the following resume more concise and impactful while preserving key information.
-                      Remove redundancies, consolidate bullet points, and use strong action verbs.
-                      
-                      RESUME:
-                      {resume_text}
-                      
-                      Concise resume:""",
-                      
-            "detailed": f"""Enhance the following resume with more specific details and metrics.
-                       Add quantifiable achievements, specific skills, and detailed examples of experience.
-                       
-                       RESUME:
-                       {resume_text}
-                       
-                       Detailed resume:"""
-        }
-        
-        prompt = prompts.get(enhancement_type, prompts["professional"])
-        
-        print(f"Enhancing resume with type: {enhancement_type}")
-        
-        # Generate enhanced text
-        response = self.pipe(
-            prompt,
-            max_new_tokens=800,
-            temperature=0.7,
-            top_p=0.95,
-            repetition_penalty=1.15
-        )
-        
-        # Extract enhanced text from response
-        enhanced_text = response[0]["generated_text"]
-        
-        # Clean up the response to return only the enhanced resume part
-        marker_texts = {
-            "professional": "Enhanced professional resume:",
-            "technical": "Technically enhanced resume:",
-            "concise": "Concise resume:",
-            "detailed": "Detailed resume:"
-        }
-        
-        marker = marker_texts.get(enhancement_type, marker_texts["professional"])
-        if marker in enhanced_text:
-            enhanced_text = enhanced_text.split(marker)[1].strip()
-        
-        print("Resume enhancement complete")
-        return enhanced_text
+        return self.enhance_batch([(resume_text, enhancement_type)])[0]
+
+    def enhance_batch(self, items, max_new_tokens=None):
+        """
+        Enhance several (text, enhancement_type[, section]) items in one batched
+        generation call. Returns the enhanced texts in the same order.
+        """
+        return self.backend.enhance_batch(items, max_new_tokens=max_new_tokens)
+
+    def enhance_stream(self, item, max_new_tokens=None):
+        """Yield the enhanced text of one (text, enhancement_type[, section]) item as it is generated"""
+        return self.backend.enhance_stream(item, max_new_tokens=max_new_tokens)
 
 
 # Example usage:
@@ -161,28 +280,3 @@ def enhance_resume_text(text, enhancement_type="professional"):
     """
     enhancer = ResumeEnhancerLLM()
     return enhancer.enhance_resume(text, enhancement_type)
-
-
-# For testing directly
-if __name__ == "__main__":
-    # Sample resume for testing
-    sample_resume = """
-    John Doe
-    Software Developer
-    email@example.com | (123) 456-7890
-    
-    Experience:
-    Software Developer at Tech Company
-    - Developed web applications
-    - Fixed bugs
-    - Worked on user interface
-    
-    Education:
-    Bachelor in Computer Science
-    University Name, 2015-2019
-    """
-    
-    # Test the enhancer
-    enhanced = enhance_resume_text(sample_resume, "professional")
-    print("\nEnhanced Resume:")
-    print(enhanced)
\ No newline at end of file
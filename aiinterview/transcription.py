@@ -0,0 +1,260 @@
+"""
+Transcription of spoken interview answers uploaded from the browser.
+
+An answer arrives as one or more request bodies (chunks, see the answer-audio
+view). Each body is read in TRANSCRIPTION_READ_SIZE pieces and fed to a
+transcriber, which consumes them on its own thread while the rest of the
+answer is still uploading:
+
+- assemblyai: relays the audio to AssemblyAI's upload endpoint as it arrives
+  (chunked request), then waits for the transcript
+- offline: local stand-in for an on-box speech model; transcribes each
+  complete segment of the audio as soon as it has been received, without any
+  network access (development, benchmarks, tests)
+
+At most TRANSCRIPTION_BUFFER_CHUNKS pieces wait between the request and the
+backend. When the backend falls behind, feed() blocks and the upload slows
+down instead of piling up in memory.
+
+Transcribers live in the process that received an answer's first chunk, like
+the interview agents, so all chunks of one answer must reach the same process.
+"""
+import hashlib
+import logging
+import queue
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ALIASES = {
+    'assemblyai': 'aiinterview.transcription.AssemblyAITranscriber',
+    'offline': 'aiinterview.transcription.OfflineTranscriber',
+}
+
+_END = object()
+
+
+class TranscriptionError(Exception):
+    """The answer audio could not be transcribed"""
+
+
+class AudioTooLarge(TranscriptionError):
+    """The answer is longer than TRANSCRIPTION_MAX_BYTES"""
+
+
+class Transcriber:
+    """
+    One answer being uploaded and transcribed. Call feed() with the audio as it
+    arrives and finish() for the transcript; subclasses implement transcribe().
+    """
+
+    name = 'base'
+
+    def __init__(self, max_bytes=None, buffer_chunks=None, timeout=None):
+        self.max_bytes = max_bytes or settings.TRANSCRIPTION_MAX_BYTES
+        self.timeout = settings.TRANSCRIPTION_TIMEOUT if timeout is None else timeout
+        self.received = 0
+        self.next_seq = 0
+        self.last_activity = time.monotonic()
+        self._chunks = queue.Queue(maxsize=buffer_chunks or settings.TRANSCRIPTION_BUFFER_CHUNKS)
+        self._aborted = threading.Event()
+        self._outcome = {}
+        self._thread = threading.Thread(target=self._run, name=f'transcriber-{self.name}', daemon=True)
+        self._thread.start()
+
+    def feed(self, data):
+        self.last_activity = time.monotonic()
+        if self.received + len(data) > self.max_bytes:
+            self.abort()
+            raise AudioTooLarge(f"Answer audio is larger than {self.max_bytes} bytes")
+        self.received += len(data)
+        self._put(data)
+
+    def finish(self):
+        """Wait for the backend and return the transcript"""
+        self._put(_END)
+        self._thread.join(self.timeout)
+        if self._thread.is_alive():
+            self.abort()
+            raise TranscriptionError(f"Transcription did not finish within {self.timeout} seconds")
+        if 'error' in self._outcome:
+            raise TranscriptionError(str(self._outcome['error'])) from self._outcome['error']
+        return (self._outcome['text'] or '').strip()
+
+    def abort(self):
+        """Stop the backend; the audio received so far is discarded"""
+        self._aborted.set()
+
+    def _put(self, item):
+        # Blocks while the queue is full; gives up once the backend has stopped
+        while self._thread.is_alive():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def chunks(self):
+        """The audio pieces in arrival order, until the upload is finished"""
+        while True:
+            try:
+                item = self._chunks.get(timeout=0.1)
+            except queue.Empty:
+                item = None
+            if self._aborted.is_set():
+                raise TranscriptionError("Upload aborted")
+            if item is _END:
+                return
+            if item is not None:
+                yield item
+
+    def _run(self):
+        try:
+            self._outcome['text'] = self.transcribe(self.chunks())
+        except Exception as exc:
+            if not self._aborted.is_set():
+                logger.warning("%s transcription failed: %s", self.name, exc)
+            self._outcome['error'] = exc
+
+    def transcribe(self, chunks):
+        """Transcript of the audio yielded by `chunks`"""
+        raise NotImplementedError
+
+
+class AssemblyAITranscriber(Transcriber):
+    """AssemblyAI; the upload to AssemblyAI runs alongside the upload from the browser"""
+
+    name = 'assemblyai'
+
+    def transcribe(self, chunks):
+        import assemblyai as aai
+
+        aai.settings.api_key = settings.AAI_KEY
+        # An iterable body is sent with chunked encoding, one piece at a time as it arrives
+        transcript = aai.Transcriber().transcribe(chunks)
+        if transcript.status == aai.TranscriptStatus.error:
+            raise TranscriptionError(transcript.error)
+        return transcript.text
+
+
+class OfflineTranscriber(Transcriber):
+    """
+    Stand-in for a local speech model. WAV (or raw 16 kHz 16-bit mono PCM) is
+    cut into `segment_seconds` segments and each one is "transcribed" as soon
+    as it is complete: silent segments give nothing, others a few placeholder
+    words derived from the audio, after `latency` seconds per second of audio.
+    """
+
+    name = 'offline'
+    WORDS = ('I', 'worked', 'on', 'the', 'backend', 'service', 'and', 'improved', 'its', 'performance',
+             'with', 'caching', 'tests', 'team', 'users', 'data')
+    WORDS_PER_SECOND = 2.5
+
+    def __init__(self, segment_seconds=None, latency=None, **kwargs):
+        options = settings.TRANSCRIPTION_OFFLINE_OPTIONS
+        self.segment_seconds = segment_seconds or options['segment_seconds']
+        self.latency = options['latency'] if latency is None else latency
+        super().__init__(**kwargs)
+
+    def transcribe(self, chunks):
+        words = []
+        pending = b''
+        bytes_per_second = None
+        for chunk in chunks:
+            pending += chunk
+            if bytes_per_second is None:
+                header = parse_wav_header(pending)
+                if header is None:
+                    continue
+                bytes_per_second, offset = header
+                pending = pending[offset:]
+            segment_bytes = int(bytes_per_second * self.segment_seconds)
+            while len(pending) >= segment_bytes:
+                words.extend(self._segment(pending[:segment_bytes], bytes_per_second))
+                pending = pending[segment_bytes:]
+        if bytes_per_second is None:
+            bytes_per_second, offset = parse_wav_header(pending, final=True)
+            pending = pending[offset:]
+        if pending:
+            words.extend(self._segment(pending, bytes_per_second))
+        return ' '.join(words)
+
+    def _segment(self, audio, bytes_per_second):
+        seconds = len(audio) / bytes_per_second
+        if self.latency:
+            time.sleep(self.latency * seconds)
+        if not audio.strip(b'\x00'):
+            return []
+        digest = hashlib.sha1(audio).digest()
+        count = max(1, round(seconds * self.WORDS_PER_SECOND))
+        return [self.WORDS[digest[index % len(digest)] % len(self.WORDS)] for index in range(count)]
+
+
+def parse_wav_header(data, final=False):
+    """
+    (bytes per second, offset of the sample data) once the WAV header is
+    complete, None while more bytes are needed. Data that is not WAV is taken
+    to be 16 kHz 16-bit mono PCM.
+    """
+    raw_pcm = (32000, 0)
+    if len(data) < 12:
+        return raw_pcm if final or not b'RIFF'.startswith(data[:4]) else None
+    if data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return raw_pcm
+    offset, bytes_per_second = 12, None
+    while offset + 8 <= len(data):
+        chunk_id, size = data[offset:offset + 4], struct.unpack('<I', data[offset + 4:offset + 8])[0]
+        if chunk_id == b'data':
+            return (bytes_per_second or raw_pcm[0]), offset + 8
+        if chunk_id == b'fmt ' and offset + 20 <= len(data):
+            bytes_per_second = struct.unpack('<I', data[offset + 16:offset + 20])[0]  # byte rate
+        offset += 8 + size + (size & 1)
+    if final:
+        raise TranscriptionError("Incomplete WAV header")
+    return None
+
+
+def get_transcriber(path=None, **options):
+    """A new transcriber from `path` (default TRANSCRIPTION_BACKEND)"""
+    path = path or settings.TRANSCRIPTION_BACKEND
+    return import_string(BACKEND_ALIASES.get(path, path))(**options)
+
+
+_uploads = {}
+_uploads_lock = threading.Lock()
+
+
+def start_upload(key, **options):
+    """A fresh transcriber for `key` (user, interview), replacing any upload in progress"""
+    with _uploads_lock:
+        _expire_uploads()
+        previous = _uploads.pop(key, None)
+        if previous is not None:
+            previous.abort()
+        transcriber = _uploads[key] = get_transcriber(**options)
+    return transcriber
+
+
+def get_upload(key):
+    with _uploads_lock:
+        _expire_uploads()
+        return _uploads.get(key)
+
+
+def end_upload(key, transcriber):
+    with _uploads_lock:
+        if _uploads.get(key) is transcriber:
+            del _uploads[key]
+
+
+def _expire_uploads():
+    cutoff = time.monotonic() - settings.TRANSCRIPTION_SESSION_TTL
+    for key, transcriber in list(_uploads.items()):
+        if transcriber.last_activity < cutoff:
+            transcriber.abort()
+            del _uploads[key]
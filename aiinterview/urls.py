@@ -5,6 +5,9 @@ urlpatterns = [
     path('start-interview/', views.start_interview, name='start_interview'),
     path('upload-resume/', views.upload_resume, name='upload_resume'),
     path('next-question/', views.next_question, name='next_question'),
+    path('answer-audio/<int:interview_id>/', views.answer_audio, name='answer_audio'),
+    path('question-audio/<int:response_id>/', views.question_audio, name='question_audio'),
     path('interview-results/<int:interview_id>/', views.get_results, name='interview_results'),
     path('enhance-text/', views.enhance_text, name='enhance_text'),
+    path('enhance-text/stream/', views.enhance_text_stream, name='enhance_text_stream'),
 ]
@@ -2,10 +2,17 @@ from django.shortcuts import render
 from rest_framework.response import Response
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.http.request import QueryDict
-from .models import Interview, Responses, Result  # Updated import
+from .models import Interview, Responses, Result, TechnicalQuestion  # Updated import
 from .interviewAgent import ResumeInterviewAgent
-from .textEnhancer import enhance_resume_text
+from .hrInterviewAgent import HRInterviewAgent
+from .technicalInterviewAgent import TechnicalInterviewAgent, bank_position
+from .questionAudio import TTSError, open_audio as open_question_audio
+from .transcription import AudioTooLarge, TranscriptionError, end_upload, get_upload, start_upload
+from .enhancerService import EnhancerError, EnhancerTimeout, EnhancerUnavailable, enhance_blocking, open_enhance_stream
+from hirevision.tracing import span, tag
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.parsers import FileUploadParser, MultiPartParser, FormParser, JSONParser
@@ -13,6 +20,7 @@ import json
 import base64
 import tempfile
 import os
+import re
 
 def validate_resume_data(data):
     """Validate the resume data from request"""
@@ -48,6 +56,34 @@ def get_or_create_agent(request, interview_id=None):
         request.session['agent_created'] = True
     return agent
 
+def generate_question(request, interview, question_number, previous_answer=None):
+    """Question `question_number` from the agent for the interview's type"""
+    if interview.interview_type == Interview.HR:
+        # Built from the database on every turn; nothing is kept in the process
+        return HRInterviewAgent(interview).generate_question(question_number)
+    if interview.interview_type == Interview.TECHNICAL:
+        return TechnicalInterviewAgent(interview).generate_question(question_number)
+    return get_or_create_agent(request, interview.id).generate_question(previous_answer)
+
+def _interview_options(data):
+    """(interview_type, position, difficulty, error) requested in `data`; error is a 400 Response or None"""
+    interview_type = data.get('interview_type', Interview.RESUME)
+    if interview_type not in dict(Interview.TYPE_CHOICES):
+        return None, '', '', Response({
+            'error': 'Invalid interview type',
+            'details': 'interview_type must be one of: ' + ', '.join(dict(Interview.TYPE_CHOICES))
+        }, status=400)
+    position = difficulty = ''
+    if interview_type == Interview.TECHNICAL:
+        position = bank_position(data.get('position'))
+        difficulty = data.get('difficulty', TechnicalQuestion.MEDIUM)
+        if difficulty not in dict(TechnicalQuestion.DIFFICULTY_CHOICES):
+            return None, '', '', Response({
+                'error': 'Invalid difficulty',
+                'details': 'difficulty must be one of: ' + ', '.join(dict(TechnicalQuestion.DIFFICULTY_CHOICES))
+            }, status=400)
+    return interview_type, position, difficulty, None
+
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -58,9 +94,9 @@ def start_interview(request):
         try:
             # Get interview_id from request data
             interview_id = request.data.get('interview_id')
-            
-            # Initialize agent
-            agent = get_or_create_agent(request)
+            interview_type, position, difficulty, invalid = _interview_options(request.data)
+            if invalid:
+                return invalid
             
             try:
                 if interview_id:
@@ -74,6 +110,9 @@ def start_interview(request):
                     # Create new interview if no ID provided
                     interview = Interview.objects.create(
                         user=request.user,
+                        interview_type=interview_type,
+                        position=position,
+                        difficulty=difficulty,
                         candidate_name=f"{request.user.first_name} {request.user.last_name}",
                         # resume_content="resume_content",
                     )
@@ -82,10 +121,18 @@ def start_interview(request):
                     'error': 'Interview not found',
                     'details': 'Invalid interview_id'
                 }, status=404)
+            # The type of an uploaded-resume interview is chosen at upload time
+            if 'interview_type' in request.data and interview_type != interview.interview_type:
+                return Response({
+                    'error': 'Interview type mismatch',
+                    'details': f"Interview {interview.id} is a {interview.interview_type} interview; "
+                               f"pass interview_type to upload-resume to choose another"
+                }, status=400)
             
+            tag(interview_id=interview.id)
             # Generate first question
-            first_question = agent.generate_question()
-            Responses.objects.create(
+            first_question = generate_question(request, interview, 1)
+            first_response = Responses.objects.create(
                 interview=interview,
                 question=first_question,
                 question_number=1
@@ -97,8 +144,10 @@ def start_interview(request):
             return Response({
                 'status': 'success',
                 'interview_id': interview.id,
+                'interview_type': interview.interview_type,
                 'question': first_question,
-                'question_number': 1
+                'question_number': 1,
+                'question_audio': reverse('question_audio', args=[first_response.id])
             })
                 
         except Exception as e:
@@ -127,12 +176,19 @@ def upload_resume(request):
             'details': 'File must be a PDF'
         }, status=400)
         
+    interview_type, position, difficulty, invalid = _interview_options(request.data)
+    if invalid:
+        return invalid
+        
     try:
         # Store resume temporarily or permanently as needed
         # For now, we'll just return success
 
         interview = Interview.objects.create(
                 user=request.user,
+                interview_type=interview_type,
+                position=position,
+                difficulty=difficulty,
                 candidate_name=f"{request.user.first_name} {request.user.last_name}",
                 # resume_content="resume_content",  
                 resume_file=resume_file # Save the actual file
@@ -141,7 +197,8 @@ def upload_resume(request):
         return Response({
             'status': 'success',
             'message': 'Resume uploaded successfully',
-            'interview_id': interview.id
+            'interview_id': interview.id,
+            'interview_type': interview.interview_type
         })
     except Exception as e:
         return Response({
@@ -164,6 +221,7 @@ def next_question(request):
                     'details': 'interview_id and answer are required'
                 }, status=400)
             
+            tag(interview_id=interview_id)
             try:
                 interview = Interview.objects.get(id=interview_id, user=request.user)
             except Interview.DoesNotExist:
@@ -172,115 +230,7 @@ def next_question(request):
                     'details': 'Invalid interview_id or unauthorized access'
                 }, status=404)
             
-            current_question = interview.responses.last()
-            if not current_question:
-                return Response({
-                    'error': 'Invalid interview state',
-                    'details': 'No questions found for this interview'
-                }, status=400)
-            
-            # Save the current answer
-            current_question.answer = answer
-            current_question.save()
-            
-            if current_question.question_number >= 10:
-                # This is the last question - generate analysis
-                try:
-                    # Create a temporary CSV file with interview data
-                    import pandas as pd
-                    import tempfile
-                    import os
-                    
-                    responses_data = [{
-                        'question_number': r.question_number,
-                        'question': r.question,
-                        'answer': r.answer
-                    } for r in interview.responses.all()]
-                    
-                    df = pd.DataFrame(responses_data)
-                    
-                    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as tmp:
-                        df.to_csv(tmp.name, index=False)
-                        tmp_path = tmp.name
-                    
-                    # Initialize analyzer and process interview
-                    from .analyzerAgent import InterviewAnalyzer
-                    analyzer = InterviewAnalyzer(settings.GROQ_API_KEY)
-                    analyzer.load_interview_data(tmp_path)
-                    
-                    # Run all analyses
-                    analyzer.analyze_sentiment()
-                    analyzer.analyze_vocabulary()
-                    analyzer.analyze_grammar()
-                    analyzer.analyze_technical_content()
-                    
-                    # Get JSON formatted results
-                    analysis_results = analyzer.generate_analysis_json()
-                    
-                    # Create result object
-                    result = Result.objects.create(
-                        interview=interview,
-                        technical_accuracy=analysis_results['technical_accuracy'],
-                        depth_of_knowledge=analysis_results['depth_of_knowledge'],
-                        relevance_score=analysis_results['relevance_score'],
-                        grammar_score=analysis_results['grammar_score'],
-                        clarity_score=analysis_results['clarity_score'],
-                        professionalism_score=analysis_results['professionalism_score'],
-                        positive_sentiment=analysis_results['positive_sentiment'],
-                        neutral_sentiment=analysis_results['neutral_sentiment'],
-                        negative_sentiment=analysis_results['negative_sentiment'],
-                        compound_sentiment=analysis_results['compound_sentiment'],
-                        overall_technical_score=analysis_results['overall_technical_score'],
-                        overall_communication_score=analysis_results['overall_communication_score'],
-                        final_score=analysis_results['final_score'],
-                        technical_feedback=analysis_results['technical_feedback'],
-                        communication_feedback=analysis_results['communication_feedback'],
-                        strengths=analysis_results['strengths'],
-                        areas_for_improvement=analysis_results['areas_for_improvement'],
-                        vocabulary_analysis=analysis_results['vocabulary_analysis']
-                    )
-                    
-                    # Clean up temporary file
-                    os.unlink(tmp_path)
-                    
-                    # Mark interview as completed
-                    interview.completed = True
-                    interview.save()
-                    
-                    # Return result
-                    return Response({
-                        'status': 'completed',
-                        'result_id': result.id
-                        # 'analysis': analysis_results
-                    })
-                    
-                except Exception as e:
-                    print("Error in analysis:", str(e))
-                    return Response({
-                        'error': 'Failed to generate results',
-                        'details': str(e)
-                    }, status=500)
-            
-            # Not the last question, generate next question
-            agent = get_or_create_agent(request, interview_id)
-            try:
-                next_question = agent.generate_question(answer)
-                new_response = Responses.objects.create(
-                    interview=interview,
-                    question=next_question,
-                    question_number=current_question.question_number + 1
-                )
-                
-                return Response({
-                    'status': 'success',
-                    'question': next_question,
-                    'question_number': new_response.question_number
-                })
-            except Exception as e:
-                return Response({
-                    'error': 'Failed to generate next question',
-                    'details': str(e)
-                }, status=500)
+            return _answer_question(request, interview, answer)
                 
         except json.JSONDecodeError:
             return Response({
@@ -293,9 +243,208 @@ def next_question(request):
                 'details': str(e)
             }, status=500)
 
+def _answer_question(request, interview, answer):
+    """Save the answer to the current question; reply with the next question or the final result"""
+    current_question = interview.responses.last()
+    if not current_question:
+        return Response({
+            'error': 'Invalid interview state',
+            'details': 'No questions found for this interview'
+        }, status=400)
+    
+    # Save the current answer
+    current_question.answer = answer
+    current_question.save()
+    
+    if current_question.question_number >= 10:
+        # This is the last question - generate analysis
+        try:
+            from .analyzerAgent import analyze_responses
+
+            with span('analysis.prepare'):
+                responses_data = list(
+                    interview.responses.order_by('question_number').values('question_number', 'question', 'answer')
+                )
+            analysis_results = analyze_responses(responses_data, settings.GROQ_API_KEY)
+            
+            # Create result object
+            result = Result.objects.create(
+                interview=interview,
+                **{field: analysis_results[field] for field in Result.ANALYSIS_FIELDS}
+            )
+            
+            # Mark interview as completed
+            interview.completed = True
+            interview.save()
+            
+            # Return result
+            return Response({
+                'status': 'completed',
+                'result_id': result.id
+                # 'analysis': analysis_results
+            })
+            
+        except Exception as e:
+            print("Error in analysis:", str(e))
+            return Response({
+                'error': 'Failed to generate results',
+                'details': str(e)
+            }, status=500)
+    
+    # Not the last question, generate next question
+    try:
+        next_question = generate_question(request, interview, current_question.question_number + 1, answer)
+        new_response = Responses.objects.create(
+            interview=interview,
+            question=next_question,
+            question_number=current_question.question_number + 1
+        )
+        
+        return Response({
+            'status': 'success',
+            'question': next_question,
+            'question_number': new_response.question_number,
+            'question_audio': reverse('question_audio', args=[new_response.id])
+        })
+    except Exception as e:
+        return Response({
+            'error': 'Failed to generate next question',
+            'details': str(e)
+        }, status=500)
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def answer_audio(request, interview_id):
+    """
+    Upload a spoken answer as raw audio (WAV or 16 kHz 16-bit mono PCM), in one
+    request or as several chunks (?seq=0,1,2...). The chunks are transcribed
+    while the upload continues; the request with ?final=1 waits for the
+    transcript and answers the current question with it, like next_question.
+    """
+    tag(interview_id=interview_id)
+    try:
+        seq = int(request.query_params.get('seq', 0))
+    except ValueError:
+        return Response({
+            'error': 'Invalid chunk',
+            'details': 'seq must be an integer'
+        }, status=400)
+    final = request.query_params.get('final', '').lower() in ('1', 'true')
+
+    try:
+        interview = Interview.objects.get(id=interview_id, user=request.user)
+    except Interview.DoesNotExist:
+        return Response({
+            'error': 'Interview not found',
+            'details': 'Invalid interview_id or unauthorized access'
+        }, status=404)
+
+    key = (request.user.pk, interview.pk)
+    transcriber = start_upload(key) if seq == 0 else get_upload(key)
+    if transcriber is None or transcriber.next_seq != seq:
+        return Response({
+            'error': 'Unexpected chunk',
+            'details': f"Expected chunk {transcriber.next_seq if transcriber else 0} of this answer"
+        }, status=409)
+
+    try:
+        # Read the body as it arrives instead of loading it all; feed() applies backpressure
+        with span('transcription.upload'):
+            while chunk := request.read(settings.TRANSCRIPTION_READ_SIZE):
+                transcriber.feed(chunk)
+        transcriber.next_seq += 1
+        if not final:
+            return Response({
+                'status': 'receiving',
+                'seq': seq,
+                'received_bytes': transcriber.received
+            }, status=202)
+        end_upload(key, transcriber)
+        with span('transcription.finish'):
+            transcript = transcriber.finish()
+    except AudioTooLarge as e:
+        end_upload(key, transcriber)
+        return Response({
+            'error': 'Audio too large',
+            'details': str(e)
+        }, status=413)
+    except TranscriptionError as e:
+        return Response({
+            'error': 'Transcription failed',
+            'details': str(e)
+        }, status=502)
+
+    if not transcript:
+        return Response({
+            'error': 'No speech detected',
+            'details': 'The recording did not contain any speech'
+        }, status=422)
+
+    try:
+        response = _answer_question(request, interview, transcript)
+    except Exception as e:
+        return Response({
+            'error': 'Unexpected error',
+            'details': str(e)
+        }, status=500)
+    if response.status_code < 400:
+        response.data['transcript'] = transcript
+    return response
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def question_audio(request, response_id):
+    """Spoken question (synthesized once and cached); supports Range requests"""
+    try:
+        question = Responses.objects.only('question').get(id=response_id, interview__user=request.user)
+    except Responses.DoesNotExist:
+        return Response({'error': 'Question not found or unauthorized'}, status=404)
+    try:
+        with span('tts.render'):
+            audio, content_type = open_question_audio(question.question)
+    except TTSError as e:
+        return Response({
+            'error': 'Question audio unavailable',
+            'details': str(e)
+        }, status=503)
+    with audio:
+        return _ranged_file_response(request, audio, content_type)
+
+def _ranged_file_response(request, audio, content_type):
+    # Size and body come from the open handle, which survives the cache trimming the file
+    size = os.fstat(audio.fileno()).st_size
+    etag = '"%s"' % os.path.splitext(os.path.basename(audio.name))[0]  # files are named by content key
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+    else:
+        start, end = 0, size - 1
+        match = re.fullmatch(r'bytes=(\d*)-(\d*)', request.headers.get('Range', '').strip())
+        ranged = bool(match and (match.group(1) or match.group(2)))  # "bytes=-" names no range
+        if ranged:
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(size - int(match.group(2)), 0)
+            if start > end:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+        audio.seek(start)
+        body = audio.read(end - start + 1)
+        response = HttpResponse(body, content_type=content_type, status=206 if ranged else 200)
+        if ranged:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_results(request, interview_id):
+    tag(interview_id=interview_id)
     try:
         interview = Interview.objects.get(id=interview_id, user=request.user)
         result = interview.result
@@ -321,6 +470,7 @@ def get_results(request, interview_id):
                 'compound': result.compound_sentiment * 10
             },
             'final_score': result.final_score * 10,
+            'analysis_version': result.version,
             'feedback': {
                 'technical_feedback': result.technical_feedback,
                 'communication_feedback': result.communication_feedback,
@@ -347,28 +497,81 @@ def enhance_text(request):
             text = request.data.get('text')
             enhancement_type = request.data.get('enhancement_type', 'professional')
             
-            if not text:
-                return Response({
-                    'error': 'Missing text',
-                    'details': 'Text to enhance is required'
-                }, status=400)
-                
-            if enhancement_type not in ['professional', 'technical', 'concise', 'detailed']:
-                return Response({
-                    'error': 'Invalid enhancement type',
-                    'details': 'Enhancement type must be one of: professional, technical, concise, detailed'
-                }, status=400)
+            invalid = _invalid_enhance_request(text, enhancement_type)
+            if invalid:
+                return invalid
             
-            # Enhance the text using the textEnhancer
-            enhanced_text = enhance_resume_text(text, enhancement_type)
+            # The model runs in the enhancer service (manage.py run_enhancer);
+            # this worker thread blocks until the enhanced text comes back
+            enhanced_text = enhance_blocking(text, enhancement_type)
             
             return Response({
                 'status': 'success',
                 'enhanced_text': enhanced_text
             })
             
+        except EnhancerUnavailable as e:
+            return Response({
+                'error': 'Enhancement service unavailable',
+                'details': str(e)
+            }, status=503)
+        except EnhancerTimeout as e:
+            return Response({
+                'error': 'Enhancement timed out',
+                'details': str(e)
+            }, status=504)
         except Exception as e:
             return Response({
                 'error': 'Enhancement failed',
                 'details': str(e)
             }, status=500)
+
+def _invalid_enhance_request(text, enhancement_type):
+    if not text:
+        return Response({
+            'error': 'Missing text',
+            'details': 'Text to enhance is required'
+        }, status=400)
+        
+    if enhancement_type not in ['professional', 'technical', 'concise', 'detailed']:
+        return Response({
+            'error': 'Invalid enhancement type',
+            'details': 'Enhancement type must be one of: professional, technical, concise, detailed'
+        }, status=400)
+    return None
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([JSONParser])
+def enhance_text_stream(request):
+    """Stream the enhanced text as server-sent events while it is generated"""
+    text = request.data.get('text')
+    enhancement_type = request.data.get('enhancement_type', 'professional')
+    invalid = _invalid_enhance_request(text, enhancement_type)
+    if invalid:
+        return invalid
+
+    try:
+        # Connects before the response starts, so a missing service is still a plain 503
+        pieces = open_enhance_stream(text, enhancement_type)
+    except EnhancerUnavailable as e:
+        return Response({
+            'error': 'Enhancement service unavailable',
+            'details': str(e)
+        }, status=503)
+
+    response = StreamingHttpResponse(_sse_events(pieces), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx would otherwise hold the events back
+    return response
+
+def _sse_events(pieces):
+    try:
+        for piece in pieces:
+            yield f"data: {json.dumps({'delta': piece})}\n\n"
+    except EnhancerError as e:
+        # Headers are already sent; the failure is reported in-band
+        yield f"event: error\ndata: {json.dumps({'error': 'Enhancement failed', 'details': str(e)})}\n\n"
+        return
+    yield "event: done\ndata: {}\n\n"
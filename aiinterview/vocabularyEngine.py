@@ -0,0 +1,129 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import spacy
+from django.conf import settings
+
+# Vocabulary analysis only needs tokens, POS tags and entities
+DISABLED_COMPONENTS = ['parser', 'lemmatizer']
+
+
+def load_vocabulary_model(model_name: Optional[str] = None):
+    """Load the spaCy pipeline with the components we don't use disabled"""
+    model_name = model_name or settings.SPACY_MODEL
+    try:
+        return spacy.load(model_name, disable=DISABLED_COMPONENTS)
+    except OSError:
+        # If model isn't installed, download it
+        import subprocess
+        subprocess.run(["python", "-m", "spacy", "download", model_name])
+        return spacy.load(model_name, disable=DISABLED_COMPONENTS)
+
+
+class VocabularyEngine:
+    """Computes word frequency, POS distribution and entities for interview answers"""
+
+    def __init__(self, nlp=None, batch_size: Optional[int] = None):
+        self._nlp = nlp
+        self.batch_size = batch_size or settings.VOCABULARY_BATCH_SIZE
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            self._nlp = load_vocabulary_model()
+        return self._nlp
+
+    def analyze(self, answers: Iterable[str]) -> Dict:
+        """Analyze the answers of a single interview"""
+        return self.analyze_many([answers])[0]
+
+    def analyze_many(self, interviews: List[Iterable[str]]) -> List[Dict]:
+        """
+        Analyze several interviews in one nlp.pipe stream. Each answer is tagged
+        with its interview index so results can be aggregated per interview.
+        """
+        word_freqs = [Counter() for _ in interviews]
+        pos_dists = [Counter() for _ in interviews]
+        entities = [[] for _ in interviews]
+
+        texts = (
+            (answer, index)
+            for index, answers in enumerate(interviews)
+            for answer in answers
+            if isinstance(answer, str) and answer.strip()
+        )
+        for doc, index in self.nlp.pipe(texts, as_tuples=True, batch_size=self.batch_size):
+            word_freq = word_freqs[index]
+            pos_dist = pos_dists[index]
+            # Single pass over the tokens for both frequency and POS
+            for token in doc:
+                if not token.is_alpha:
+                    continue
+                pos_dist[token.pos_] += 1
+                if not token.is_stop:
+                    word_freq[token.lower_] += 1
+            entities[index].extend({'text': ent.text, 'type': ent.label_} for ent in doc.ents)
+
+        return [
+            {
+                'word_frequency': dict(word_freqs[i].most_common(30)),
+                'pos_distribution': dict(pos_dists[i]),
+                'entities': entities[i],
+            }
+            for i in range(len(interviews))
+        ]
+
+
+_engine = None
+
+
+def get_vocabulary_engine() -> VocabularyEngine:
+    """Process-wide engine so the spaCy model is loaded once per worker"""
+    global _engine
+    if _engine is None:
+        _engine = VocabularyEngine()
+    return _engine
+
+
+def _load_worker_engine():
+    # Pool initializer: load the model once when the worker starts, not on its first chunk
+    get_vocabulary_engine().nlp
+
+
+def _analyze_chunk(interviews: List[List[str]]) -> List[Dict]:
+    # Runs inside a pool worker; the engine (and model) is reused across chunks
+    return get_vocabulary_engine().analyze_many(interviews)
+
+
+def vocabulary_pool(workers: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool whose workers load the spaCy model at start-up, or None when
+    analysis runs in this process. Reuse it across analyze_vocabulary_parallel
+    calls so the model is loaded once per worker, and shut it down when done.
+    """
+    workers = settings.VOCABULARY_WORKERS if workers is None else workers
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, initializer=_load_worker_engine)
+
+
+def analyze_vocabulary_parallel(interviews: List[List[str]], workers: Optional[int] = None,
+                                chunk_size: int = 50,
+                                executor: Optional[ProcessPoolExecutor] = None) -> List[Dict]:
+    """
+    Analyze many interviews, spreading chunks across a process pool when there
+    is enough work to pay for the model load in each worker. Pass an executor
+    from vocabulary_pool() to reuse its workers; otherwise a pool is started
+    for this call.
+    """
+    workers = settings.VOCABULARY_WORKERS if workers is None else workers
+    if (executor is None and workers <= 1) or len(interviews) <= chunk_size:
+        return get_vocabulary_engine().analyze_many(interviews)
+
+    chunks = [interviews[i:i + chunk_size] for i in range(0, len(interviews), chunk_size)]
+    if executor is not None:
+        return [analysis for chunk_result in executor.map(_analyze_chunk, chunks) for analysis in chunk_result]
+
+    with vocabulary_pool(workers) as executor:
+        return [analysis for chunk_result in executor.map(_analyze_chunk, chunks) for analysis in chunk_result]
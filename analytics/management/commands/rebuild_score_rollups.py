@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from analytics.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the score rollups from every Result and completed Exam (backfill or repair)"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = rebuild()
+        self.stdout.write(f"Rebuilt {rows} rollup buckets")
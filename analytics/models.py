@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class ScoreBucket(models.Model):
+    """Running count, sum and sum of squares of one histogram bucket of a metric, per day and category"""
+    metric = models.CharField(max_length=50)
+    category = models.CharField(max_length=100)
+    day = models.DateField()
+    bucket = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+    total = models.FloatField(default=0.0)
+    total_squares = models.FloatField(default=0.0)
+
+    class Meta:
+        unique_together = [('metric', 'day', 'category', 'bucket')]
@@ -0,0 +1,176 @@
+"""
+Incrementally maintained score rollups.
+
+Every interview Result and completed aptitude Exam adds its scores to
+ScoreBucket rows keyed by (metric, day, category, histogram bucket). Each row
+keeps count, sum and sum of squares, so means, standard deviations and
+histogram-interpolated percentiles for any date range or category are computed
+from a few hundred rows instead of scanning Result and Exam.
+"""
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import ScoreBucket
+
+
+@dataclass(frozen=True)
+class MetricSpec:
+    source: str  # 'interview' or 'exam'
+    field: str
+    low: float
+    high: float
+    buckets: int
+
+    @property
+    def width(self):
+        return (self.high - self.low) / self.buckets
+
+    def bucket_for(self, value):
+        index = int((value - self.low) // self.width)
+        return min(max(index, 0), self.buckets - 1)
+
+    def bucket_bounds(self, index):
+        low = self.low + index * self.width
+        return low, low + self.width
+
+
+# Result scores are stored on a 0-10 scale; exams score one point per correct answer
+METRICS = {
+    'final_score': MetricSpec('interview', 'final_score', 0, 10, 20),
+    'technical_score': MetricSpec('interview', 'overall_technical_score', 0, 10, 20),
+    'communication_score': MetricSpec('interview', 'overall_communication_score', 0, 10, 20),
+    'exam_score': MetricSpec('exam', 'score', 0, 16, 16),
+}
+
+PERCENTILES = (10, 25, 50, 75, 90, 95)
+
+
+def to_day(value):
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def metric_values(source, instance):
+    """{metric: value} for a Result ('interview') or Exam ('exam')"""
+    return {
+        name: float(getattr(instance, spec.field))
+        for name, spec in METRICS.items()
+        if spec.source == source and getattr(instance, spec.field) is not None
+    }
+
+
+def apply(values, day, category, sign=1):
+    """Add (sign=1) or remove (sign=-1) one observation per metric"""
+    for metric, value in values.items():
+        bucket = METRICS[metric].bucket_for(value)
+        key = {'metric': metric, 'day': day, 'category': category, 'bucket': bucket}
+        if sign > 0:
+            ScoreBucket.objects.get_or_create(**key)
+        ScoreBucket.objects.filter(**key).update(
+            count=F('count') + sign,
+            total=F('total') + sign * value,
+            total_squares=F('total_squares') + sign * value * value,
+        )
+
+
+def summarize(metric, start=None, end=None, category=None, group_by=None):
+    """
+    Count, mean, standard deviation, percentiles and histogram of a metric,
+    overall or grouped by 'day' or 'category'.
+    """
+    spec = METRICS[metric]
+    rows = ScoreBucket.objects.filter(metric=metric, count__gt=0)
+    if start:
+        rows = rows.filter(day__gte=start)
+    if end:
+        rows = rows.filter(day__lte=end)
+    if category:
+        rows = rows.filter(category=category)
+
+    group_fields = [group_by] if group_by else []
+    totals = defaultdict(lambda: {'count': 0, 'total': 0.0, 'total_squares': 0.0, 'histogram': [0] * spec.buckets})
+    aggregated = (
+        rows.values(*group_fields, 'bucket')
+        .annotate(count_sum=Sum('count'), total_sum=Sum('total'), squares_sum=Sum('total_squares'))
+        .order_by()
+    )
+    for row in aggregated:
+        group = totals[row[group_by] if group_by else None]
+        group['count'] += row['count_sum']
+        group['total'] += row['total_sum']
+        group['total_squares'] += row['squares_sum']
+        group['histogram'][row['bucket']] += row['count_sum']
+
+    return [
+        {**({group_by: key} if group_by else {}), **_describe(spec, values)}
+        for key, values in sorted(totals.items(), key=lambda item: str(item[0]))
+    ]
+
+
+def _describe(spec, values):
+    count = values['count']
+    mean = values['total'] / count
+    variance = max(values['total_squares'] / count - mean * mean, 0.0)
+    return {
+        'count': count,
+        'mean': round(mean, 4),
+        'stddev': round(math.sqrt(variance), 4),
+        'percentiles': {f'p{p}': round(_percentile(spec, values['histogram'], count, p), 4) for p in PERCENTILES},
+        'histogram': [
+            {'low': low, 'high': high, 'count': bucket_count}
+            for (low, high), bucket_count in (
+                (spec.bucket_bounds(index), bucket_count) for index, bucket_count in enumerate(values['histogram'])
+            )
+        ],
+    }
+
+
+def _percentile(spec, histogram, count, percentile):
+    # Linear interpolation inside the bucket that holds the target rank
+    target = percentile / 100 * count
+    seen = 0
+    for index, bucket_count in enumerate(histogram):
+        if bucket_count and seen + bucket_count >= target:
+            low, high = spec.bucket_bounds(index)
+            return low + (target - seen) / bucket_count * (high - low)
+        seen += bucket_count
+    return spec.high
+
+
+def rebuild():
+    """Recompute every rollup from Result and Exam (for backfills and repairs)"""
+    from aiinterview.models import Result
+    from aptitude.models import Exam
+
+    accumulated = defaultdict(lambda: [0, 0.0, 0.0])
+
+    def add(values, day, category):
+        for metric, value in values.items():
+            entry = accumulated[(metric, day, category, METRICS[metric].bucket_for(value))]
+            entry[0] += 1
+            entry[1] += value
+            entry[2] += value * value
+
+    results = Result.objects.select_related('interview').only(
+        *{spec.field for spec in METRICS.values() if spec.source == 'interview'},
+        'created_at', 'interview__interview_type',
+    )
+    for result in results.iterator(chunk_size=2000):
+        # Interview results are categorized by interview type (resume, hr, technical)
+        add(metric_values('interview', result), to_day(result.created_at), result.interview.interview_type)
+    for exam in Exam.objects.filter(completed=True).only('score', 'category', 'start_time').iterator(chunk_size=2000):
+        add(metric_values('exam', exam), to_day(exam.start_time), exam.category)
+
+    ScoreBucket.objects.all().delete()
+    ScoreBucket.objects.bulk_create(
+        [
+            ScoreBucket(metric=metric, day=day, category=category, bucket=bucket,
+                        count=count, total=total, total_squares=squares)
+            for (metric, day, category, bucket), (count, total, squares) in accumulated.items()
+        ],
+        batch_size=1000,
+    )
+    return len(accumulated)
@@ -0,0 +1,84 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from aiinterview.models import Result
+from aptitude.models import Exam
+
+from .rollups import METRICS, apply, metric_values, to_day
+
+_NOT_LOADED = object()
+
+RESULT_FIELDS = [spec.field for spec in METRICS.values() if spec.source == 'interview'] + ['created_at']
+EXAM_FIELDS = ['score', 'completed', 'category', 'start_time']
+
+
+def _interview_type(result):
+    # Only an interview already attached to the result (assigned or select_related) is read
+    interview = result._state.fields_cache.get('interview')
+    if interview is None or 'interview_type' not in interview.__dict__:
+        return _NOT_LOADED
+    return interview.interview_type
+
+
+def _snapshot(instance):
+    """(values, day, category) this instance contributes to the rollups, None, or _NOT_LOADED"""
+    # Raw __dict__ reads so deferred fields (.only()/.defer()) don't trigger queries
+    if isinstance(instance, Result):
+        category = _interview_type(instance)
+        if category is _NOT_LOADED or any(name not in instance.__dict__ for name in RESULT_FIELDS):
+            return _NOT_LOADED
+        if instance.created_at is None:
+            return None
+        return metric_values('interview', instance), to_day(instance.created_at), category
+    if any(name not in instance.__dict__ for name in EXAM_FIELDS):
+        return _NOT_LOADED
+    if not instance.completed or instance.start_time is None:
+        return None
+    return metric_values('exam', instance), to_day(instance.start_time), instance.category
+
+
+def _stored_snapshot(sender, pk):
+    rows = sender.objects.filter(pk=pk)
+    if sender is Result:
+        rows = rows.select_related('interview')
+    stored = rows.first()
+    return _snapshot(stored) if stored is not None else None
+
+
+@receiver(post_init, sender=Result)
+@receiver(post_init, sender=Exam)
+def remember_rollup_snapshot(sender, instance, **kwargs):
+    # Remembering the contribution here avoids a query on save to find the old values
+    instance._rollup_snapshot = _snapshot(instance) if instance.pk is not None else None
+
+
+@receiver(pre_save, sender=Result)
+@receiver(pre_save, sender=Exam)
+@receiver(pre_delete, sender=Result)
+@receiver(pre_delete, sender=Exam)
+def load_deferred_snapshot(sender, instance, **kwargs):
+    if instance._rollup_snapshot is _NOT_LOADED:
+        instance._rollup_snapshot = _stored_snapshot(sender, instance.pk)
+
+
+@receiver(post_save, sender=Result)
+@receiver(post_save, sender=Exam)
+def update_rollups(sender, instance, **kwargs):
+    previous = instance._rollup_snapshot
+    current = _snapshot(instance)
+    if current is _NOT_LOADED:
+        current = _stored_snapshot(sender, instance.pk)
+    if current != previous:
+        if previous:
+            apply(*previous, sign=-1)
+        if current:
+            apply(*current)
+    instance._rollup_snapshot = current
+
+
+@receiver(post_delete, sender=Result)
+@receiver(post_delete, sender=Exam)
+def remove_from_rollups(sender, instance, **kwargs):
+    if instance._rollup_snapshot:
+        apply(*instance._rollup_snapshot, sign=-1)
+    instance._rollup_snapshot = None
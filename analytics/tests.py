@@ -0,0 +1,94 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from aiinterview.models import Interview, Result
+from aptitude.models import Exam
+
+from .models import ScoreBucket
+from .rollups import rebuild, summarize
+
+
+class ScoreRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='candidate', email='c@example.com', password='pass12345')
+
+    def _result(self, final, technical=5.0, communication=5.0, interview_type=Interview.RESUME):
+        interview = Interview.objects.create(user=self.user, candidate_name='C', resume_content='cv',
+                                             interview_type=interview_type)
+        return Result.objects.create(interview=interview, final_score=final, overall_technical_score=technical,
+                                     overall_communication_score=communication)
+
+    def test_results_maintain_rollups(self):
+        results = [self._result(score) for score in (2.0, 4.0, 6.0, 8.0)]
+        summary = summarize('final_score')[0]
+        self.assertEqual(summary['count'], 4)
+        self.assertAlmostEqual(summary['mean'], 5.0)
+        self.assertAlmostEqual(summary['stddev'], 5 ** 0.5, places=3)
+        self.assertTrue(4.0 <= summary['percentiles']['p50'] <= 6.0)
+
+        results[0].final_score = 10.0
+        results[0].save()
+        results[1].delete()
+        summary = summarize('final_score')[0]
+        self.assertEqual(summary['count'], 3)
+        self.assertAlmostEqual(summary['mean'], 8.0)
+
+        # Saving an instance loaded with deferred fields reads the old values once
+        deferred = Result.objects.only('id').get(pk=results[2].pk)
+        deferred.final_score = 0.0
+        deferred.save()
+        self.assertAlmostEqual(summarize('final_score')[0]['mean'], 6.0)
+
+    def test_results_are_grouped_by_interview_type(self):
+        self._result(4.0)
+        hr = self._result(6.0, interview_type=Interview.HR)
+        self._result(8.0, interview_type=Interview.TECHNICAL)
+        groups = summarize('final_score', group_by='category')
+        self.assertEqual([(g['category'], g['count'], g['mean']) for g in groups],
+                         [('hr', 1, 6.0), ('resume', 1, 4.0), ('technical', 1, 8.0)])
+
+        # A result loaded without its interview finds the category with the stored values
+        loaded = Result.objects.get(pk=hr.pk)
+        loaded.final_score = 2.0
+        loaded.save()
+        self.assertEqual(summarize('final_score', category='hr')[0]['mean'], 2.0)
+        self.assertEqual(summarize('final_score', category='resume')[0]['mean'], 4.0)
+
+        incremental = summarize('final_score', group_by='category')
+        rebuild()
+        self.assertEqual(summarize('final_score', group_by='category'), incremental)
+
+    def test_only_completed_exams_count(self):
+        exam = Exam.objects.create(user=self.user, category='Probability')
+        self.assertFalse(ScoreBucket.objects.filter(metric='exam_score').exists())
+        exam.score = 12
+        exam.completed = True
+        exam.save()
+        Exam.objects.create(user=self.user, category='Random', score=3, completed=True)
+        groups = summarize('exam_score', group_by='category')
+        self.assertEqual([(g['category'], g['count'], g['mean']) for g in groups],
+                         [('Probability', 1, 12.0), ('Random', 1, 3.0)])
+
+    def test_rebuild_matches_incremental(self):
+        for score in (1.0, 3.5, 9.9):
+            self._result(score, technical=score / 2)
+        Exam.objects.create(user=self.user, score=7, completed=True)
+        incremental = {metric: summarize(metric) for metric in ('final_score', 'technical_score', 'exam_score')}
+        rebuild()
+        self.assertEqual(incremental, {metric: summarize(metric) for metric in incremental})
+
+    def test_endpoint_requires_staff(self):
+        self._result(7.0)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get(reverse('score_distribution')).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = client.get(reverse('score_distribution'), {'metric': 'final_score', 'group_by': 'day'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['groups'][0]['count'], 1)
+        self.assertEqual(client.get(reverse('score_distribution'), {'metric': 'nope'}).status_code, 400)
+        self.assertEqual(client.get(reverse('score_distribution'), {'start': '2024-02-30'}).status_code, 400)
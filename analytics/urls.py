@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('scores/', views.score_distribution, name='score_distribution'),
+]
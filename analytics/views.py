@@ -0,0 +1,52 @@
+from django.utils.dateparse import parse_date
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .rollups import METRICS, summarize
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def score_distribution(request):
+    """Count, mean, stddev, percentiles and histogram of a score across candidates, from the rollups"""
+    metric = request.query_params.get('metric', 'final_score')
+    if metric not in METRICS:
+        return Response({
+            'error': 'Unknown metric',
+            'details': f"metric must be one of {', '.join(METRICS)}"
+        }, status=400)
+
+    group_by = request.query_params.get('group_by') or None
+    if group_by not in (None, 'day', 'category'):
+        return Response({
+            'error': 'Invalid group_by',
+            'details': 'group_by must be "day" or "category"'
+        }, status=400)
+
+    dates = {}
+    for name in ('start', 'end'):
+        value = request.query_params.get(name)
+        if value:
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:  # well formed but impossible, e.g. 2024-02-30
+                dates[name] = None
+            if dates[name] is None:
+                return Response({
+                    'error': f'Invalid {name}',
+                    'details': 'Dates must be YYYY-MM-DD'
+                }, status=400)
+
+    groups = summarize(
+        metric,
+        start=dates.get('start'),
+        end=dates.get('end'),
+        category=request.query_params.get('category'),
+        group_by=group_by,
+    )
+    return Response({
+        'metric': metric,
+        'group_by': group_by,
+        'groups': groups,
+    })
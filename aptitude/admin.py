@@ -1,6 +1,9 @@
 from django.contrib import admin
-from .models import QuestionHistory, Exam
+from .models import QuestionHistory, Exam, QuestionStat, CategoryStat, SeenQuestions
 # Register your models here.
 
 admin.site.register(QuestionHistory)
-admin.site.register(Exam)
\ No newline at end of file
+admin.site.register(Exam)
+admin.site.register(QuestionStat)
+admin.site.register(CategoryStat)
+admin.site.register(SeenQuestions)
@@ -0,0 +1,100 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from aptitude.models import Exam, QuestionHistory, QuestionStat
+from aptitude.sampling import clear_tables, sample_pool
+from aptitude.seen import load_seen, mark_seen
+from aptitude.stats import question_hash
+
+CATEGORY = 'Bench'
+QUESTIONS_PER_EXAM = 15
+
+
+def legacy_select(user, candidates, rng):
+    # Load every hash the user has been served, then filter the candidates
+    seen = set(QuestionHistory.objects.filter(user=user).values_list('question_hash', flat=True))
+    unseen = [stat for stat in candidates if stat.question_hash not in seen]
+    return rng.sample(unseen, min(QUESTIONS_PER_EXAM, len(unseen)))
+
+
+def indexed_select(user, candidates, rng):
+    seen = load_seen(user)
+    return sample_pool(CATEGORY, QUESTIONS_PER_EXAM, seen=seen, rng=rng)
+
+
+class Command(BaseCommand):
+    help = "Benchmark excluding already-seen questions for users with long aptitude histories"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pool', type=int, default=20000, help='Questions in the local pool')
+        parser.add_argument('--history', type=int, default=10000, help='Questions served to each user')
+        parser.add_argument('--users', type=int, default=3)
+        parser.add_argument('--starts', type=int, default=20, help='Exam starts timed per user and path')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            rng = random.Random(options['seed'])
+            users = self._populate(options, rng)
+            candidates = list(QuestionStat.objects.filter(category=CATEGORY))
+            self.stdout.write(f"{'path':<8} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'repeats':>8}")
+            for name, select in (('legacy', legacy_select), ('indexed', indexed_select)):
+                self._report(name, select, users, candidates, options, rng)
+            sizes = [len(user.seen_questions.bitmap) for user in User.objects.select_related('seen_questions')]
+            self.stdout.write(f"seen index size: {statistics.mean(sizes) / 1024:.1f} KB per user "
+                              f"({options['history']} seen of {options['pool']})")
+        finally:
+            clear_tables()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _populate(self, options, rng):
+        QuestionStat.objects.bulk_create(
+            [QuestionStat(question_hash=question_hash(f'bench question {number}'), category=CATEGORY,
+                          question=f'bench question {number}', options=['a', 'b'], correct_answer='a',
+                          explanation='') for number in range(options['pool'])],
+            batch_size=2000,
+        )
+        stats = list(QuestionStat.objects.filter(category=CATEGORY))
+        users = []
+        for number in range(options['users']):
+            user = User.objects.create_user(username=f'seen{number}', email=f'seen{number}@example.com')
+            served = rng.sample(stats, min(options['history'], len(stats)))
+            exams = Exam.objects.bulk_create([
+                Exam(user=user, category=CATEGORY, completed=True)
+                for _ in range(0, len(served), QUESTIONS_PER_EXAM)
+            ])
+            QuestionHistory.objects.bulk_create(
+                [QuestionHistory(user=user, exam=exams[index // QUESTIONS_PER_EXAM], question=stat.question,
+                                 question_hash=stat.question_hash, options=stat.options,
+                                 correct_answer=stat.correct_answer, explanation='')
+                 for index, stat in enumerate(served)],
+                batch_size=2000,
+            )
+            mark_seen(user, ())  # builds the index, as the first exam start after the migration would
+            users.append(user)
+        return users
+
+    def _report(self, name, select, users, candidates, options, rng):
+        timings, queries, repeats = [], [], 0
+        for user in users:
+            served = set(QuestionHistory.objects.filter(user=user).values_list('question_hash', flat=True))
+            for _ in range(options['starts']):
+                reset_queries()
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    picked = select(user, candidates, rng)
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries.append(len(captured))
+                repeats += sum(stat.question_hash in served for stat in picked)
+        p50, p95 = statistics.quantiles(timings, n=100)[49], statistics.quantiles(timings, n=100)[94]
+        self.stdout.write(f"{name:<8} {p50:>9.2f} {p95:>9.2f} {statistics.mean(queries):>8.1f} {repeats:>8}")
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptitude', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='category',
+            field=models.CharField(default='Random', max_length=100),
+        ),
+    ]
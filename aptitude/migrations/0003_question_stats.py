@@ -0,0 +1,75 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:02
+
+import hashlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_question_hashes(apps, schema_editor):
+    # Same normalization as aptitude.stats.question_hash
+    QuestionHistory = apps.get_model('aptitude', 'QuestionHistory')
+    batch = []
+    for entry in QuestionHistory.objects.only('id', 'question').iterator(chunk_size=2000):
+        normalized = ' '.join(entry.question.lower().split())
+        entry.question_hash = hashlib.sha1(normalized.encode()).hexdigest()
+        batch.append(entry)
+        if len(batch) >= 2000:
+            QuestionHistory.objects.bulk_update(batch, ['question_hash'])
+            batch = []
+    QuestionHistory.objects.bulk_update(batch, ['question_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptitude', '0002_exam_category'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_hash', models.CharField(max_length=40, unique=True)),
+                ('category', models.CharField(db_index=True, max_length=100)),
+                ('question', models.TextField()),
+                ('options', models.JSONField()),
+                ('correct_answer', models.CharField(max_length=255)),
+                ('explanation', models.TextField()),
+                ('times_served', models.IntegerField(default=0)),
+                ('times_correct', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='questionhistory',
+            name='is_correct',
+            field=models.BooleanField(null=True),
+        ),
+        migrations.AddField(
+            model_name='questionhistory',
+            name='question_hash',
+            field=models.CharField(db_index=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='questionhistory',
+            name='user_answer',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.CreateModel(
+            name='CategoryStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100)),
+                ('times_served', models.IntegerField(default=0)),
+                ('times_correct', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'category'), name='unique_user_category_stat'), models.UniqueConstraint(condition=models.Q(('user', None)), fields=('category',), name='unique_global_category_stat')],
+            },
+        ),
+        migrations.RunPython(backfill_question_hashes, migrations.RunPython.noop),
+    ]
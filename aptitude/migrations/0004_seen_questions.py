@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def add_history_to_pool(apps, schema_editor):
+    # Questions served before the pool existed must be in it for the seen index to cover them
+    QuestionHistory = apps.get_model('aptitude', 'QuestionHistory')
+    QuestionStat = apps.get_model('aptitude', 'QuestionStat')
+    batch = []
+    entries = QuestionHistory.objects.select_related('exam').order_by('id')
+    for entry in entries.iterator(chunk_size=2000):
+        batch.append(QuestionStat(
+            question_hash=entry.question_hash,
+            category=entry.exam.category,
+            question=entry.question,
+            options=entry.options,
+            correct_answer=entry.correct_answer,
+            explanation=entry.explanation,
+        ))
+        if len(batch) >= 2000:
+            QuestionStat.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    QuestionStat.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptitude', '0003_question_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeenQuestions',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='seen_questions', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('bitmap', models.BinaryField(default=b'')),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(add_history_to_pool, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,7 @@ import uuid
 class Exam(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.CharField(max_length=100, default='Random')
     start_time = models.DateTimeField(auto_now_add=True)
     completed = models.BooleanField(default=False)
     score = models.IntegerField(default=0)
@@ -15,11 +16,46 @@ class Exam(models.Model):
 class QuestionHistory(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     question = models.TextField()
+    question_hash = models.CharField(max_length=40, db_index=True, default='')
     options = models.JSONField()
     correct_answer = models.CharField(max_length=255)
     explanation = models.TextField()
+    user_answer = models.CharField(max_length=255, null=True, blank=True)
+    is_correct = models.BooleanField(null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='questions')
 
     class Meta:
         ordering = ['-created_at']
+
+class QuestionStat(models.Model):
+    """A question that has been served, with how often it was answered correctly"""
+    question_hash = models.CharField(max_length=40, unique=True)
+    category = models.CharField(max_length=100, db_index=True)
+    question = models.TextField()
+    options = models.JSONField()
+    correct_answer = models.CharField(max_length=255)
+    explanation = models.TextField()
+    times_served = models.IntegerField(default=0)
+    times_correct = models.IntegerField(default=0)
+
+class CategoryStat(models.Model):
+    """Served/correct totals per category, optionally for a single user (user=None is everyone)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    category = models.CharField(max_length=100)
+    times_served = models.IntegerField(default=0)
+    times_correct = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category'], name='unique_user_category_stat'),
+            models.UniqueConstraint(fields=['category'], condition=models.Q(user=None),
+                                    name='unique_global_category_stat'),
+        ]
+
+class SeenQuestions(models.Model):
+    """Bitmap of the QuestionStat ids a user has been served (zlib-compressed)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='seen_questions')
+    bitmap = models.BinaryField(default=b'')
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
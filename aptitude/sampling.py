@@ -0,0 +1,199 @@
+"""
+Adaptive question sampling.
+
+A question's difficulty is estimated from how often it was answered correctly,
+smoothed towards its category's overall rate so new questions start at the
+average. A user's level is their own smoothed rate in the category, rounded to
+one of APTITUDE_SKILL_BANDS bands. Questions whose expected success rate is
+close to (slightly below) the user's level get the most weight.
+
+For each (category, band) the weights are turned into an alias table (Vose's
+method) once and kept for APTITUDE_SAMPLER_TTL seconds, so an exam start
+draws each question in O(1) instead of re-reading and re-weighting the pool.
+"""
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Sum
+
+from .models import CategoryStat, QuestionStat
+
+RANDOM_CATEGORY = 'Random'  # draws from every category
+PRIOR_WEIGHT = 5  # answers a question needs before its own rate outweighs the category's
+TARGET_OFFSET = 0.1  # aim slightly above the user's comfort level
+TARGET_SPREAD = 0.15
+MIN_WEIGHT = 0.02  # every question stays reachable
+
+
+class AliasTable:
+    """Walker/Vose alias table: O(n) to build, O(1) per weighted draw"""
+
+    __slots__ = ('items', 'probability', 'alias')
+
+    def __init__(self, items, weights):
+        count = len(items)
+        total = float(sum(weights))
+        scaled = [weight * count / total for weight in weights]
+        self.items = list(items)
+        self.probability = [1.0] * count
+        self.alias = list(range(count))
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Leftovers are 1.0 up to rounding error
+
+    def __len__(self):
+        return len(self.items)
+
+    def draw(self, rng=random):
+        index = int(rng.random() * len(self.items))
+        if rng.random() < self.probability[index]:
+            return self.items[index]
+        return self.items[self.alias[index]]
+
+
+def _smoothed(correct, served, prior, weight=PRIOR_WEIGHT):
+    return (correct + weight * prior) / (served + weight)
+
+
+def category_rate(category):
+    """Share of correct answers in a category (every category for 'Random'), 0.5 with no data"""
+    rows = CategoryStat.objects.filter(user=None)
+    if category != RANDOM_CATEGORY:
+        rows = rows.filter(category=category)
+    totals = rows.aggregate(served=Sum('times_served'), correct=Sum('times_correct'))
+    return _smoothed(totals['correct'] or 0, totals['served'] or 0, 0.5, weight=2)
+
+
+def skill_band(user, category, prior):
+    """The user's smoothed success rate in the category, as a band index"""
+    rows = CategoryStat.objects.filter(user=user)
+    if category != RANDOM_CATEGORY:
+        rows = rows.filter(category=category)
+    totals = rows.aggregate(served=Sum('times_served'), correct=Sum('times_correct'))
+    rate = _smoothed(totals['correct'] or 0, totals['served'] or 0, prior)
+    bands = settings.APTITUDE_SKILL_BANDS
+    return min(int(rate * bands), bands - 1)
+
+
+def question_weight(success_rate, target):
+    distance = (success_rate - target) / TARGET_SPREAD
+    return max(math.exp(-0.5 * distance * distance), MIN_WEIGHT)
+
+
+def build_table(category, band, prior):
+    """Alias table over the pool's QuestionStat ids for one category and skill band"""
+    pool = QuestionStat.objects.all()
+    if category != RANDOM_CATEGORY:
+        pool = pool.filter(category=category)
+    rows = list(pool.values_list('id', 'times_served', 'times_correct'))
+    if not rows:
+        return None
+    bands = settings.APTITUDE_SKILL_BANDS
+    target = max((band + 0.5) / bands - TARGET_OFFSET, 0.0)
+    return AliasTable(
+        [pk for pk, _, _ in rows],
+        [question_weight(_smoothed(correct, served, prior), target) for _, served, correct in rows],
+    )
+
+
+def build_pool_ids(category):
+    pool = QuestionStat.objects.all()
+    if category != RANDOM_CATEGORY:
+        pool = pool.filter(category=category)
+    return list(pool.values_list('id', flat=True))
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def _cached(key, build):
+    now = time.monotonic()
+    entry = _tables.get(key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    value = build()
+    with _tables_lock:
+        _tables[key] = (now + settings.APTITUDE_SAMPLER_TTL, value)
+    return value
+
+
+def get_table(category, band, prior):
+    return _cached((category, band), lambda: build_table(category, band, prior))
+
+
+def get_pool_ids(category):
+    """Every pool id in the category, for uniform draws"""
+    return _cached((category, None), lambda: build_pool_ids(category))
+
+
+def clear_tables():
+    with _tables_lock:
+        _tables.clear()
+
+
+def _fetch(chosen):
+    rows = QuestionStat.objects.in_bulk(chosen)
+    return [rows[pk] for pk in chosen if pk in rows]
+
+
+def sample_questions(user, category, count, seen=(), exclude=(), rng=random):
+    """
+    Up to `count` distinct QuestionStat rows drawn by adaptive weight, skipping
+    ids in `seen` (a SeenBitmap) and `exclude`. Returns fewer (possibly none)
+    when the pool is smaller than APTITUDE_ADAPTIVE_MIN_POOL or the draws keep
+    hitting seen questions; the caller tops up.
+    """
+    prior = category_rate(category)
+    table = get_table(category, skill_band(user, category, prior), prior)
+    if table is None or len(table) < settings.APTITUDE_ADAPTIVE_MIN_POOL:
+        return []
+    chosen = []
+    excluded = set(exclude)
+    for _ in range(count * 8):
+        pk = table.draw(rng)
+        if pk not in excluded and pk not in seen:
+            excluded.add(pk)
+            chosen.append(pk)
+            if len(chosen) == count:
+                break
+    return _fetch(chosen)
+
+
+def sample_pool(category, count, seen=(), exclude=(), rng=random):
+    """
+    Up to `count` pool questions the user has not seen, uniformly at random.
+    Starts at a random offset and walks the pool, so it only scans as far as
+    it needs to find `count` unseen ids.
+    """
+    ids = get_pool_ids(category)
+    if not ids:
+        return []
+    chosen = []
+    excluded = set(exclude)
+    start = rng.randrange(len(ids))
+    step = _coprime_step(len(ids), rng)
+    for offset in range(len(ids)):
+        pk = ids[(start + offset * step) % len(ids)]
+        if pk not in excluded and pk not in seen:
+            chosen.append(pk)
+            if len(chosen) == count:
+                break
+    return _fetch(chosen)
+
+
+def _coprime_step(size, rng):
+    # A step coprime with the pool size visits every id once, in a scrambled order
+    while True:
+        step = rng.randrange(1, size + 1)
+        if math.gcd(step, size) == 1:
+            return step
@@ -0,0 +1,84 @@
+"""
+Per-user index of questions already served.
+
+Every served question has a QuestionStat id in the local pool, so "seen" is a
+bitmap over those ids, stored zlib-compressed next to the user's history
+(SeenQuestions). Checking a candidate is a bit test; the user's
+QuestionHistory is only read once, to build the index for users who predate
+it.
+"""
+import zlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import Subquery
+
+from .models import QuestionHistory, QuestionStat, SeenQuestions
+
+
+class SeenBitmap:
+    """Growable bitset of non-negative integer ids"""
+
+    __slots__ = ('bits',)
+
+    def __init__(self, data=b''):
+        self.bits = bytearray(zlib.decompress(data)) if data else bytearray()
+
+    def __contains__(self, pk):
+        if pk is None:
+            return False
+        index = pk >> 3
+        return index < len(self.bits) and bool(self.bits[index] & (1 << (pk & 7)))
+
+    def add(self, pk):
+        index = pk >> 3
+        if index >= len(self.bits):
+            self.bits.extend(bytes(index + 1 - len(self.bits)))
+        self.bits[index] |= 1 << (pk & 7)
+
+    def __len__(self):
+        return sum(bin(byte).count('1') for byte in self.bits if byte)
+
+    def dumps(self):
+        return zlib.compress(bytes(self.bits))
+
+
+def _history_pool_ids(user):
+    hashes = QuestionHistory.objects.filter(user=user).values('question_hash')
+    return QuestionStat.objects.filter(question_hash__in=Subquery(hashes)).values_list('id', flat=True)
+
+
+def load_seen(user):
+    """The user's SeenBitmap, built from their history the first time"""
+    row = SeenQuestions.objects.filter(user=user).only('bitmap').first()
+    if row is not None:
+        return SeenBitmap(bytes(row.bitmap))
+    return mark_seen(user, ())
+
+
+def mark_seen(user, pool_ids):
+    """Add QuestionStat ids to the user's index and return the updated bitmap"""
+    try:
+        return _mark_seen(user, pool_ids)
+    except IntegrityError:
+        # A concurrent request created the user's row first; it exists now, so
+        # the retry locks it instead
+        return _mark_seen(user, pool_ids)
+
+
+def _mark_seen(user, pool_ids):
+    with transaction.atomic():
+        row = SeenQuestions.objects.select_for_update().filter(user=user).first()
+        if row is None:
+            seen = SeenBitmap()
+            for pk in _history_pool_ids(user).iterator(chunk_size=2000):
+                seen.add(pk)
+        else:
+            seen = SeenBitmap(bytes(row.bitmap))
+        for pk in pool_ids:
+            seen.add(pk)
+        if row is None:
+            SeenQuestions.objects.create(user=user, bitmap=seen.dumps(), count=len(seen))
+        else:
+            row.bitmap, row.count = seen.dumps(), len(seen)
+            row.save(update_fields=['bitmap', 'count', 'updated_at'])
+    return seen
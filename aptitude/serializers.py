@@ -4,7 +4,7 @@ from .models import QuestionHistory, Exam
 class ExamSerializer(serializers.ModelSerializer):
     class Meta:
         model = Exam
-        fields = ['id', 'start_time', 'completed', 'score']
+        fields = ['id', 'category', 'start_time', 'completed', 'score']
 
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
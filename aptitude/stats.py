@@ -0,0 +1,67 @@
+"""
+Per-question and per-category answer statistics.
+
+Every question that is served is kept in the local QuestionStat pool, keyed by
+a hash of its normalized text. When an exam is submitted, the served/correct
+counters of its questions, of its category and of the user's own category
+totals are bumped with a handful of bulk UPDATEs instead of one query per
+question.
+"""
+import hashlib
+from collections import Counter, defaultdict
+
+from django.db.models import F
+
+from .models import CategoryStat, QuestionStat
+
+
+def question_hash(text):
+    """Stable id for a question: SHA-1 of its lower-cased, whitespace-collapsed text"""
+    return hashlib.sha1(' '.join(text.lower().split()).encode()).hexdigest()
+
+
+def add_to_pool(category, questions):
+    """Keep served questions (QuestionHistory rows) in the local pool; existing entries are left as they are"""
+    QuestionStat.objects.bulk_create(
+        [
+            QuestionStat(
+                question_hash=question.question_hash,
+                category=category,
+                question=question.question,
+                options=question.options,
+                correct_answer=question.correct_answer,
+                explanation=question.explanation,
+            )
+            for question in questions
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def record_results(exam, graded):
+    """Add a submitted exam's graded QuestionHistory rows to the question and category counters"""
+    if not graded:
+        return
+    add_to_pool(exam.category, graded)
+
+    served = Counter(question.question_hash for question in graded)
+    correct = Counter(question.question_hash for question in graded if question.is_correct)
+    # One UPDATE per distinct (served, correct) increment, in practice (1, 0) and (1, 1)
+    by_increment = defaultdict(list)
+    for digest, times in served.items():
+        by_increment[(times, correct[digest])].append(digest)
+    for (times_served, times_correct), digests in by_increment.items():
+        QuestionStat.objects.filter(question_hash__in=digests).update(
+            times_served=F('times_served') + times_served,
+            times_correct=F('times_correct') + times_correct,
+        )
+
+    total_correct = sum(correct.values())
+    for user_id in (None, exam.user_id):
+        CategoryStat.objects.bulk_create(
+            [CategoryStat(user_id=user_id, category=exam.category)], ignore_conflicts=True
+        )
+        CategoryStat.objects.filter(user_id=user_id, category=exam.category).update(
+            times_served=F('times_served') + len(graded),
+            times_correct=F('times_correct') + total_correct,
+        )
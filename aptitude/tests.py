@@ -1,3 +1,253 @@
-from django.test import TestCase
+import random
+import threading
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import CategoryStat, Exam, QuestionHistory, QuestionStat, SeenQuestions
+from .sampling import AliasTable, clear_tables, sample_questions
+from . import seen as seen_module
+from .seen import SeenBitmap, load_seen, mark_seen
+from .stats import question_hash
+
+
+def api_question(number, category='Algebra'):
+    return {
+        'question': f'{category} question {number}?',
+        'options': ['a', 'b', 'c', 'd'],
+        'answer': 'a',
+        'explanation': 'because',
+    }
+
+
+class QuestionStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='candidate', email='c@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _start(self, questions, **data):
+        with mock.patch('aptitude.views.fetch_questions', mock.AsyncMock(return_value=questions)):
+            return self.client.post(reverse('start_exam'), {'category_id': 'Algebra', **data}, format='json')
+
+    def test_question_hash_normalizes_text(self):
+        self.assertEqual(question_hash('What  is 2+2?\n'), question_hash('what is 2+2?'))
+
+    def test_submit_records_correctness_and_stats(self):
+        response = self._start([api_question(number) for number in range(3)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(QuestionStat.objects.count(), 3)
+        questions = response.json()['questions']
+        answers = [
+            {'question_id': questions[0]['id'], 'answer': 'a'},
+            {'question_id': questions[1]['id'], 'answer': 'b'},
+            {'question_id': questions[2]['id'], 'answer': None},
+        ]
+
+        # Constant in the number of questions (includes the analytics rollup update)
+        with self.assertNumQueries(18):
+            response = self.client.post(reverse('submit_exam'),
+                                        {'exam_id': response.json()['exam_id'], 'answers': answers}, format='json')
+        self.assertEqual(response.json(), {'score': 1, 'total': 3})
+
+        self.assertEqual(
+            list(QuestionHistory.objects.order_by('id').values_list('user_answer', 'is_correct')),
+            [('a', True), ('b', False), (None, False)],
+        )
+        stats = {stat.question: (stat.times_served, stat.times_correct) for stat in QuestionStat.objects.all()}
+        self.assertEqual(stats, {'Algebra question 0?': (1, 1), 'Algebra question 1?': (1, 0),
+                                 'Algebra question 2?': (1, 0)})
+        self.assertEqual(
+            set(CategoryStat.objects.values_list('user_id', 'category', 'times_served', 'times_correct')),
+            {(None, 'Algebra', 3, 1), (self.user.id, 'Algebra', 3, 1)},
+        )
+
+    def test_unknown_question_is_rejected(self):
+        exam_id = self._start([api_question(0)]).json()['exam_id']
+        response = self.client.post(reverse('submit_exam'),
+                                    {'exam_id': exam_id, 'answers': [{'question_id': 999, 'answer': 'a'}]},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Exam.objects.get(id=exam_id).completed)
+        self.assertFalse(CategoryStat.objects.exists())
+
+
+    def test_duplicate_answers_are_rejected(self):
+        response = self._start([api_question(0)]).json()
+        question_id = response['questions'][0]['id']
+        answers = [{'question_id': question_id, 'answer': 'a'}] * 2
+        response = self.client.post(reverse('submit_exam'), {'exam_id': response['exam_id'], 'answers': answers},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(QuestionStat.objects.get().times_served, 0)
+        self.assertFalse(CategoryStat.objects.exists())
+
+
+class ConcurrentSeenQuestionsTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor == 'sqlite':
+            # The shared in-memory test database holds table locks for open reads,
+            # which would block the other request's insert below
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA read_uncommitted = 1')
+            self.addCleanup(connection.close)
+
+    def test_concurrent_first_exam_merges_into_the_other_row(self):
+        user = User.objects.create_user(username='racer', email='r@example.com', password='pass12345')
+        stat = QuestionStat.objects.create(question_hash=question_hash('q?'), category='Algebra', question='q?',
+                                           options=[], correct_answer='a', explanation='')
+        history_pool_ids = seen_module._history_pool_ids
+        calls = []
+
+        def commit_other_row():
+            # Another request's first exam, committed on its own connection
+            try:
+                other = SeenBitmap()
+                other.add(stat.pk + 1)
+                SeenQuestions.objects.create(user=user, bitmap=other.dumps(), count=1)
+            finally:
+                connection.close()
+
+        def created_meanwhile(user):
+            # Runs after this request found no row and before it creates one
+            calls.append(user)
+            if len(calls) == 1:
+                thread = threading.Thread(target=commit_other_row)
+                thread.start()
+                thread.join()
+            return history_pool_ids(user)
+
+        with mock.patch('aptitude.seen._history_pool_ids', side_effect=created_meanwhile):
+            seen = mark_seen(user, [stat.pk])
+        self.assertEqual(len(calls), 1)  # the retry found the other row
+        self.assertIn(stat.pk, seen)
+        self.assertIn(stat.pk + 1, seen)
+        row = SeenQuestions.objects.get(user=user)
+        self.assertEqual(row.count, 2)
+        self.assertEqual(set(SeenBitmap(bytes(row.bitmap)).bits), set(seen.bits))
+
+
+class AdaptiveSamplingTests(TestCase):
+    def setUp(self):
+        clear_tables()
+        self.addCleanup(clear_tables)
+        self.user = User.objects.create_user(username='candidate', email='c@example.com', password='pass12345')
+
+    def test_alias_table_matches_weights(self):
+        table = AliasTable(['a', 'b', 'c'], [1, 2, 7])
+        rng = random.Random(1)
+        counts = Counter(table.draw(rng) for _ in range(20000))
+        self.assertAlmostEqual(counts['a'] / 20000, 0.1, delta=0.02)
+        self.assertAlmostEqual(counts['c'] / 20000, 0.7, delta=0.02)
+
+    def _pool(self, easy, hard):
+        QuestionStat.objects.bulk_create(
+            [QuestionStat(question_hash=question_hash(f'easy {n}'), category='Algebra', question=f'easy {n}',
+                          options=[], correct_answer='a', explanation='', times_served=50, times_correct=48)
+             for n in range(easy)]
+            + [QuestionStat(question_hash=question_hash(f'hard {n}'), category='Algebra', question=f'hard {n}',
+                            options=[], correct_answer='a', explanation='', times_served=50, times_correct=5)
+               for n in range(hard)]
+        )
+        CategoryStat.objects.create(category='Algebra', times_served=5000, times_correct=2650)
+
+    @override_settings(APTITUDE_ADAPTIVE_MIN_POOL=10)
+    def test_sampling_follows_user_level(self):
+        self._pool(easy=40, hard=40)
+        strong = CategoryStat.objects.create(user=self.user, category='Algebra', times_served=200, times_correct=190)
+        picked = sample_questions(self.user, 'Algebra', 15, rng=random.Random(3))
+        self.assertEqual(len({stat.pk for stat in picked}), 15)
+        self.assertGreater(sum(stat.question.startswith('easy') for stat in picked), 10)
+
+        clear_tables()
+        strong.times_correct = 10
+        strong.save()
+        picked = sample_questions(self.user, 'Algebra', 15, rng=random.Random(3))
+        self.assertGreater(sum(stat.question.startswith('hard') for stat in picked), 10)
+
+    def test_small_pool_falls_back_to_api(self):
+        self._pool(easy=3, hard=3)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch('aptitude.views.fetch_questions',
+                        mock.AsyncMock(return_value=[api_question(n) for n in range(15)])):
+            response = client.post(reverse('start_exam'), {'category_id': 'Algebra', 'mode': 'adaptive'},
+                                   format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['questions']), 15)
+        self.assertTrue(all(q['question'].startswith('Algebra') for q in response.json()['questions']))
+
+    @override_settings(APTITUDE_ADAPTIVE_MIN_POOL=10)
+    def test_adaptive_exam_uses_pool(self):
+        self._pool(easy=20, hard=20)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        fetch = mock.AsyncMock(return_value=[])
+        with mock.patch('aptitude.views.fetch_questions', fetch):
+            response = client.post(reverse('start_exam'), {'category_id': 'Algebra', 'mode': 'adaptive'},
+                                   format='json')
+        self.assertEqual(response.json()['mode'], 'adaptive')
+        self.assertEqual(len(response.json()['questions']), 15)
+        fetch.assert_not_called()
+        self.assertEqual(QuestionHistory.objects.filter(exam_id=response.json()['exam_id']).count(), 15)
+
+
+class SeenQuestionsTests(TestCase):
+    def setUp(self):
+        clear_tables()
+        self.addCleanup(clear_tables)
+        self.user = User.objects.create_user(username='candidate', email='c@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _start(self, questions):
+        with mock.patch('aptitude.views.fetch_questions', mock.AsyncMock(return_value=questions)):
+            return self.client.post(reverse('start_exam'), {'category_id': 'Algebra'}, format='json').json()
+
+    def test_bitmap_round_trip(self):
+        seen = SeenBitmap()
+        for pk in (1, 8, 9000):
+            seen.add(pk)
+        restored = SeenBitmap(seen.dumps())
+        self.assertIn(9000, restored)
+        self.assertNotIn(2, restored)
+        self.assertNotIn(None, restored)
+        self.assertEqual(len(restored), 3)
+
+    def test_repeats_are_replaced_with_unseen_pool_questions(self):
+        first = self._start([api_question(n) for n in range(15)])
+        self._start([api_question(n) for n in range(15, 30)])
+        self.assertEqual(SeenQuestions.objects.get(user=self.user).count, 30)
+
+        # The API only returns the first exam's questions, so unseen ones must come from the pool
+        QuestionStat.objects.bulk_create([
+            QuestionStat(question_hash=question_hash(f'pool {n}'), category='Algebra', question=f'pool {n}',
+                         options=[], correct_answer='a', explanation='') for n in range(20)
+        ])
+        clear_tables()
+        third = self._start([api_question(n) for n in range(15)])
+        served = [question['question'] for question in third['questions']]
+        self.assertEqual(len(served), 15)
+        self.assertTrue(all(text.startswith('pool') for text in served))
+        self.assertFalse({q['question'] for q in first['questions']} & set(served))
+
+    def test_seen_questions_fill_in_when_nothing_else_is_left(self):
+        self._start([api_question(n) for n in range(15)])
+        again = self._start([api_question(n) for n in range(15)])
+        self.assertEqual(len(again['questions']), 15)
+
+    def test_index_is_built_from_existing_history(self):
+        exam = Exam.objects.create(user=self.user, category='Algebra')
+        old = QuestionHistory.objects.create(user=self.user, exam=exam, question='Old question?',
+                                             question_hash=question_hash('Old question?'), options=[],
+                                             correct_answer='a', explanation='')
+        stat = QuestionStat.objects.create(question_hash=old.question_hash, category='Algebra', question=old.question,
+                                           options=[], correct_answer='a', explanation='')
+        self.assertIn(stat.pk, load_seen(self.user))
+        with self.assertNumQueries(1):
+            self.assertIn(stat.pk, load_seen(self.user))
@@ -6,8 +6,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.views.decorators.csrf import csrf_exempt
 import requests
-from .models import QuestionHistory, Exam
+from django.db import transaction
+from .models import QuestionHistory, QuestionStat, Exam
+from .sampling import sample_pool, sample_questions
+from .seen import load_seen, mark_seen
 from .serializers import QuestionSerializer, QuestionHistorySerializer, ExamSerializer
+from .stats import add_to_pool, question_hash, record_results
+
+QUESTIONS_PER_EXAM = 15
 
 @csrf_exempt
 @api_view(['GET'])
@@ -35,39 +41,101 @@ async def fetch_questions(category_id, num_questions=20):
             if result and result['question'] not in seen_questions:
                 seen_questions.add(result['question'])
                 unique_questions.append(result)
-                if len(unique_questions) >= 15:
+                if len(unique_questions) >= QUESTIONS_PER_EXAM:
                     break
-        return unique_questions[:15]
+        return unique_questions[:QUESTIONS_PER_EXAM]
+
+def pool_question_data(stat):
+    # Same shape as an aptitude-api response
+    return {
+        'question': stat.question,
+        'options': stat.options,
+        'answer': stat.correct_answer,
+        'explanation': stat.explanation,
+    }
+
+def select_questions(user, category_id, mode, seen):
+    """
+    Question data for a new exam, avoiding questions in the user's seen index:
+    adaptive draws from the pool first, then fresh API questions, then unseen
+    pool questions at random. Seen questions are only used as a last resort.
+    """
+    chosen = []
+    chosen_hashes = set()
+    taken_ids = set()
+
+    def take(data, pool_id=None):
+        chosen.append(data)
+        chosen_hashes.add(question_hash(data['question']))
+        if pool_id is not None:
+            taken_ids.add(pool_id)
+
+    if mode == 'adaptive':
+        for stat in sample_questions(user, category_id, QUESTIONS_PER_EXAM, seen=seen):
+            take(pool_question_data(stat), stat.pk)
+
+    already_seen = []
+    if len(chosen) < QUESTIONS_PER_EXAM:
+        # Run async code in sync context
+        fetched = [data for data in asyncio.run(fetch_questions(category_id))
+                   if question_hash(data['question']) not in chosen_hashes]
+        pool_ids = dict(QuestionStat.objects.filter(
+            question_hash__in=[question_hash(data['question']) for data in fetched]
+        ).values_list('question_hash', 'id'))
+        for data in fetched:
+            pool_id = pool_ids.get(question_hash(data['question']))
+            if pool_id in seen:
+                already_seen.append(data)
+            elif len(chosen) < QUESTIONS_PER_EXAM and question_hash(data['question']) not in chosen_hashes:
+                take(data, pool_id)
+
+    if len(chosen) < QUESTIONS_PER_EXAM:
+        for stat in sample_pool(category_id, QUESTIONS_PER_EXAM - len(chosen), seen=seen, exclude=taken_ids):
+            if question_hash(stat.question) not in chosen_hashes:
+                take(pool_question_data(stat), stat.pk)
+
+    for data in already_seen:
+        if len(chosen) >= QUESTIONS_PER_EXAM:
+            break
+        if question_hash(data['question']) not in chosen_hashes:
+            take(data)
+    return chosen
 
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def start_exam(request):
-    exam = Exam.objects.create(user=request.user)
-    questions = []
     category_id = request.data.get('category_id', 'Random')
+    mode = request.data.get('mode', 'random')
+    if mode not in ('random', 'adaptive'):
+        return Response({'error': 'Invalid mode', 'details': "mode must be 'random' or 'adaptive'"}, status=400)
+    exam = Exam.objects.create(user=request.user, category=category_id)
+    question_data = select_questions(request.user, category_id, mode, load_seen(request.user))
 
-    # Run async code in sync context
-    question_data = asyncio.run(fetch_questions(category_id))
-    
-    for data in question_data:
-        question = QuestionHistory.objects.create(
+    history = QuestionHistory.objects.bulk_create([
+        QuestionHistory(
             user=request.user,
             exam=exam,
             question=data['question'],
+            question_hash=question_hash(data['question']),
             options=data['options'],
             correct_answer=data['answer'],
             explanation=data['explanation']
         )
-        questions.append({
-            'id': question.id,
-            'question': data['question'],
-            'options': data['options']
-        })
-    
+        for data in question_data
+    ])
+    add_to_pool(category_id, history)
+    mark_seen(request.user, QuestionStat.objects.filter(
+        question_hash__in=[question.question_hash for question in history]
+    ).values_list('id', flat=True))
+
     return Response({
         'exam_id': exam.id,
-        'questions': questions
+        'mode': mode,
+        'questions': [
+            {'id': question.id, 'question': question.question, 'options': question.options}
+            for question in history
+        ]
     })
 
 @csrf_exempt
@@ -78,28 +146,36 @@ def submit_exam(request):
     answers = request.data.get('answers', [])  # List of {question_id: answer}
     
     try:
-        exam = Exam.objects.get(id=exam_id, user=request.user)
-        if exam.completed:
-            return Response({'error': 'Exam already submitted'}, status=400)
-        
-        correct_count = 0
-        for answer in answers:
-            question = QuestionHistory.objects.get(
-                id=answer['question_id'],
-                exam=exam,
-                user=request.user
-            )
-            # Compare answers only if user provided an answer
-            if answer['answer'] is not None and answer['answer'] == question.correct_answer:
-                correct_count += 1
-        
-        exam.score = correct_count
-        exam.completed = True
-        exam.save()
+        with transaction.atomic():
+            exam = Exam.objects.select_for_update().get(id=exam_id, user=request.user)
+            if exam.completed:
+                return Response({'error': 'Exam already submitted'}, status=400)
+
+            questions = {question.id: question for question in QuestionHistory.objects.filter(exam=exam)}
+            graded = []
+            for answer in answers:
+                question = questions.get(answer['question_id'])
+                if question is None:
+                    return Response({'error': 'Invalid answers', 'details': f"Unknown question {answer['question_id']}"},
+                                    status=400)
+                if question in graded:
+                    return Response({'error': 'Invalid answers', 'details': f"Duplicate question {answer['question_id']}"},
+                                    status=400)
+                # Compare answers only if user provided an answer
+                question.user_answer = answer['answer']
+                question.is_correct = answer['answer'] is not None and answer['answer'] == question.correct_answer
+                graded.append(question)
+            correct_count = sum(question.is_correct for question in graded)
+
+            QuestionHistory.objects.bulk_update(graded, ['user_answer', 'is_correct'])
+            record_results(exam, graded)
+            exam.score = correct_count
+            exam.completed = True
+            exam.save()
         
         return Response({
             'score': correct_count,
-            'total': len(answers)
+            'total': len(graded)
         })
     except Exam.DoesNotExist:
         return Response({'error': 'Exam not found'}, status=404)
@@ -0,0 +1,330 @@
+"""
+Cached user lookups for request authentication.
+
+Authenticated requests resolve their User through a short-lived per-process
+cache backed by the shared Django cache (AUTH_CACHE_ALIAS). Entries carry a
+per-user version; saving, deleting or logging out a user bumps the version, so
+password changes, deactivation and signout invalidate every process (other
+processes may serve their local copy for at most AUTH_USER_LOCAL_TTL seconds).
+Password hashes are not cached: only a digest for the token revocation check
+and the session auth hash.
+
+Refresh-token blacklist checks go through a bloom filter of blacklisted JTIs,
+so a token that was never revoked is accepted without a database query.
+
+Both rely on AUTH_CACHE_ALIAS being shared between processes. With a
+per-process backend (locmem, the default) users are only cached locally for
+AUTH_USER_LOCAL_TTL seconds and blacklist checks always query the database.
+"""
+import hashlib
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import router
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_KEY = 'auth:user:{}'
+USER_VERSION_KEY = 'auth:user-version:{}'
+BLACKLIST_GENERATION_KEY = 'auth:blacklist-generation'
+
+# Never copied into the shared cache; reading them from a cached user loads them
+# from the database (they are deferred fields on the instance)
+UNCACHED_USER_FIELDS = {'password'}
+
+# Blacklist rows committed this long before a sync started are re-read, so
+# transactions that commit out of order are not missed
+BLACKLIST_SYNC_OVERLAP = timedelta(minutes=1)
+BLACKLIST_FULL_REBUILD = timedelta(hours=1)
+
+# Backends whose contents are private to one process
+PROCESS_LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def _cache():
+    return caches[settings.AUTH_CACHE_ALIAS]
+
+
+def shared_cache_configured():
+    """Whether AUTH_CACHE_ALIAS is visible to every process"""
+    return settings.CACHES[settings.AUTH_CACHE_ALIAS]['BACKEND'] not in PROCESS_LOCAL_CACHE_BACKENDS
+
+
+# --- Users -------------------------------------------------------------------
+
+class UserCache:
+    """
+    Per-process LRU in front of the shared cache; the database is the fallback.
+    The shared tier is skipped when AUTH_CACHE_ALIAS is not shared, since its
+    invalidations would not reach other processes.
+    """
+
+    def __init__(self, local_ttl=None, shared_ttl=None, max_local=None):
+        self.local_ttl = settings.AUTH_USER_LOCAL_TTL if local_ttl is None else local_ttl
+        self.shared_ttl = settings.AUTH_USER_CACHE_TTL if shared_ttl is None else shared_ttl
+        self.max_local = settings.AUTH_USER_LOCAL_MAX if max_local is None else max_local
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """Fresh User instance for user_id, or None if it does not exist"""
+        user_model = get_user_model()
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None and entry[0] > now:
+                self._local.move_to_end(key)
+                return self._build(user_model, *entry[1:])
+
+        if not shared_cache_configured():
+            user = user_model._default_manager.filter(pk=user_id).first()
+            if user is None:
+                return None
+            return self._store_local(key, now, user_model, *self._cacheable(user))
+
+        cache = _cache()
+        cached = cache.get_many([USER_KEY.format(key), USER_VERSION_KEY.format(key)])
+        version = cached.get(USER_VERSION_KEY.format(key))
+        if version is None:
+            cache.add(USER_VERSION_KEY.format(key), uuid.uuid4().hex, None)
+            version = cache.get(USER_VERSION_KEY.format(key))
+        entry = cached.get(USER_KEY.format(key))
+
+        if entry is not None and entry['version'] == version:
+            values, password_digest, session_hash = entry['values'], entry['password_digest'], entry['session_hash']
+        else:
+            # Version read before the query: a concurrent invalidation bumps it
+            # and the entry written below is ignored on the next read
+            user = user_model._default_manager.filter(pk=user_id).first()
+            if user is None:
+                return None
+            values, password_digest, session_hash = self._cacheable(user)
+            cache.set(USER_KEY.format(key), {'version': version, 'values': values,
+                                             'password_digest': password_digest,
+                                             'session_hash': session_hash}, self.shared_ttl)
+
+        return self._store_local(key, now, user_model, values, password_digest, session_hash)
+
+    def invalidate(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            self._local.pop(key, None)
+        if not shared_cache_configured():
+            return
+        cache = _cache()
+        cache.set(USER_VERSION_KEY.format(key), uuid.uuid4().hex, None)
+        cache.delete(USER_KEY.format(key))
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    @staticmethod
+    def _field_names(user_model):
+        return [field.attname for field in user_model._meta.concrete_fields
+                if field.attname not in UNCACHED_USER_FIELDS]
+
+    def _cacheable(self, user):
+        values = tuple(getattr(user, name) for name in self._field_names(type(user)))
+        # Enough to check a token's REVOKE_TOKEN_CLAIM and a session's auth hash
+        # without the password hash
+        return values, get_md5_hash_password(user.password), user.get_session_auth_hash()
+
+    def _store_local(self, key, now, user_model, values, password_digest, session_hash):
+        with self._lock:
+            self._local[key] = (now + self.local_ttl, values, password_digest, session_hash)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local:
+                self._local.popitem(last=False)
+        return self._build(user_model, values, password_digest, session_hash)
+
+    def _build(self, user_model, values, password_digest, session_hash):
+        # A new instance per request, so views can modify and save it safely;
+        # save() only writes the loaded fields, so the password is left alone
+        user = user_model.from_db(router.db_for_read(user_model), self._field_names(user_model), values)
+        user._password_digest = password_digest
+        # Session verification reads this instead of loading the deferred password;
+        # SECRET_KEY_FALLBACKS checks still go through _get_session_auth_hash()
+        user.get_session_auth_hash = lambda: session_hash
+        return user
+
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+
+
+def get_user_cache():
+    global _user_cache
+    with _user_cache_lock:
+        if _user_cache is None:
+            _user_cache = UserCache()
+        return _user_cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the token's user through the user cache"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_user_cache().get(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != user._password_digest:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose session user lookup goes through the user cache"""
+
+    def get_user(self, user_id):
+        user = get_user_cache().get(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+# --- Token blacklist ---------------------------------------------------------
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (no false negatives)"""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevokedTokenIndex:
+    """
+    Bloom filter of blacklisted refresh-token JTIs, kept in sync across processes
+    through a generation marker in the shared cache, and resynced at least every
+    AUTH_BLACKLIST_SYNC_INTERVAL seconds whatever the marker says. A JTI that is
+    not in the filter is known not to be blacklisted; anything else falls back
+    to the DB.
+    """
+
+    def __init__(self, capacity=None, error_rate=None, sync_interval=None):
+        self.capacity = settings.AUTH_BLACKLIST_BLOOM_CAPACITY if capacity is None else capacity
+        self.error_rate = settings.AUTH_BLACKLIST_BLOOM_ERROR_RATE if error_rate is None else error_rate
+        self.sync_interval = settings.AUTH_BLACKLIST_SYNC_INTERVAL if sync_interval is None else sync_interval
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._generation = None
+        self._synced_at = None
+        self._rebuilt_at = None
+        self._checked_at = None
+
+    def might_be_revoked(self, jti):
+        generation = self._current_generation()
+        now = time.monotonic()
+        with self._lock:
+            if (self._bloom is None or generation != self._generation
+                    or now - self._checked_at >= self.sync_interval):
+                self._sync()
+                self._generation = generation
+                self._checked_at = now
+            return jti in self._bloom
+
+    def add(self, jti):
+        """Record a JTI blacklisted by this process right away"""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def mark_changed(self):
+        """Called after a blacklist entry is committed"""
+        _cache().set(BLACKLIST_GENERATION_KEY, uuid.uuid4().hex, None)
+
+    def _current_generation(self):
+        cache = _cache()
+        generation = cache.get(BLACKLIST_GENERATION_KEY)
+        if generation is None:
+            cache.add(BLACKLIST_GENERATION_KEY, uuid.uuid4().hex, None)
+            generation = cache.get(BLACKLIST_GENERATION_KEY)
+        return generation
+
+    def _sync(self):
+        # Read the generation before the rows (see might_be_revoked), then load
+        # only rows blacklisted since the last sync unless a rebuild is due
+        now = timezone.now()
+        full = self._bloom is None or now - self._rebuilt_at > BLACKLIST_FULL_REBUILD
+        rows = BlacklistedToken.objects.filter(token__expires_at__gt=now)
+        if full:
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._rebuilt_at = now
+        else:
+            rows = rows.filter(blacklisted_at__gte=self._synced_at - BLACKLIST_SYNC_OVERLAP)
+        for jti in rows.values_list('token__jti', flat=True).iterator():
+            self._bloom.add(jti)
+        self._synced_at = now
+
+
+_revoked_tokens = None
+_revoked_tokens_lock = threading.Lock()
+
+
+def get_revoked_token_index():
+    global _revoked_tokens
+    with _revoked_tokens_lock:
+        if _revoked_tokens is None:
+            _revoked_tokens = RevokedTokenIndex()
+        return _revoked_tokens
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    """
+    RefreshToken whose blacklist check skips the DB for JTIs not in the bloom
+    filter. Without a shared AUTH_CACHE_ALIAS other processes' revocations never
+    reach the filter, so every check goes to the DB.
+    """
+
+    def check_blacklist(self):
+        if (not shared_cache_configured()
+                or get_revoked_token_index().might_be_revoked(self.payload[api_settings.JTI_CLAIM])):
+            super().check_blacklist()
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CachedBlacklistRefreshToken
@@ -0,0 +1,90 @@
+"""
+Streaming export of a user's interview and exam history as NDJSON.
+
+Every line is one JSON object with a `type` of user, interview, response,
+result, exam or question. Rows are read with `.iterator(chunk_size=...)` (with
+related rows prefetched per chunk) and written as they are produced, so memory
+use does not grow with the size of the history.
+"""
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.fields.files import FieldFile
+
+from aiinterview.models import Interview
+from aptitude.models import Exam
+
+GZIP_FLUSH_BYTES = 64 * 1024
+_encoder = DjangoJSONEncoder(separators=(',', ':'))
+
+USER_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name', 'date_joined', 'last_login')
+
+
+def _row(record_type, instance, exclude=()):
+    row = {'type': record_type}
+    for field in instance._meta.concrete_fields:
+        if field.name in exclude:
+            continue
+        value = getattr(instance, field.attname)
+        if isinstance(value, FieldFile):
+            value = value.name or None
+        row[field.attname] = value
+    return row
+
+
+def iter_history_records(user, chunk_size=None):
+    """Yield the export records (dicts) for one user"""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    yield {'type': 'user', **{name: getattr(user, name) for name in USER_FIELDS}}
+
+    interviews = (
+        Interview.objects.filter(user=user)
+        .select_related('result')
+        .prefetch_related('responses')
+        .order_by('id')
+    )
+    for interview in interviews.iterator(chunk_size=chunk_size):
+        yield _row('interview', interview, exclude=('user',))
+        for response in sorted(interview.responses.all(), key=lambda r: r.question_number):
+            yield _row('response', response)
+        try:
+            yield _row('result', interview.result)
+        except Interview.result.RelatedObjectDoesNotExist:
+            pass
+
+    exams = Exam.objects.filter(user=user).prefetch_related('questions').order_by('start_time', 'id')
+    for exam in exams.iterator(chunk_size=chunk_size):
+        yield _row('exam', exam, exclude=('user',))
+        for question in sorted(exam.questions.all(), key=lambda q: q.id):
+            yield _row('question', question, exclude=('user',))
+
+
+def iter_ndjson(records):
+    for record in records:
+        yield (_encoder.encode(record) + '\n').encode()
+
+
+def iter_gzip(chunks):
+    """Gzip a byte stream, emitting compressed output in ~64KB pieces"""
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    pending = []
+    size = 0
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            pending.append(compressed)
+            size += len(compressed)
+        if size >= GZIP_FLUSH_BYTES:
+            yield b''.join(pending)
+            pending, size = [], 0
+    pending.append(compressor.flush())
+    yield b''.join(pending)
+
+
+def export_history(user, compression=None, chunk_size=None):
+    """Byte chunks of the user's NDJSON export, optionally gzip-compressed"""
+    chunks = iter_ndjson(iter_history_records(user, chunk_size))
+    if compression == 'gzip':
+        return iter_gzip(chunks)
+    return chunks
@@ -0,0 +1,115 @@
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import SimpleRateThrottle
+
+from authentication import throttling
+from authentication.throttling import AuthenticationThrottle, LoginIPThrottle
+
+
+class LegacyEmailThrottle(SimpleRateThrottle):
+    # The previous implementation: fixed history list per email, read + write per check
+    rate = '5/minute'
+    scope = 'auth_login'
+
+    def get_cache_key(self, request, view):
+        if not request.data.get('email'):
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': request.data.get('email')}
+
+
+class Command(BaseCommand):
+    help = ("Benchmark login throttle checks under a simulated credential-stuffing load "
+            "(many emails from a handful of IPs)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=20000)
+        parser.add_argument('--emails', type=int, default=200)
+        parser.add_argument('--ips', type=int, default=20)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--cache-latency', type=float, default=0.0,
+                            help='Simulated round trip per cache call in ms (e.g. 0.3 for Redis)')
+
+    def handle(self, *args, **options):
+        bench_cache = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-throttle'},
+        }
+        with override_settings(CACHES=bench_cache, THROTTLE_CACHE_ALIAS='default'):
+            requests = self._build_requests(options)
+            variants = [
+                ('legacy (email, locmem history)', [LegacyEmailThrottle], True),
+                ('sliding window, no fast reject', [AuthenticationThrottle, LoginIPThrottle], False),
+                ('sliding window + fast reject', [AuthenticationThrottle, LoginIPThrottle], True),
+            ]
+            self.stdout.write(f"{'variant':<34} {'checks/s':>10} {'allowed':>8} {'blocked':>8} {'cache ops':>10}")
+            for name, classes, fast_reject in variants:
+                result = self._run(requests, classes, fast_reject, options)
+                self.stdout.write(
+                    f"{name:<34} {result['rate']:>10.0f} {result['allowed']:>8} "
+                    f"{result['blocked']:>8} {result['cache_ops']:>10}"
+                )
+
+    def _build_requests(self, options):
+        factory = APIRequestFactory()
+        requests = []
+        for attempt in range(options['attempts']):
+            django_request = factory.post(
+                '/auth/signin/',
+                {'email': f"victim{attempt % options['emails']}@example.com", 'password': 'guess'},
+                format='json',
+                REMOTE_ADDR=f"10.0.0.{attempt % options['ips'] + 1}",
+            )
+            request = Request(django_request, parsers=[JSONParser()])
+            request.data  # parse up front so only the throttle is timed
+            requests.append(request)
+        return requests
+
+    def _run(self, requests, classes, fast_reject, options):
+        cache = caches['default']
+        cache.clear()
+        throttling._local_blocks.clear()
+        ops = itertools.count()
+        latency = options['cache_latency'] / 1000
+
+        def counted(method):
+            def wrapper(*args, **kwargs):
+                next(ops)
+                if latency:
+                    time.sleep(latency)
+                return method(*args, **kwargs)
+            return wrapper
+
+        def check(request):
+            # DRF evaluates every throttle, even after one has refused
+            return all([throttle_class().allow_request(request, None) for throttle_class in classes])
+
+        patches = [mock.patch.object(type(cache), name, counted(getattr(type(cache), name)))
+                   for name in ('get', 'set', 'add', 'incr')]
+        if not fast_reject:
+            patches.append(mock.patch.object(throttling.SlidingWindowThrottle, '_block_locally',
+                                             lambda self, until, now: None))
+        for patch in patches:
+            patch.start()
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                results = list(pool.map(check, requests, chunksize=64))
+            elapsed = time.perf_counter() - start
+        finally:
+            for patch in patches:
+                patch.stop()
+        allowed = sum(results)
+        return {
+            'rate': len(requests) / elapsed,
+            'allowed': allowed,
+            'blocked': len(results) - allowed,
+            'cache_ops': next(ops),
+        }
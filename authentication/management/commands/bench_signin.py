@@ -0,0 +1,91 @@
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from authentication.passwords import verify_password
+
+PASSWORD = 'bench-password-123'
+
+
+def legacy_signin(email, password):
+    # The previous view: lookup by email, then authenticate() looks the user up again
+    try:
+        user = User.objects.get(email=email)
+    except User.DoesNotExist:
+        return False
+    user = authenticate(username=user.username, password=password)
+    return user is not None and user.is_active
+
+
+def pooled_signin(email, password):
+    try:
+        user = User.objects.get(email=email)
+    except User.DoesNotExist:
+        user = None
+    return verify_password(user, password) and user.is_active
+
+
+class Command(BaseCommand):
+    help = "Benchmark signin password checks: throughput, latency and known/unknown email timing gap"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--attempts', type=int, default=80)
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent signin requests')
+        parser.add_argument('--unknown-ratio', type=float, default=0.25,
+                            help='Share of attempts that use an email with no account')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            for number in range(options['users']):
+                User.objects.create_user(username=f'signin{number}', email=f'signin{number}@example.com',
+                                         password=PASSWORD)
+            rng = random.Random(options['seed'])
+            attempts = [
+                f"nobody{number}@example.com" if rng.random() < options['unknown_ratio']
+                else f"signin{rng.randrange(options['users'])}@example.com"
+                for number in range(options['attempts'])
+            ]
+            self.stdout.write(f"{'path':<8} {'signins/s':>10} {'p50 ms':>9} {'p95 ms':>9} "
+                              f"{'known ms':>9} {'unknown ms':>11}")
+            for name, func in (('legacy', legacy_signin), ('pooled', pooled_signin)):
+                self._report(name, self._run(func, attempts, options['threads']))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _run(self, func, attempts, threads):
+        def attempt(email):
+            start = time.perf_counter()
+            try:
+                func(email, PASSWORD)
+            finally:
+                close_old_connections()
+            return email, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            timings = list(pool.map(attempt, attempts))
+        return timings, time.perf_counter() - start
+
+    def _report(self, name, result):
+        timings, wall = result
+        latencies = [elapsed * 1000 for _, elapsed in timings]
+        known = [elapsed * 1000 for email, elapsed in timings if email.startswith('signin')]
+        unknown = [elapsed * 1000 for email, elapsed in timings if email.startswith('nobody')]
+        p50, p95 = statistics.quantiles(latencies, n=100)[49], statistics.quantiles(latencies, n=100)[94]
+        self.stdout.write(
+            f"{name:<8} {len(timings) / wall:>10.1f} {p50:>9.1f} {p95:>9.1f} "
+            f"{statistics.median(known) if known else 0:>9.1f} {statistics.median(unknown) if unknown else 0:>11.1f}"
+        )
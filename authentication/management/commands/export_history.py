@@ -0,0 +1,50 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from authentication.export import iter_gzip, iter_history_records, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = "Stream interview and exam history as NDJSON (one user, or every user with --all)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='User id, username or email')
+        parser.add_argument('--all', action='store_true', help='Export every user')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--chunk-size', type=int, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        if bool(options['user']) == options['all']:
+            raise CommandError("Pass exactly one of --user or --all")
+
+        if options['all']:
+            users = User.objects.order_by('id').iterator(chunk_size=options['chunk_size'] or 200)
+        else:
+            lookup = Q(username=options['user']) | Q(email=options['user'])
+            if options['user'].isdigit():
+                lookup |= Q(pk=int(options['user']))
+            users = list(User.objects.filter(lookup)[:2])
+            if len(users) != 1:
+                raise CommandError(f"No single user matches {options['user']!r}")
+
+        def records():
+            for user in users:
+                yield from iter_history_records(user, options['chunk_size'])
+
+        chunks = iter_ndjson(records())
+        if options['gzip']:
+            chunks = iter_gzip(chunks)
+
+        handle = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                handle.write(chunk)
+        finally:
+            if options['output']:
+                handle.close()
+            else:
+                handle.flush()
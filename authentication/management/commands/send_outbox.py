@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from authentication.models import OutboundEmail
+from authentication.outbox import OutboxSender
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbound emails over a persistent connection, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the due emails and exit')
+        parser.add_argument('--batch-size', type=int, help='Emails claimed per batch')
+
+    def handle(self, *args, **options):
+        sender = OutboxSender(batch_size=options['batch_size'])
+        if not options['once']:
+            self.stdout.write("Sending outbox (Ctrl+C to stop)")
+            try:
+                sender.run_forever()
+            except KeyboardInterrupt:
+                sender.close()
+            return
+
+        claimed = 0
+        try:
+            while True:
+                count = sender.run_once()
+                claimed += count
+                if count < sender.batch_size:
+                    break
+        finally:
+            sender.close()
+        pending = OutboundEmail.objects.filter(status=OutboundEmail.PENDING).count()
+        self.stdout.write(f"Processed {claimed} emails, {pending} pending")
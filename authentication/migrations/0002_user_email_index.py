@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index auth_user.email, which signin, password reset and resend look users up by"""
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS authentication_user_email_idx ON auth_user (email);',
+            reverse_sql='DROP INDEX IF EXISTS authentication_user_email_idx;',
+        ),
+    ]
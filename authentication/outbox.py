@@ -0,0 +1,182 @@
+"""
+Outbound email outbox.
+
+Views queue mail with enqueue_email() instead of talking SMTP inside the request.
+OutboxSender delivers queued rows in batches over one persistent connection,
+either from a background thread of the web process (EMAIL_OUTBOX_WORKER='thread')
+or from `manage.py send_outbox` (EMAIL_OUTBOX_WORKER='command').
+
+Delivery is at-least-once: rows are claimed with a lease, and rows claimed by a
+sender that died mid-batch are picked up again once the lease expires.
+"""
+import functools
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_template(template_name):
+    return get_template(template_name)
+
+
+def render_email(template_name, context):
+    """Render an email template; the template is loaded and compiled once per process"""
+    return _compiled_template(template_name).render(context)
+
+
+def enqueue_email(subject, body, recipients, from_email):
+    """Queue an email for delivery and wake the background sender after commit"""
+    email = OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        recipients=list(recipients),
+    )
+    if settings.EMAIL_OUTBOX_WORKER == 'thread':
+        transaction.on_commit(wake_background_sender)
+    return email
+
+
+def retry_delay(attempts):
+    """Exponential backoff after the given number of failed attempts"""
+    return timedelta(seconds=min(
+        settings.EMAIL_OUTBOX_RETRY_BASE * 2 ** max(attempts - 1, 0),
+        settings.EMAIL_OUTBOX_RETRY_MAX,
+    ))
+
+
+class OutboxSender:
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+        self._connection = None
+
+    def claim(self):
+        """Lease up to batch_size due emails to this sender"""
+        now = timezone.now()
+        lease = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        due = (Q(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+               | Q(status=OutboundEmail.SENDING, locked_until__lt=now))
+        with transaction.atomic():
+            ids = list(
+                OutboundEmail.objects.select_for_update(skip_locked=True)
+                .filter(due).order_by('next_attempt_at')
+                .values_list('id', flat=True)[:self.batch_size]
+            )
+            if not ids:
+                return []
+            # Re-checking `due` keeps a concurrent sender (on databases without
+            # SKIP LOCKED) from stealing rows; the lease value identifies ours
+            OutboundEmail.objects.filter(due, id__in=ids).update(
+                status=OutboundEmail.SENDING, locked_until=lease, attempts=F('attempts') + 1,
+            )
+        return list(OutboundEmail.objects.filter(id__in=ids, locked_until=lease))
+
+    def run_once(self):
+        """Deliver one batch; returns the number of emails claimed"""
+        batch = self.claim()
+        if not batch:
+            return 0
+
+        sent, failed = [], []
+        for index, email in enumerate(batch):
+            try:
+                connection = self._open_connection()
+            except Exception as exc:
+                logger.warning(f"Email outbox could not connect: {exc}")
+                failed.extend((pending, exc) for pending in batch[index:])
+                break
+            try:
+                message = EmailMessage(email.subject, email.body, email.from_email, email.recipients,
+                                       connection=connection)
+                connection.send_messages([message])
+                sent.append(email.id)
+            except Exception as exc:
+                logger.warning(f"Email {email.id} delivery failed: {exc}")
+                failed.append((email, exc))
+                # The connection may be broken; reconnect for the next message
+                self.close()
+
+        now = timezone.now()
+        OutboundEmail.objects.filter(id__in=sent).update(
+            status=OutboundEmail.SENT, sent_at=now, locked_until=None, last_error='',
+        )
+        for email, exc in failed:
+            exhausted = email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+            OutboundEmail.objects.filter(id=email.id).update(
+                status=OutboundEmail.FAILED if exhausted else OutboundEmail.PENDING,
+                next_attempt_at=now + retry_delay(email.attempts),
+                locked_until=None,
+                last_error=str(exc)[:1000],
+            )
+        return len(batch)
+
+    def run_forever(self, stop_event=None, wake_event=None):
+        stop_event = stop_event or threading.Event()
+        wake_event = wake_event or threading.Event()
+        idle_since = None
+        while not stop_event.is_set():
+            wake_event.clear()
+            close_old_connections()
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception("Email outbox batch failed")
+                claimed = 0
+            if claimed >= self.batch_size:
+                continue
+
+            now = timezone.now()
+            if claimed:
+                idle_since = None
+            elif idle_since is None:
+                idle_since = now
+            elif (now - idle_since).total_seconds() >= settings.EMAIL_OUTBOX_IDLE_TIMEOUT:
+                self.close()
+            wake_event.wait(settings.EMAIL_OUTBOX_POLL_INTERVAL)
+        self.close()
+
+    def _open_connection(self):
+        if self._connection is None:
+            self._connection = get_connection(fail_silently=False)
+            self._connection.open()
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+_background_thread = None
+_background_wake = threading.Event()
+_background_lock = threading.Lock()
+
+
+def wake_background_sender():
+    """Start the in-process sender thread if needed and make it check the outbox now"""
+    global _background_thread
+    with _background_lock:
+        if _background_thread is None or not _background_thread.is_alive():
+            _background_thread = threading.Thread(
+                target=OutboxSender().run_forever,
+                kwargs={'wake_event': _background_wake},
+                name='email-outbox',
+                daemon=True,
+            )
+            _background_thread.start()
+    _background_wake.set()
@@ -0,0 +1,75 @@
+"""
+Password verification for signin.
+
+Hashing is CPU-bound, so it runs in a small bounded thread pool
+(SIGNIN_HASH_WORKERS threads, at most SIGNIN_HASH_QUEUE waiting) instead of on
+however many request threads happen to be signing in. Unknown users get a dummy
+hash so both paths take the same time. When the stored hash uses an outdated
+hasher or iteration count (see PASSWORD_HASHERS), it is re-hashed after the
+response instead of during it.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import close_old_connections
+
+from .caching import get_user_cache
+
+
+class HashPoolBusy(Exception):
+    """More signins are waiting for a hashing thread than SIGNIN_HASH_QUEUE allows"""
+
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=settings.SIGNIN_HASH_WORKERS, thread_name_prefix='password-hash')
+            _slots = threading.BoundedSemaphore(settings.SIGNIN_HASH_WORKERS + settings.SIGNIN_HASH_QUEUE)
+        return _pool, _slots
+
+
+def verify_password(user, password):
+    """
+    Check `password` against `user` (None for an unknown account) in the hashing
+    pool. Raises HashPoolBusy instead of queueing without bound.
+    """
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HashPoolBusy()
+    try:
+        return pool.submit(_check, user, password).result()
+    finally:
+        slots.release()
+
+
+def _check(user, password):
+    if user is None:
+        # Same work as a real check, so unknown emails can't be told apart by timing
+        make_password(password)
+        return False
+
+    needs_upgrade = []
+    valid = check_password(password, user.password, setter=lambda raw: needs_upgrade.append(True))
+    if valid and needs_upgrade:
+        _get_pool()[0].submit(_upgrade_hash, user.pk, user.password, password)
+    return valid
+
+
+def _upgrade_hash(user_id, old_encoded, password):
+    try:
+        encoded = make_password(password)
+        # Only replace the hash we verified; a password change in between wins
+        updated = get_user_model()._default_manager.filter(pk=user_id, password=old_encoded).update(password=encoded)
+        if updated:
+            get_user_cache().invalidate(user_id)
+    finally:
+        close_old_connections()
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .caching import get_revoked_token_index, get_user_cache
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Password changes and deactivation are plain saves. Invalidate now, and again
+    # on commit in case another request re-cached the old row in between
+    user_id = instance.pk
+    get_user_cache().invalidate(user_id)
+    transaction.on_commit(lambda: get_user_cache().invalidate(user_id))
+
+
+@receiver(user_logged_out)
+def invalidate_user_on_logout(sender, request, user, **kwargs):
+    if user is not None and user.pk is not None:
+        get_user_cache().invalidate(user.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def publish_blacklisted_token(sender, instance, created, **kwargs):
+    if created:
+        index = get_revoked_token_index()
+        index.add(instance.token.jti)
+        # Other processes resync their bloom filter once the row is visible to them
+        transaction.on_commit(index.mark_changed)
@@ -1,3 +1,7 @@
+import os
+import threading
+import time
+from django.conf import settings
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
@@ -8,7 +12,28 @@ from django.utils import timezone
 from datetime import timedelta
 from rest_framework.test import APITestCase
 from rest_framework import status
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
+from . import caching
+from .caching import BloomFilter, CachedBlacklistRefreshToken, CachedJWTAuthentication, get_user_cache
+from .models import OutboundEmail
+from .outbox import OutboxSender, enqueue_email
+from . import passwords, throttling
+from .export import iter_history_records
+from aiinterview.models import Interview, Responses, Result
+from aptitude.models import Exam, QuestionHistory
+import gzip
+import json
+from .throttling import AuthenticationThrottle, LoginIPThrottle
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from unittest import mock
 
 class AuthViewsTestCase(TestCase):
     def setUp(self):
@@ -141,3 +166,316 @@ class AuthenticationTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertNotIn('refresh_token', response.cookies)
         self.assertNotIn('access_token', response.cookies)
+
+class AuthCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_user_cache().clear_local()
+        # The test cache is locmem; treat it as the shared tier
+        shared = mock.patch.object(caching, 'shared_cache_configured', return_value=True)
+        shared.start()
+        self.addCleanup(shared.stop)
+        self.user = User.objects.create_user(
+            username='cacheuser',
+            email='cache@example.com',
+            password='testpass123',
+            is_active=True
+        )
+        self.access = RefreshToken.for_user(self.user).access_token
+
+    def test_user_served_from_cache(self):
+        auth = CachedJWTAuthentication()
+        self.assertEqual(auth.get_user(self.access).pk, self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(auth.get_user(self.access).email, 'cache@example.com')
+        get_user_cache().clear_local()
+        with self.assertNumQueries(0):
+            auth.get_user(self.access)
+
+    def test_deactivation_and_password_change_invalidate(self):
+        auth = CachedJWTAuthentication()
+        auth.get_user(self.access)
+        self.user.set_password('another-pass')
+        self.user.save()
+        self.assertTrue(auth.get_user(self.access).check_password('another-pass'))
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            auth.get_user(self.access)
+
+    def test_password_hash_is_not_cached(self):
+        get_user_cache().get(self.user.pk)
+        entry = caches[settings.AUTH_CACHE_ALIAS].get(f'auth:user:{self.user.pk}')
+        self.assertNotIn(self.user.password, entry['values'])
+        user = get_user_cache().get(self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('testpass123'))
+
+    def test_revoke_claim_checked_against_the_digest(self):
+        # simplejwt modules keep the api_settings object they imported, so patch that one
+        with mock.patch.object(caching.api_settings, 'CHECK_REVOKE_TOKEN', True):
+            access = RefreshToken.for_user(self.user).access_token
+            auth = CachedJWTAuthentication()
+            self.assertEqual(auth.get_user(access).pk, self.user.pk)
+            self.user.set_password('another-pass')
+            self.user.save()
+            with self.assertRaises(AuthenticationFailed):
+                auth.get_user(access)
+
+    def test_blacklisted_refresh_token_rejected(self):
+        revoked = RefreshToken.for_user(self.user)
+        CachedBlacklistRefreshToken(str(revoked)).blacklist()
+        with self.assertRaises(TokenError):
+            CachedBlacklistRefreshToken(str(revoked))
+
+        valid = str(RefreshToken.for_user(self.user))
+        CachedBlacklistRefreshToken(valid)
+        with self.assertNumQueries(0):
+            CachedBlacklistRefreshToken(valid)
+
+    def test_session_auth_hash_needs_no_query(self):
+        get_user_cache().get(self.user.pk)
+        user = get_user_cache().get(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.get_session_auth_hash(), self.user.get_session_auth_hash())
+
+    def test_process_local_cache_skips_shared_tier(self):
+        with mock.patch.object(caching, 'shared_cache_configured', return_value=False):
+            get_user_cache().get(self.user.pk)
+            self.assertIsNone(caches[settings.AUTH_CACHE_ALIAS].get(f'auth:user:{self.user.pk}'))
+            get_user_cache().clear_local()
+            with self.assertNumQueries(1):
+                get_user_cache().get(self.user.pk)
+
+            revoked = RefreshToken.for_user(self.user)
+            revoked.blacklist()
+            with mock.patch.object(caching.RevokedTokenIndex, 'might_be_revoked', return_value=False):
+                with self.assertRaises(TokenError):
+                    CachedBlacklistRefreshToken(str(revoked))
+
+    def test_revoked_index_resyncs_after_interval(self):
+        index = caching.RevokedTokenIndex(sync_interval=30)
+        revoked = RefreshToken.for_user(self.user)
+        jti = revoked.payload['jti']
+        self.assertFalse(index.might_be_revoked(jti))
+        # Blacklisted elsewhere: the generation marker never changes in this cache
+        revoked.blacklist()
+        self.assertFalse(index.might_be_revoked(jti))
+        with mock.patch.object(caching.time, 'monotonic', return_value=time.monotonic() + 31):
+            self.assertTrue(index.might_be_revoked(jti))
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [f'jti-{i}' for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f'other-{i}' in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+class CountingEmailBackend(LocmemEmailBackend):
+    """locmem backend that counts connections and fails the first `failures` sends"""
+    opened = 0
+    failures = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if CountingEmailBackend.failures:
+            CountingEmailBackend.failures -= 1
+            raise ConnectionError('SMTP unavailable')
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='authentication.tests.CountingEmailBackend', EMAIL_OUTBOX_WORKER='command')
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        CountingEmailBackend.opened = 0
+        CountingEmailBackend.failures = 0
+
+    def test_forgot_password_queues_email(self):
+        User.objects.create_user(username='outbox', email='outbox@example.com', password='pass12345')
+        response = self.client.post(reverse('forgot_password'), {'email': 'outbox@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.get().recipients, ['outbox@example.com'])
+
+        call_command('send_outbox', '--once', stdout=open(os.devnull, 'w'))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Reset your password')
+
+    def test_batches_share_one_connection(self):
+        for i in range(120):
+            enqueue_email(f'Message {i}', 'body', [f'user{i}@example.com'], 'noreply@hirevision.com')
+        call_command('send_outbox', '--once', '--batch-size', '50', stdout=open(os.devnull, 'w'))
+        self.assertEqual(len(mail.outbox), 120)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.SENT).count(), 120)
+
+    def test_failed_sends_are_retried_with_backoff(self):
+        CountingEmailBackend.failures = 2
+        for i in range(3):
+            enqueue_email(f'Message {i}', 'body', [f'user{i}@example.com'], 'noreply@hirevision.com')
+        sender = OutboxSender()
+        sender.run_once()
+        self.assertEqual(len(mail.outbox), 1)
+        retrying = OutboundEmail.objects.filter(status=OutboundEmail.PENDING)
+        self.assertEqual(retrying.count(), 2)
+        self.assertTrue(all(email.next_attempt_at > timezone.now() for email in retrying))
+
+        # Not due yet; once the backoff has passed they are delivered
+        self.assertEqual(sender.run_once(), 0)
+        retrying.update(next_attempt_at=timezone.now())
+        sender.run_once()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(set(OutboundEmail.objects.values_list('attempts', flat=True)), {1, 2})
+
+    def test_expired_lease_is_redelivered(self):
+        email = enqueue_email('Lost', 'body', ['lost@example.com'], 'noreply@hirevision.com')
+        OutboundEmail.objects.filter(id=email.id).update(
+            status=OutboundEmail.SENDING, attempts=1, locked_until=timezone.now() - timedelta(seconds=1))
+        OutboxSender().run_once()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(OutboundEmail.objects.get(id=email.id).status, OutboundEmail.SENT)
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttling._local_blocks.clear()
+        self.now = 960.0  # start of a window
+
+    def _request(self, email, ip='10.0.0.1'):
+        request = APIRequestFactory().post('/auth/signin/', {'email': email}, format='json', REMOTE_ADDR=ip)
+        return Request(request, parsers=[JSONParser()])
+
+    def _allow(self, throttle_class, request):
+        throttle = throttle_class()
+        throttle.timer = lambda: self.now
+        return throttle.allow_request(request, None), throttle
+
+    def test_email_limit_and_sliding_window(self):
+        request = self._request('Victim@Example.com')
+        results = [self._allow(AuthenticationThrottle, request)[0] for _ in range(6)]
+        self.assertEqual(results, [True] * 5 + [False])
+        allowed, throttle = self._allow(AuthenticationThrottle, request)
+        self.assertFalse(allowed)
+        self.assertGreater(throttle.wait(), 0)
+
+        # Halfway into the next window half of the previous attempts still count
+        throttling._local_blocks.clear()
+        self.now += 60 * 1.5
+        self.assertEqual([self._allow(AuthenticationThrottle, request)[0] for _ in range(3)], [True, True, False])
+
+    def test_blocked_keys_are_rejected_locally(self):
+        request = self._request('victim@example.com')
+        for _ in range(6):
+            self._allow(AuthenticationThrottle, request)
+        with mock.patch.object(type(caches['default']), 'incr') as incr:
+            allowed, _ = self._allow(AuthenticationThrottle, request)
+        self.assertFalse(allowed)
+        incr.assert_not_called()
+
+    def test_non_string_email_is_not_keyed(self):
+        self.assertIsNone(AuthenticationThrottle().get_cache_key(self._request(123), None))
+        self.assertIsNone(AuthenticationThrottle().get_cache_key(self._request(['a@example.com']), None))
+
+    def test_ip_limit_spans_emails(self):
+        results = [self._allow(LoginIPThrottle, self._request(f'user{i}@example.com'))[0] for i in range(31)]
+        self.assertEqual(results.count(False), 1)
+        self.assertTrue(self._allow(LoginIPThrottle, self._request('user0@example.com', ip='10.0.0.2'))[0])
+
+
+class PasswordVerificationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='hashuser', email='hash@example.com', password='pass12345')
+
+    def test_valid_invalid_and_unknown(self):
+        self.assertTrue(passwords.verify_password(self.user, 'pass12345'))
+        self.assertFalse(passwords.verify_password(self.user, 'wrong'))
+        self.assertFalse(passwords.verify_password(None, 'pass12345'))
+
+    def test_outdated_hash_upgraded_after_check(self):
+        from django.contrib.auth.hashers import make_password
+        User.objects.filter(pk=self.user.pk).update(password=make_password('pass12345', hasher='pbkdf2_sha1'))
+        self.user.refresh_from_db()
+        old = self.user.password
+        passwords._upgrade_hash(self.user.pk, 'stale-hash', 'pass12345')
+        self.assertEqual(User.objects.get(pk=self.user.pk).password, old)
+
+        with mock.patch.object(passwords, '_upgrade_hash') as upgrade:
+            self.assertTrue(passwords._check(self.user, 'pass12345'))
+            self.assertTrue(self._wait_for(lambda: upgrade.called))
+        upgrade.assert_called_once_with(self.user.pk, old, 'pass12345')
+
+        passwords._upgrade_hash(self.user.pk, old, 'pass12345')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        self.assertTrue(self.user.check_password('pass12345'))
+
+    def test_busy_pool_is_rejected(self):
+        with mock.patch.object(passwords, '_get_pool', return_value=(None, threading.BoundedSemaphore(0))):
+            with self.assertRaises(passwords.HashPoolBusy):
+                passwords.verify_password(self.user, 'pass12345')
+
+    def _wait_for(self, predicate, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.01)
+        return False
+
+
+class HistoryExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', email='export@example.com', password='pass12345')
+        for number in range(3):
+            interview = Interview.objects.create(user=self.user, candidate_name='Ex Porter', resume_content='cv')
+            for question_number in (2, 1):
+                Responses.objects.create(interview=interview, question=f'Q{question_number}', answer='A',
+                                         question_number=question_number)
+            if number:
+                Result.objects.create(interview=interview, final_score=7.5)
+        exam = Exam.objects.create(user=self.user, score=3)
+        QuestionHistory.objects.create(user=self.user, exam=exam, question='2+2?', options=['3', '4'],
+                                       correct_answer='4', explanation='math')
+        self.access = str(RefreshToken.for_user(self.user).access_token)
+
+    def _get(self, url, **extra):
+        return self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {self.access}', **extra)
+
+    def test_streams_ndjson(self):
+        response = self._get(reverse('export_history'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        types = [record['type'] for record in records]
+        self.assertEqual(types.count('interview'), 3)
+        self.assertEqual(types.count('response'), 6)
+        self.assertEqual(types.count('result'), 2)
+        self.assertEqual(types.count('question'), 1)
+        self.assertEqual(records[0]['email'], 'export@example.com')
+        self.assertEqual([r['question_number'] for r in records if r['type'] == 'response'][:2], [1, 2])
+
+    def test_gzip(self):
+        response = self._get(reverse('export_history') + '?compression=gzip')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 1 + 3 + 6 + 2 + 1 + 1)
+
+    def test_other_users_need_staff(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        response = self._get(reverse('export_history') + f'?user_id={other.pk}')
+        self.assertEqual(response.status_code, 403)
+
+    def test_query_count_is_per_chunk(self):
+        with self.assertNumQueries(4):
+            records = list(iter_history_records(self.user, chunk_size=100))
+        self.assertEqual(len(records), 14)
+        # one query per table, plus one prefetch per chunk of 2 interviews
+        with self.assertNumQueries(5):
+            list(iter_history_records(self.user, chunk_size=2))
@@ -1,14 +1,118 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
 from rest_framework.throttling import SimpleRateThrottle
 
-class AuthenticationThrottle(SimpleRateThrottle):
-    rate = '5/minute'
+# Per-process fast-reject tier: throttle key -> timer() value until which the
+# key is known to be over its limit, so repeat offenders skip the cache
+_local_blocks = {}
+_local_blocks_lock = threading.Lock()
+LOCAL_BLOCKS_MAX = 10000
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding-window rate limit kept in a shared cache (THROTTLE_CACHE_ALIAS).
+
+    Each key has one atomic counter per fixed window; the request count is
+    estimated as previous_window * (share of it still inside the sliding
+    window) + current_window. Keys found over the limit are also remembered
+    in-process and rejected without a cache round trip until they cool down.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        self._wait = None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        blocked_until = _local_blocks.get(self.key)
+        if blocked_until is not None:
+            if blocked_until > now:
+                self._wait = blocked_until - now
+                return False
+            with _local_blocks_lock:
+                _local_blocks.pop(self.key, None)
+
+        window = int(now // self.duration)
+        elapsed = now - window * self.duration
+        current = self._increment(f'{self.key}:{window}')
+        previous = self.cache.get(f'{self.key}:{window - 1}', 0)
+
+        if previous * (1 - elapsed / self.duration) + current <= self.num_requests:
+            return True
+
+        self._wait = self._retry_after(previous, current, elapsed)
+        self._block_locally(now + self._wait, now)
+        return False
+
+    def wait(self):
+        return self._wait
+
+    def _increment(self, key):
+        # incr is atomic on Redis/Memcached/locmem; add() creates the counter once
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, 0, timeout=self.duration * 2)
+            try:
+                return self.cache.incr(key)
+            except ValueError:
+                # evicted in between; start over
+                self.cache.set(key, 1, timeout=self.duration * 2)
+                return 1
+
+    def _retry_after(self, previous, current, elapsed):
+        """Seconds until one more request fits, assuming no further attempts"""
+        limit = self.num_requests
+        if current + 1 <= limit and previous:
+            needed = self.duration * (1 - (limit - current - 1) / previous)
+            return max(needed - elapsed, 0.0)
+        needed = self.duration * (1 - (limit - 1) / current)
+        return (self.duration - elapsed) + max(needed, 0.0)
+
+    def _block_locally(self, until, now):
+        with _local_blocks_lock:
+            if len(_local_blocks) >= LOCAL_BLOCKS_MAX:
+                for key in [key for key, deadline in _local_blocks.items() if deadline <= now]:
+                    del _local_blocks[key]
+                if len(_local_blocks) >= LOCAL_BLOCKS_MAX:
+                    _local_blocks.clear()
+            _local_blocks[self.key] = until
+
+
+class AuthenticationThrottle(SlidingWindowThrottle):
+    """Login attempts per submitted email"""
     scope = 'auth_login'
 
     def get_cache_key(self, request, view):
-        if not request.data.get('email'):
+        email = request.data.get('email')
+        if not email or not isinstance(email, str):
             return None
-        
+
+        # Hashed so addresses don't end up in cache keys
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': ident
+        }
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    """Login attempts per client IP, whatever emails it tries"""
+    scope = 'auth_login_ip'
+
+    def get_cache_key(self, request, view):
         return self.cache_format % {
             'scope': self.scope,
-            'ident': request.data.get('email')
+            'ident': self.get_ident(request)
         }
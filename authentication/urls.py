@@ -14,6 +14,7 @@ urlpatterns = [
     path('forgot-password/', views.forgot_password, name='forgot_password'),
     path('resend-verification-link/', views.resend_verification_link, name='resend_verification_link'),
     path('reset-password/<uidb64>/<token>/', views.reset_password, name='reset_password'),
+    path('export/', views.export_history, name='export_history'),
     # path('get-csrf-token/', views.get_csrf_token, name='get_csrf_token'),
     # path('verify-token/', views.verify_token, name='verify_token'),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
@@ -1,9 +1,7 @@
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate, login, logout
-from django.core.mail import send_mail
+from django.contrib.auth import login, logout
 from django.contrib.auth.tokens import default_token_generator
 from django.shortcuts import render
-from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.utils import timezone
@@ -18,11 +16,15 @@ from rest_framework import status
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken, TokenError
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from .throttling import AuthenticationThrottle
+from .throttling import AuthenticationThrottle, LoginIPThrottle
+from .caching import CachedBlacklistRefreshToken
+from .outbox import enqueue_email, render_email
+from .passwords import HashPoolBusy, verify_password
+from .export import export_history as export_history_chunks
 from rest_framework.decorators import throttle_classes
 import logging
 from .serializers import UserSerializer
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 
 logger = logging.getLogger(__name__)
 
@@ -67,11 +69,11 @@ def signup(request):
     uid = urlsafe_base64_encode(force_bytes(user.pk))
     verification_link = request.build_absolute_uri(f'/auth/email-verification/{uid}/{token}/')
     email_subject = 'Verify your email address'
-    email_body = render_to_string('email_verification.html', {
+    email_body = render_email('email_verification.html', {
         'user': user,
         'verification_link': verification_link
     })
-    send_mail(email_subject, email_body, 'noreply@hirevision.com', [email])
+    enqueue_email(email_subject, email_body, [email], 'noreply@hirevision.com')
 
     return Response({'message': 'Signup successful. Please verify your email.'}, status=status.HTTP_201_CREATED)
 
@@ -116,17 +118,17 @@ def resend_verification_link(request):
     uid = urlsafe_base64_encode(force_bytes(user.pk))
     verification_link = request.build_absolute_uri(f'/auth/email-verification/{uid}/{token}/')
     email_subject = 'Verify your email address'
-    email_body = render_to_string('email_verification.html', {
+    email_body = render_email('email_verification.html', {
         'user': user,
         'verification_link': verification_link
     })
-    send_mail(email_subject, email_body, 'noreply@hirevision.com', [email])
+    enqueue_email(email_subject, email_body, [email], 'noreply@hirevision.com')
 
     return Response({'message': 'Verification link resent. Please check your email.'}, status=status.HTTP_200_OK)
 
 @csrf_exempt
 @api_view(['POST', 'OPTIONS'])
-@throttle_classes([AuthenticationThrottle])
+@throttle_classes([AuthenticationThrottle, LoginIPThrottle])
 def signin(request):
     # Handle OPTIONS request explicitly
     if request.method == 'OPTIONS':
@@ -148,14 +150,27 @@ def signin(request):
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
+            user = None
+
+        # One lookup; the hash is checked in the hashing pool (a dummy hash for unknown emails)
+        try:
+            valid = verify_password(user, password)
+        except HashPoolBusy:
+            response = Response(
+                {'error': 'Too many sign-in attempts in progress. Please try again.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            response['Retry-After'] = '1'
+            return response
+
+        if user is None:
             logger.warning(f"Failed login attempt for non-existent email: {email}")
             return Response(
                 {'error': 'Invalid credentials.'}, 
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        user = authenticate(username=user.username, password=password)
-        if user is not None and user.is_active:
+        if valid and user.is_active:
             refresh = RefreshToken.for_user(user)
             user_serializer = UserSerializer(user)
             
@@ -206,7 +221,7 @@ def signout(request):
     try:
         refresh_token = request.COOKIES.get('refresh_token')
         if (refresh_token):
-            token = RefreshToken(refresh_token)
+            token = CachedBlacklistRefreshToken(refresh_token)
             token.blacklist()
             logger.info(f"User signed out successfully")
     except TokenError:
@@ -270,11 +285,11 @@ def forgot_password(request):
     uid = urlsafe_base64_encode(force_bytes(user.pk))
     reset_link = request.build_absolute_uri(f'/auth/reset-password/{uid}/{token}/')
     email_subject = 'Reset your password'
-    email_body = render_to_string('password_reset_email.html', {
+    email_body = render_email('password_reset_email.html', {
         'user': user,
         'reset_link': reset_link
     })
-    send_mail(email_subject, email_body, 'noreply@hirevision.com', [email])
+    enqueue_email(email_subject, email_body, [email], 'noreply@hirevision.com')
 
     return Response({'message': 'Password reset email sent. Please check your email.'}, status=status.HTTP_200_OK)
 
@@ -301,4 +316,32 @@ def reset_password(request, uidb64, token):
         user.save()
         return Response({'message': 'Password reset successfully.'}, status=status.HTTP_200_OK)
     else:
-        return Response({'error': 'Invalid reset link.'}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response({'error': 'Invalid reset link.'}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_history(request):
+    """Stream the user's interviews, responses, results and exams as NDJSON (optionally gzipped)"""
+    user = request.user
+    user_id = request.query_params.get('user_id')
+    if user_id:
+        if not request.user.is_staff:
+            return Response({'error': 'Only staff can export another user\'s history.'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            user = User.objects.get(pk=user_id)
+        except (User.DoesNotExist, ValueError):
+            return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    compression = request.query_params.get('compression')
+    if compression not in (None, 'gzip'):
+        return Response({'error': 'compression must be "gzip" if given.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    filename = f'hirevision-history-{user.pk}.ndjson'
+    if compression == 'gzip':
+        filename += '.gz'
+    response = StreamingHttpResponse(
+        export_history_chunks(user, compression=compression),
+        content_type='application/gzip' if compression == 'gzip' else 'application/x-ndjson'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,117 @@
+"""
+Minimal in-process Prometheus metrics.
+
+Histograms and counters live in this worker process; scrape every worker (or
+run a single worker) to see the full picture.
+"""
+import bisect
+import hmac
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+class Histogram:
+    def __init__(self, name, documentation, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = list(zip(self.label_names, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['counts']):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", bound)])} {cumulative}')
+                lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", "+Inf")])} {series["count"]}')
+                lines.append(f'{self.name}_sum{_format_labels(labels)} {series["sum"]}')
+                lines.append(f'{self.name}_count{_format_labels(labels)} {series["count"]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(list(zip(self.label_names, key)))} {value}')
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'hirevision_request_duration_seconds', 'Request latency by endpoint',
+    ['endpoint', 'method', 'status'],
+)
+STAGE_DURATION = Histogram(
+    'hirevision_stage_duration_seconds', 'Time spent per stage (db, llm, nlp, pdf) within a request',
+    ['endpoint', 'stage'],
+)
+LLM_TOKENS = Counter(
+    'hirevision_llm_tokens_total', 'LLM tokens by model and direction', ['model', 'direction'],
+)
+LLM_CALLS = Counter(
+    'hirevision_llm_calls_total', 'LLM invocations by model and outcome', ['model', 'outcome'],
+)
+
+REGISTRY = [REQUEST_DURATION, STAGE_DURATION, LLM_CALLS, LLM_TOKENS]
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Prometheus text exposition endpoint; closed unless METRICS_AUTH_TOKEN is set"""
+    token = settings.METRICS_AUTH_TOKEN
+    # Bytes, since compare_digest rejects non-ASCII str and the header is client-controlled
+    supplied = request.headers.get('Authorization', '').encode()
+    if not token or not hmac.compare_digest(supplied, f'Bearer {token}'.encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
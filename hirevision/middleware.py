@@ -0,0 +1,83 @@
+import json
+import logging
+from contextlib import ExitStack
+
+from django.db import connections
+
+from . import metrics, tracing
+
+logger = logging.getLogger('hirevision.requests')
+
+
+class RequestTimingMiddleware:
+    """
+    Traces each request: DB queries, LLM calls and any `tracing.span()` stages
+    (PDF extraction, NLP) are collected, returned as a Server-Timing header,
+    logged as one JSON line, and fed into the /metrics histograms.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace = tracing.RequestTrace()
+        token = tracing.activate(trace)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(trace.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            tracing.deactivate(token)
+
+        total = trace.elapsed()
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.url_name if match and match.url_name else 'unmatched'
+        stages = trace.stage_totals()
+
+        response['Server-Timing'] = self._server_timing(stages, total)
+        self._record_metrics(endpoint, request.method, response.status_code, total, stages, trace)
+        logger.info(json.dumps({
+            'event': 'request',
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 2),
+            'stages': {
+                stage: {'duration_ms': round(values['duration'] * 1000, 2), 'count': values['count']}
+                for stage, values in stages.items()
+            },
+            'llm_calls': [
+                {
+                    'model': item.get('model'),
+                    'input_tokens': item.get('input_tokens', 0),
+                    'output_tokens': item.get('output_tokens', 0),
+                    'duration_ms': round(item['duration'] * 1000, 2),
+                    **({'error': item['error']} if 'error' in item else {}),
+                }
+                for item in trace.spans if item['stage'] == 'llm'
+            ],
+            **trace.tags,
+        }))
+        return response
+
+    def _server_timing(self, stages, total):
+        entries = [
+            f'{stage};dur={values["duration"] * 1000:.1f};desc="{values["count"]}x"'
+            for stage, values in sorted(stages.items())
+        ]
+        entries.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(entries)
+
+    def _record_metrics(self, endpoint, method, status, total, stages, trace):
+        metrics.REQUEST_DURATION.observe(total, endpoint=endpoint, method=method, status=status)
+        for stage, values in stages.items():
+            metrics.STAGE_DURATION.observe(values['duration'], endpoint=endpoint, stage=stage)
+        for item in trace.spans:
+            if item['stage'] != 'llm':
+                continue
+            model = item.get('model') or 'unknown'
+            metrics.LLM_CALLS.inc(model=model, outcome='error' if 'error' in item else 'ok')
+            metrics.LLM_TOKENS.inc(item.get('input_tokens', 0), model=model, direction='input')
+            metrics.LLM_TOKENS.inc(item.get('output_tokens', 0), model=model, direction='output')
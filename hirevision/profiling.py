@@ -0,0 +1,260 @@
+"""
+Opt-in profiling of slow requests.
+
+SlowRequestProfilerMiddleware profiles every request while it runs and keeps
+the profile only when the request exceeds SLOW_REQUEST_THRESHOLD_MS. Two modes:
+
+- 'sample': a single background thread samples the stacks of in-flight request
+  threads every SLOW_REQUEST_SAMPLE_INTERVAL_MS (cheap, safe with threaded servers)
+- 'cprofile': deterministic cProfile of the request thread (exact, but slower)
+
+Kept profiles are JSON files in SLOW_REQUEST_PROFILE_DIR, a ring buffer of at
+most SLOW_REQUEST_PROFILE_LIMIT files; see `manage.py slow_requests`.
+"""
+import cProfile
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import tracing
+
+MAX_FUNCTIONS = 200  # per stored profile
+MAX_STACKS = 200
+
+
+def _function_key(code):
+    return f'{code.co_filename}:{code.co_firstlineno}({code.co_name})'
+
+
+class _Capture:
+    """Samples collected for one request thread"""
+
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.samples = 0
+        self.self_counts = Counter()
+        self.cumulative_counts = Counter()
+        self.stacks = Counter()
+
+    def record(self, frame):
+        stack = []
+        while frame is not None:
+            stack.append(_function_key(frame.f_code))
+            frame = frame.f_back
+        if not stack:
+            return
+        self.samples += 1
+        self.self_counts[stack[0]] += 1
+        # count each function once per sample, even when it recurses
+        self.cumulative_counts.update(set(stack))
+        self.stacks[';'.join(reversed(stack))] += 1
+
+
+class StackSampler:
+    """One daemon thread sampling the stacks of every registered request thread"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._captures = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start_capture(self, thread_id):
+        capture = _Capture(thread_id)
+        with self._lock:
+            self._captures[id(capture)] = capture
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='slow-request-sampler', daemon=True)
+                self._thread.start()
+        return capture
+
+    def stop_capture(self, capture):
+        with self._lock:
+            self._captures.pop(id(capture), None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                captures = list(self._captures.values())
+            if not captures:
+                continue
+            frames = sys._current_frames()
+            for capture in captures:
+                frame = frames.get(capture.thread_id)
+                if frame is not None:
+                    capture.record(frame)
+
+
+class ProfileStore:
+    """Bounded on-disk ring buffer of profile JSON files (oldest evicted first)"""
+
+    def __init__(self, directory, limit):
+        self.directory = Path(directory)
+        self.limit = limit
+
+    def write(self, profile):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = f"{time.time_ns()}-{profile['endpoint']}.json"
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-', suffix='.json')
+        with os.fdopen(fd, 'w') as handle:
+            json.dump(profile, handle)
+        os.replace(tmp_path, self.directory / name)
+        self._evict()
+        return self.directory / name
+
+    def paths(self):
+        """Stored profile paths, oldest first"""
+        if not self.directory.is_dir():
+            return []
+        return sorted(self.directory.glob('[0-9]*.json'))
+
+    def load(self):
+        for path in self.paths():
+            try:
+                with open(path) as handle:
+                    yield path, json.load(handle)
+            except (OSError, ValueError):
+                # evicted by another worker or half-written; skip it
+                continue
+
+    def _evict(self):
+        paths = self.paths()
+        for path in paths[:max(len(paths) - self.limit, 0)]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def get_profile_store():
+    return ProfileStore(settings.SLOW_REQUEST_PROFILE_DIR, settings.SLOW_REQUEST_PROFILE_LIMIT)
+
+
+def aggregate_hot_functions(profiles, sort='self', limit=20):
+    """Sum per-function self/cumulative seconds across profiles, hottest first"""
+    totals = {}
+    for profile in profiles:
+        for key, stats in profile.get('functions', {}).items():
+            entry = totals.setdefault(key, {'function': key, 'self': 0.0, 'cumulative': 0.0, 'profiles': 0})
+            entry['self'] += stats['self']
+            entry['cumulative'] += stats['cumulative']
+            entry['profiles'] += 1
+    return sorted(totals.values(), key=lambda entry: entry[sort], reverse=True)[:limit]
+
+
+def _sampled_functions(capture, duration):
+    """Sample counts -> estimated seconds per function (share of samples x request duration)"""
+    per_sample = duration / capture.samples
+    return {
+        key: {
+            'self': round(capture.self_counts.get(key, 0) * per_sample, 6),
+            'cumulative': round(count * per_sample, 6),
+            'calls': None,
+        }
+        for key, count in capture.cumulative_counts.most_common(MAX_FUNCTIONS)
+    }
+
+
+def _cprofile_functions(profiler):
+    stats = pstats.Stats(profiler)
+    functions = {}
+    for (filename, lineno, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        functions[f'{filename}:{lineno}({name})'] = {
+            'self': round(tottime, 6), 'cumulative': round(cumtime, 6), 'calls': calls,
+        }
+    top = sorted(functions.items(), key=lambda item: item[1]['cumulative'], reverse=True)[:MAX_FUNCTIONS]
+    return dict(top)
+
+
+class SlowRequestProfilerMiddleware:
+    """
+    Keeps a profile of any request slower than SLOW_REQUEST_THRESHOLD_MS, tagged
+    with endpoint and interview_id. Disabled unless SLOW_REQUEST_PROFILING is set.
+    """
+
+    _sampler = None
+    _sampler_lock = threading.Lock()
+
+    def __init__(self, get_response):
+        if not settings.SLOW_REQUEST_PROFILING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.threshold = settings.SLOW_REQUEST_THRESHOLD_MS / 1000
+        self.mode = settings.SLOW_REQUEST_PROFILER
+        self.interval = settings.SLOW_REQUEST_SAMPLE_INTERVAL_MS / 1000
+        self.store = get_profile_store()
+
+    @classmethod
+    def sampler(cls, interval):
+        with cls._sampler_lock:
+            if cls._sampler is None:
+                cls._sampler = StackSampler(interval)
+            return cls._sampler
+
+    def __call__(self, request):
+        if self.mode == 'cprofile':
+            return self._call_cprofile(request)
+        return self._call_sampled(request)
+
+    def _call_sampled(self, request):
+        sampler = self.sampler(self.interval)
+        capture = sampler.start_capture(threading.get_ident())
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop_capture(capture)
+        duration = time.perf_counter() - start
+        if duration >= self.threshold and capture.samples:
+            self._save(request, response, duration, {
+                'functions': _sampled_functions(capture, duration),
+                'stacks': dict(capture.stacks.most_common(MAX_STACKS)),
+                'samples': capture.samples,
+            })
+        return response
+
+    def _call_cprofile(self, request):
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiler is active on this thread
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - start
+        if duration >= self.threshold:
+            self._save(request, response, duration, {'functions': _cprofile_functions(profiler)})
+        return response
+
+    def _save(self, request, response, duration, data):
+        match = getattr(request, 'resolver_match', None)
+        trace = tracing.current_trace()
+        interview_id = trace.tags.get('interview_id') if trace else None
+        if interview_id is None and match:
+            interview_id = match.kwargs.get('interview_id')
+        self.store.write({
+            'endpoint': match.url_name if match and match.url_name else 'unmatched',
+            'interview_id': str(interview_id) if interview_id is not None else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'mode': self.mode,
+            'captured_at': datetime.now(timezone.utc).isoformat(),
+            **data,
+        })
@@ -49,9 +49,12 @@ INSTALLED_APPS = [
     'corsheaders',  # Added CORS headers
     'rest_framework_simplejwt.token_blacklist',  # Added token_blacklist
     'aiinterview',  # Added aiinterview
+    'analytics',  # Score rollups for cohort analytics
 ]
 
 MIDDLEWARE = [
+    'hirevision.middleware.RequestTimingMiddleware',  # Server-Timing, request log line, /metrics
+    'hirevision.profiling.SlowRequestProfilerMiddleware',  # no-op unless SLOW_REQUEST_PROFILING=True
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
 'whitenoise.middleware.WhiteNoiseMiddleware',  # Add whitenoise for static files
@@ -113,6 +116,21 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The first hasher is used for new hashes; older hashes are upgraded after the next signin.
+# e.g. PASSWORD_HASHERS=django.contrib.auth.hashers.Argon2PasswordHasher,django.contrib.auth.hashers.PBKDF2PasswordHasher
+# (Argon2 needs the argon2-cffi package)
+PASSWORD_HASHERS = [hasher for hasher in os.getenv('PASSWORD_HASHERS', ','.join([
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+])).split(',') if hasher]
+
+# Signin password checks run in a bounded pool (see authentication/passwords.py)
+SIGNIN_HASH_WORKERS = int(os.getenv('SIGNIN_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+SIGNIN_HASH_QUEUE = int(os.getenv('SIGNIN_HASH_QUEUE', 32))  # waiting signins before answering 503
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -150,14 +168,61 @@ EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 
+# Outbound email outbox (see authentication/outbox.py)
+EMAIL_OUTBOX_WORKER = os.getenv('EMAIL_OUTBOX_WORKER', 'thread')  # 'thread' (in-process) or 'command' (manage.py send_outbox)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 8))
+EMAIL_OUTBOX_RETRY_BASE = float(os.getenv('EMAIL_OUTBOX_RETRY_BASE', 30))  # seconds, doubled per attempt
+EMAIL_OUTBOX_RETRY_MAX = float(os.getenv('EMAIL_OUTBOX_RETRY_MAX', 3600))
+EMAIL_OUTBOX_LEASE = int(os.getenv('EMAIL_OUTBOX_LEASE', 300))  # seconds before a claimed email is retried
+EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 5))
+EMAIL_OUTBOX_IDLE_TIMEOUT = float(os.getenv('EMAIL_OUTBOX_IDLE_TIMEOUT', 60))  # close SMTP after this long idle
+
 #AI keys
 AAI_KEY = os.getenv('AAI_KEY')
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'groq')  # 'groq' or 'fake' (benchmarks / dry runs)
+FAKE_LLM_OPTIONS = {
+    'latency': float(os.getenv('FAKE_LLM_LATENCY', 0.0)),
+    'output_tokens': int(os.getenv('FAKE_LLM_OUTPUT_TOKENS', 60)),
+    'error_rate': float(os.getenv('FAKE_LLM_ERROR_RATE', 0.0)),
+}
+# LLM prices in USD per million tokens, for cost reports (defaults: Groq llama-3.1-8b-instant)
+LLM_INPUT_COST_PER_MTOK = float(os.getenv('LLM_INPUT_COST_PER_MTOK', 0.05))
+LLM_OUTPUT_COST_PER_MTOK = float(os.getenv('LLM_OUTPUT_COST_PER_MTOK', 0.08))
+
+# Observability
+METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN')  # bearer token for /metrics/, closed if unset
+
+# Slow request profiling (inspect with `manage.py slow_requests`)
+SLOW_REQUEST_PROFILING = os.getenv('SLOW_REQUEST_PROFILING') == 'True'
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv('SLOW_REQUEST_THRESHOLD_MS', 2000))
+SLOW_REQUEST_PROFILER = os.getenv('SLOW_REQUEST_PROFILER', 'sample')  # 'sample' or 'cprofile'
+SLOW_REQUEST_SAMPLE_INTERVAL_MS = float(os.getenv('SLOW_REQUEST_SAMPLE_INTERVAL_MS', 5))
+SLOW_REQUEST_PROFILE_DIR = os.getenv('SLOW_REQUEST_PROFILE_DIR', str(BASE_DIR / 'profiles'))
+SLOW_REQUEST_PROFILE_LIMIT = int(os.getenv('SLOW_REQUEST_PROFILE_LIMIT', 100))
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'plain'},
+    },
+    'loggers': {
+        'hirevision.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
 
 #REST auth
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.caching.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PARSER_CLASSES': [
@@ -173,9 +238,34 @@ REST_FRAMEWORK = {
         'anon': '100/day',
         'user': '1000/day',
         'auth_login': '5/minute',
+        'auth_login_ip': os.getenv('AUTH_LOGIN_IP_RATE', '30/minute'),
     }
 }
 
+# Login throttles count in this cache; point it at a shared cache (Redis/Memcached)
+# when running several workers, otherwise each process keeps its own counters
+THROTTLE_CACHE_ALIAS = os.getenv('THROTTLE_CACHE_ALIAS', 'default')
+
+# Session users are looked up through the same cache; ModelBackend stays for existing sessions
+AUTHENTICATION_BACKENDS = [
+    'authentication.caching.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Authentication caches (user lookups, refresh-token blacklist bloom filter).
+# Use a shared cache (Redis/Memcached) for AUTH_CACHE_ALIAS when running several processes;
+# with a locmem alias users are only cached for AUTH_USER_LOCAL_TTL and blacklist checks hit the DB.
+AUTH_CACHE_ALIAS = os.getenv('AUTH_CACHE_ALIAS', 'default')
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60))  # seconds, shared cache
+AUTH_USER_LOCAL_TTL = float(os.getenv('AUTH_USER_LOCAL_TTL', 5))  # seconds, per process
+AUTH_USER_LOCAL_MAX = int(os.getenv('AUTH_USER_LOCAL_MAX', 1024))
+AUTH_BLACKLIST_BLOOM_CAPACITY = int(os.getenv('AUTH_BLACKLIST_BLOOM_CAPACITY', 100000))
+AUTH_BLACKLIST_BLOOM_ERROR_RATE = float(os.getenv('AUTH_BLACKLIST_BLOOM_ERROR_RATE', 0.001))
+AUTH_BLACKLIST_SYNC_INTERVAL = float(os.getenv('AUTH_BLACKLIST_SYNC_INTERVAL', 30))  # seconds between forced resyncs
+
+# History export (auth/export/, manage.py export_history)
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 200))  # rows fetched per query
+
 # Add File Upload Settings
 FILE_UPLOAD_HANDLERS = [
     'django.core.files.uploadhandler.MemoryFileUploadHandler',
@@ -184,6 +274,74 @@ FILE_UPLOAD_HANDLERS = [
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10 MB
 FILE_UPLOAD_PERMISSIONS = 0o644
 
+# Resume PDF extraction limits (runs in a separate worker pool)
+PDF_EXTRACTION_MAX_PAGES = int(os.getenv('PDF_EXTRACTION_MAX_PAGES', 10))
+PDF_EXTRACTION_MAX_CHARS = int(os.getenv('PDF_EXTRACTION_MAX_CHARS', 30000))
+PDF_EXTRACTION_TIMEOUT = float(os.getenv('PDF_EXTRACTION_TIMEOUT', 10))  # seconds
+PDF_EXTRACTION_WORKERS = int(os.getenv('PDF_EXTRACTION_WORKERS', 2))
+
+# Resume storage (content-addressed, deduplicated across uploads)
+RESUME_STORAGE_BACKEND = os.getenv('RESUME_STORAGE_BACKEND', 'aiinterview.storage.LocalContentAddressedStorage')
+
+# Vocabulary analysis (spaCy)
+SPACY_MODEL = os.getenv('SPACY_MODEL', 'en_core_web_sm')
+VOCABULARY_BATCH_SIZE = int(os.getenv('VOCABULARY_BATCH_SIZE', 64))
+VOCABULARY_WORKERS = int(os.getenv('VOCABULARY_WORKERS', 1))
+
+# Sentiment analysis (VADER)
+SENTIMENT_CACHE_SIZE = int(os.getenv('SENTIMENT_CACHE_SIZE', 10000))
+
+# Resume enhancer model: 'transformers' (CPU, int8), 'onnx', 'gptq', 'remote' or a dotted path
+ENHANCER_BACKEND = os.getenv('ENHANCER_BACKEND', 'transformers')
+ENHANCER_MODEL = os.getenv('ENHANCER_MODEL', 'TinyLlama/TinyLlama-1.1B-Chat-v1.0')
+ENHANCER_REMOTE_MODEL = os.getenv('ENHANCER_REMOTE_MODEL', 'llama-3.1-8b-instant')
+ENHANCER_MAX_NEW_TOKENS = int(os.getenv('ENHANCER_MAX_NEW_TOKENS', 800))  # per section
+ENHANCER_SECTION_MIN_TOKENS = int(os.getenv('ENHANCER_SECTION_MIN_TOKENS', 64))
+ENHANCER_QUANTIZE = os.getenv('ENHANCER_QUANTIZE', 'True') == 'True'  # int8 dynamic quantization (transformers)
+ENHANCER_THREADS = int(os.getenv('ENHANCER_THREADS', 0))  # torch intra-op threads, 0 = torch default
+ENHANCER_ONNX_DIR = os.getenv('ENHANCER_ONNX_DIR', str(BASE_DIR / 'onnx-models'))
+
+# Resume enhancement service (manage.py run_enhancer); 'unix:/path' or 'tcp:host:port'
+ENHANCER_SERVICE_ADDRESS = os.getenv('ENHANCER_SERVICE_ADDRESS', 'unix:/tmp/hirevision-enhancer.sock')
+ENHANCER_CONNECT_TIMEOUT = float(os.getenv('ENHANCER_CONNECT_TIMEOUT', 2))  # seconds
+ENHANCER_REQUEST_TIMEOUT = float(os.getenv('ENHANCER_REQUEST_TIMEOUT', 300))  # seconds
+ENHANCER_MAX_BATCH_SIZE = int(os.getenv('ENHANCER_MAX_BATCH_SIZE', 8))
+ENHANCER_BATCH_WAIT_MS = float(os.getenv('ENHANCER_BATCH_WAIT_MS', 50))
+ENHANCER_CACHE_SIZE = int(os.getenv('ENHANCER_CACHE_SIZE', 1000))  # cached enhancements, 0 disables
+ENHANCER_CACHE_TTL = float(os.getenv('ENHANCER_CACHE_TTL', 86400))  # seconds
+
+# Spoken answers (answer-audio/): 'assemblyai', 'offline' (local stand-in, no network) or a dotted path
+TRANSCRIPTION_BACKEND = os.getenv('TRANSCRIPTION_BACKEND', 'assemblyai')
+TRANSCRIPTION_READ_SIZE = int(os.getenv('TRANSCRIPTION_READ_SIZE', 64 * 1024))  # bytes read from the request at a time
+TRANSCRIPTION_BUFFER_CHUNKS = int(os.getenv('TRANSCRIPTION_BUFFER_CHUNKS', 32))  # chunks queued for the backend
+TRANSCRIPTION_MAX_BYTES = int(os.getenv('TRANSCRIPTION_MAX_BYTES', 25 * 1024 * 1024))  # per answer
+TRANSCRIPTION_TIMEOUT = float(os.getenv('TRANSCRIPTION_TIMEOUT', 120))  # seconds from the last chunk to the transcript
+TRANSCRIPTION_SESSION_TTL = float(os.getenv('TRANSCRIPTION_SESSION_TTL', 300))  # idle seconds before an upload is dropped
+TRANSCRIPTION_OFFLINE_OPTIONS = {
+    'segment_seconds': float(os.getenv('OFFLINE_TRANSCRIBER_SEGMENT_SECONDS', 5)),
+    'latency': float(os.getenv('OFFLINE_TRANSCRIBER_LATENCY', 0.0)),  # seconds per second of audio
+}
+
+# HR interview mode (start-interview with interview_type=hr)
+HR_INTERVIEW_MODEL = os.getenv('HR_INTERVIEW_MODEL', 'llama-3.1-8b-instant')
+
+# Technical interview mode (interview_type=technical); the model only writes follow-ups
+TECHNICAL_INTERVIEW_MODEL = os.getenv('TECHNICAL_INTERVIEW_MODEL', 'llama-3.1-8b-instant')
+
+# Question audio (question-audio/): 'gtts', 'offline' (local stand-in) or a dotted path
+TTS_BACKEND = os.getenv('TTS_BACKEND', 'gtts')
+TTS_LANGUAGE = os.getenv('TTS_LANGUAGE', 'en')
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', str(BASE_DIR / 'tts-cache'))
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', 200 * 1024 * 1024))  # least recently used files go first
+TTS_PRERENDER = os.getenv('TTS_PRERENDER', 'True') == 'True'  # synthesize in the background when a question is saved
+TTS_WORKERS = int(os.getenv('TTS_WORKERS', 2))
+TTS_RENDER_TIMEOUT = float(os.getenv('TTS_RENDER_TIMEOUT', 30))  # seconds to wait for a synthesis in progress
+
+# Adaptive aptitude exams (start-exam with mode=adaptive)
+APTITUDE_ADAPTIVE_MIN_POOL = int(os.getenv('APTITUDE_ADAPTIVE_MIN_POOL', 60))  # below this, questions come from the API
+APTITUDE_SKILL_BANDS = int(os.getenv('APTITUDE_SKILL_BANDS', 10))
+APTITUDE_SAMPLER_TTL = float(os.getenv('APTITUDE_SAMPLER_TTL', 300))  # seconds an alias table is reused
+
 #CORS settings
 CORS_ALLOW_ALL_ORIGINS = False
 CORS_ALLOWED_ORIGINS = [
@@ -223,6 +381,7 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': True,
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.caching.CachedTokenRefreshSerializer',
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
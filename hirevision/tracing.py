@@ -0,0 +1,139 @@
+"""
+Context-local request tracing.
+
+A RequestTrace is bound to the current request by RequestTimingMiddleware.
+Code anywhere in the call stack records timed spans with `span(stage)`;
+outside a request the spans are simply discarded.
+"""
+import contextvars
+import functools
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+
+class RequestTrace:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = []
+        self.tags = {}
+
+    def add(self, stage: str, duration: float, **attrs):
+        self.spans.append({'stage': stage, 'duration': duration, **attrs})
+
+    def stage_totals(self) -> Dict[str, Dict[str, float]]:
+        """Total duration and span count per stage"""
+        totals = defaultdict(lambda: {'duration': 0.0, 'count': 0})
+        for item in self.spans:
+            totals[item['stage']]['duration'] += item['duration']
+            totals[item['stage']]['count'] += 1
+        return dict(totals)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook that records every query as a 'db' span"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add('db', time.perf_counter() - start)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def activate(trace: RequestTrace):
+    return _current_trace.set(trace)
+
+
+def deactivate(token):
+    _current_trace.reset(token)
+
+
+def tag(**tags):
+    """Attach tags (e.g. interview_id) to the current request trace"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.tags.update(tags)
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """Time a block of code as a stage of the current request"""
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(stage, time.perf_counter() - start, **attrs)
+
+
+def traced(stage: str):
+    """Decorator form of span() for whole functions"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class LLMTracingCallback(BaseCallbackHandler):
+    """Records each chat model call (model, tokens, latency) as an 'llm' span"""
+
+    def __init__(self):
+        self._started = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs: Any):
+        self._started[run_id] = (time.perf_counter(), _current_trace.get())
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts, *, run_id: UUID, **kwargs: Any):
+        self._started[run_id] = (time.perf_counter(), _current_trace.get())
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, response=response)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, error=type(error).__name__)
+
+    def _finish(self, run_id, response=None, error=None):
+        started, trace = self._started.pop(run_id, (None, None))
+        if started is None or trace is None:
+            return
+        attrs = {'model': None, 'input_tokens': 0, 'output_tokens': 0}
+        if response is not None:
+            attrs.update(_usage_from_result(response))
+        if error:
+            attrs['error'] = error
+        trace.add('llm', time.perf_counter() - started, **attrs)
+
+
+def _usage_from_result(response) -> Dict[str, Any]:
+    usage = {'model': None, 'input_tokens': 0, 'output_tokens': 0}
+    llm_output = response.llm_output or {}
+    usage['model'] = llm_output.get('model_name')
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, 'message', None)
+            if message is None:
+                continue
+            usage['model'] = usage['model'] or message.response_metadata.get('model_name')
+            metadata = message.usage_metadata or {}
+            usage['input_tokens'] += metadata.get('input_tokens', 0)
+            usage['output_tokens'] += metadata.get('output_tokens', 0)
+    if not usage['input_tokens'] and 'token_usage' in llm_output:
+        token_usage = llm_output['token_usage'] or {}
+        usage['input_tokens'] = token_usage.get('prompt_tokens', 0)
+        usage['output_tokens'] = token_usage.get('completion_tokens', 0)
+    return usage
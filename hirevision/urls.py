@@ -17,9 +17,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('authentication.urls')),
     path('aptitude/', include('aptitude.urls')),
     path('aiinterview/', include('aiinterview.urls')),
+    path('analytics/', include('analytics.urls')),
+    path('metrics/', metrics_view, name='metrics'),
 ]